@@ -1,6 +1,6 @@
 {
     'name': 'Bank Noti',
-    'version': '19.0.1.0.0',
+    'version': '19.0.1.1.0',
     'summary': 'Hiển thị thông báo ngân hàng',
     'description': """
         Module hiển thị danh sách thông báo ngân hàng.
@@ -12,6 +12,9 @@
     'data': [
         'security/ir.model.access.csv',
         'views/bank_noti_views.xml',
+        'views/bank_noti_source_views.xml',
+        'views/bank_noti_daily_views.xml',
+        'data/bank_noti_source_data.xml',
         'data/bank_noti_cron.xml',
     ],
     'installable': True,
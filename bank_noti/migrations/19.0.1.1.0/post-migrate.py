@@ -0,0 +1,10 @@
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    # Cron nằm trong dữ liệu noupdate: database đã cài không nhận chu kỳ mới khi nâng cấp.
+    # Cron chạy mỗi phút, chu kỳ thật của từng nguồn nằm ở bank.noti.source (interval_minutes).
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    cron = env.ref('bank_noti.cron_fetch_bank_notifications', raise_if_not_found=False)
+    if cron:
+        cron.write({'interval_number': 1, 'interval_type': 'minutes'})
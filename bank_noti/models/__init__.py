@@ -1 +1,4 @@
 from . import bank_noti
+from . import bank_noti_watermark
+from . import bank_noti_source
+from . import bank_noti_daily
@@ -1,13 +1,19 @@
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import AccessError, UserError, ValidationError
-import requests
 import logging
 import hashlib
 from datetime import datetime
 import random
+import time
+from itertools import islice
+
+from ..tools import http_client
 
 _logger = logging.getLogger(__name__) # Khởi tạo logger để ghi log vào hệ thống.
 
+# Số bản ghi tối đa cho mỗi lô xử lý (1 câu query kiểm tra trùng + 1 lần create(vals_list)).
+INGEST_BATCH_SIZE = 500
+
 # -------------------------------------------------------------------------
 # MODEL: BANK.NOTI
 # -------------------------------------------------------------------------
@@ -26,12 +32,41 @@ class BankNoti(models.Model):
     # index=True: Tạo chỉ mục tìm kiếm nhanh trong database.
     transaction_id = fields.Char(string='Transaction ID', index=True)
 
+    # Nguồn dữ liệu (ngân hàng / tài khoản) đã cung cấp giao dịch này.
+    source_id = fields.Many2one('bank.noti.source', string='Nguồn dữ liệu', index=True, ondelete='set null')
+
     # _sql_constraints: Ràng buộc cấp database.
     # Đảm bảo transaction_id là duy nhất, không trùng lặp.
     _sql_constraints = [
         ('transaction_id_unique', 'UNIQUE(transaction_id)', 'Transaction ID đã tồn tại!')
     ]
     
+    def init(self):
+        # Index kết hợp (thời gian, tài khoản) cho các truy vấn lọc/nhóm theo ngày và tài khoản.
+        tools.create_index(
+            self.env.cr, 'bank_noti_time_account_index', self._table, ['notification_time', 'bank_account'],
+        )
+
+    # -------------------------------------------------------------------------
+    # CRUD: CẬP NHẬT BẢNG TỔNG HỢP THEO NGÀY (bank.noti.daily)
+    # -------------------------------------------------------------------------
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super(BankNoti, self).create(vals_list)
+        # Cộng dồn vào bảng tổng hợp bằng 1 câu UPSERT cho cả lô.
+        self.env['bank.noti.daily'].sudo()._add_notifications(records)
+        return records
+
+    def write(self, vals):
+        if not {'notification_time', 'bank_account', 'amount'} & set(vals):
+            return super(BankNoti, self).write(vals)
+        Daily = self.env['bank.noti.daily'].sudo()
+        keys = Daily._get_keys(self)
+        res = super(BankNoti, self).write(vals)
+        Daily._refresh_keys(keys | Daily._get_keys(self))
+        return res
+
     # -------------------------------------------------------------------------
     # SECURITY METHODS
     # -------------------------------------------------------------------------
@@ -45,7 +80,11 @@ class BankNoti(models.Model):
         # has_group(): Kiểm tra quyền.
         if not self.env.user.has_group('base.group_system'):
             raise AccessError(_('Chỉ có quản trị viên mới được phép xóa thông báo ngân hàng.'))
-        return super(BankNoti, self).unlink()
+        Daily = self.env['bank.noti.daily'].sudo()
+        keys = Daily._get_keys(self)
+        res = super(BankNoti, self).unlink()
+        Daily._refresh_keys(keys)
+        return res
 
     # -------------------------------------------------------------------------
     # CRON JOB / SCHEDULED ACTION
@@ -55,12 +94,10 @@ class BankNoti(models.Model):
     def fetch_bank_notifications(self):
         """
         Hàm này được gọi tự động bởi Cron Job (định kỳ).
-        Nhiệm vụ: Gọi API lấy sao kê và lưu vào Odoo.
+        Nhiệm vụ: Gọi API của các nguồn dữ liệu (bank.noti.source) đến hạn và lưu vào Odoo.
         """
         USE_DEMO_DATA = False # Cờ chuyển đổi chế độ Demo/Real.
-        
-        count_new = 0
-        
+
         if USE_DEMO_DATA:
             # Logic tạo dữ liệu giả lập (dành cho dev/test).
             _logger.info("Chạy ở chế độ DEMO - Tạo dữ liệu giả lập để test cron")
@@ -75,64 +112,218 @@ class BankNoti(models.Model):
                 },
                 # ... (thêm data mẫu)
             ]
-            data_list = demo_data_list
-            
+            stats = self._ingest_notifications(demo_data_list)
+            self._log_ingest_stats(stats)
+            return stats
+
+        # Logic gọi API thật: mỗi nguồn có endpoint, thông tin xác thực và chu kỳ riêng.
+        # Các nguồn được gọi song song, dữ liệu được ghi tuần tự bằng cursor của cron.
+        sources = self.env['bank.noti.source'].search([])._filter_due()
+        if not sources:
+            _logger.info("Không có nguồn dữ liệu ngân hàng nào đến hạn đồng bộ.")
+            return {}
+        return sources._fetch_notifications()
+
+    @api.model
+    def _log_ingest_stats(self, stats, label='Bank Noti'):
+        """Ghi log kết quả của 1 lần chạy pipeline."""
+        if stats['inserted'] > 0:
+            _logger.info("%s: Đồng bộ thành công: %s thông báo mới được tạo.", label, stats['inserted'])
         else:
-            # Logic gọi API thật.
-            url = 'https://bimat.2154.123corp.net/response.php'
-            try:
-                # requests.get: Thư viện Python để gọi HTTP GET.
-                response = requests.get(url, timeout=15)
-                response.raise_for_status() # Báo lỗi nếu HTTP status != 200.
-                
-                data_list = response.json() # Parse JSON trả về.
-                if not isinstance(data_list, list):
-                    _logger.warning("API không trả về danh sách JSON")
-                    return
-                
-            except requests.RequestException as e:
-                _logger.error("Lỗi kết nối URL %s: %s", url, e)
-                return
-            except ValueError:
-                _logger.error("Dữ liệu trả về không phải JSON hợp lệ")
-                return
-            except Exception as e:
-                _logger.error("Lỗi xử lý response: %s", e)
-                return
-
-        # Duyệt qua danh sách data lấy được.
-        for item in data_list:
-            # .get(): Lấy giá trị từ dict an toàn (tránh lỗi KeyError).
-            notif_time_str = item.get('time', False)
-            content = item.get('content', '')
-            amount = item.get('amount', '')
-            bank_account = item.get('bank_account', '')
-            transaction_id = item.get('transaction_id', '')
-
-            # Validate dữ liệu cơ bản.
-            if not notif_time_str or not content or not bank_account:
-                continue
+            _logger.info("%s: Không có thông báo mới (hoặc tất cả đã tồn tại).", label)
+        _logger.info(
+            "%s ingest: fetched=%s skipped=%s duplicated=%s rejected=%s inserted=%s",
+            label, stats['fetched'], stats['skipped'], stats['duplicated'], stats['rejected'], stats['inserted'],
+        )
+        _logger.info(
+            "%s ingest timings (s): %s",
+            label, ', '.join('%s=%.3f' % (stage, value) for stage, value in stats['timings'].items()),
+        )
 
-            # Kiểm tra trùng lặp (Idempotency check).
-            # search([], limit=1): Tìm xem đã có record nào trùng transaction_id chưa.
-            if self.search([('transaction_id', '=', transaction_id)], limit=1):
+    # -------------------------------------------------------------------------
+    # HTTP CLIENT
+    # -------------------------------------------------------------------------
+
+    @api.model
+    def _get_http_client(self):
+        """
+        Client HTTP dùng chung (connection pool) cấu hình qua System Parameters:
+        bank_noti.http_max_retries, bank_noti.http_backoff_factor, bank_noti.http_timeout.
+        """
+        ICP = self.env['ir.config_parameter'].sudo()
+        return http_client.get_client(
+            max_retries=int(ICP.get_param('bank_noti.http_max_retries', 3)),
+            backoff_factor=float(ICP.get_param('bank_noti.http_backoff_factor', 0.5)),
+            timeout=float(ICP.get_param('bank_noti.http_timeout', 15)),
+        )
+
+    @api.model
+    def get_http_stats(self):
+        """Thống kê độ trễ / lỗi theo từng endpoint của worker hiện tại."""
+        return http_client.get_endpoint_stats()
+
+    # -------------------------------------------------------------------------
+    # INGESTION PIPELINE (XỬ LÝ THEO LÔ)
+    # -------------------------------------------------------------------------
+
+    @api.model
+    def _prepare_notification_vals(self, item):
+        """
+        Chuyển 1 dòng dữ liệu thô từ API thành dict giá trị để tạo bank.noti.
+        Trả về False nếu dòng không hợp lệ (sẽ bị đếm là 'rejected').
+        """
+        if not isinstance(item, dict):
+            return False
+
+        # .get(): Lấy giá trị từ dict an toàn (tránh lỗi KeyError).
+        notif_time_str = item.get('time', False)
+        content = item.get('content', '')
+        amount = item.get('amount', '')
+        bank_account = item.get('bank_account', '')
+        transaction_id = item.get('transaction_id', '')
+
+        # Validate dữ liệu cơ bản.
+        # transaction_id là khóa chống trùng, thiếu nó thì không thể kiểm tra trùng lặp.
+        if not notif_time_str or not content or not bank_account or not transaction_id:
+            return False
+
+        # Chuyển thời gian sang datetime ngay từ đầu để so sánh được với watermark.
+        try:
+            notification_time = fields.Datetime.to_datetime(notif_time_str)
+        except (TypeError, ValueError):
+            return False
+
+        return {
+            'notification_time': notification_time,
+            'bank_account': bank_account,
+            'amount': amount,
+            'content': content,
+            'transaction_id': str(transaction_id),
+        }
+
+    @api.model
+    def _ingest_notifications(self, data_list, watermark=False, source=False):
+        """
+        Pipeline xử lý dữ liệu sao kê theo lô.
+
+        data_list có thể là list hoặc iterator (ví dụ parser JSON dạng stream):
+        dữ liệu được lấy ra từng lô INGEST_BATCH_SIZE dòng, xử lý xong lô này
+        mới đọc lô tiếp theo, nên bộ nhớ không tăng theo kích thước response.
+
+        Trả về dict thống kê: số dòng fetched/skipped/duplicated/rejected/inserted,
+        recordset đã tạo và tổng thời gian (giây) của từng giai đoạn.
+        """
+        state = self._ingest_start(watermark=watermark, source=source)
+        iterator = iter(data_list)
+        while True:
+            # Đọc (và parse) lô tiếp theo từ nguồn dữ liệu.
+            stage_start = time.perf_counter()
+            batch = list(islice(iterator, INGEST_BATCH_SIZE))
+            state['stats']['timings']['parse'] += time.perf_counter() - stage_start
+            if not batch:
+                break
+            self._ingest_batch(state, batch)
+        return self._ingest_finish(state)
+
+    @api.model
+    def _ingest_start(self, watermark=False, source=False):
+        """
+        Khởi tạo trạng thái cho 1 lần chạy pipeline.
+        Trạng thái được truyền qua từng lô (_ingest_batch) để nhiều nguồn dữ liệu
+        có thể được xử lý xen kẽ trong cùng một cursor.
+        """
+        return {
+            'watermark': watermark,
+            'source': source,
+            'seen_txn_ids': set(),  # transaction_id đã gặp trong payload (dedup giữa các lô).
+            'created_ids': [],
+            'latest_vals': False,   # Dòng hợp lệ mới nhất, dùng để dời watermark.
+            'stats': {
+                'fetched': 0,
+                'skipped': 0,
+                'duplicated': 0,
+                'rejected': 0,
+                'inserted': 0,
+                'records': self.browse(),
+                'timings': dict.fromkeys(('parse', 'validate', 'dedup', 'insert'), 0.0),
+            },
+        }
+
+    @api.model
+    def _ingest_batch(self, state, batch):
+        """
+        Xử lý 1 lô dữ liệu thô:
+        1. Validate: Loại bỏ các dòng thiếu thông tin (rejected).
+        2. Watermark: Bỏ qua các dòng cũ hơn mốc đã đồng bộ (skipped), chưa cần chạm DB.
+        3. Dedup trong payload: Cùng transaction_id xuất hiện nhiều lần chỉ giữ dòng đầu.
+        4. Dedup với database: Kiểm tra transaction_id của cả lô bằng 1 câu query duy nhất.
+        5. Insert: Tạo bản ghi mới bằng 1 lần create(vals_list).
+        """
+        stats = state['stats']
+        watermark = state['watermark']
+        stats['fetched'] += len(batch)
+
+        # 1 + 2 + 3. Validate, lọc theo watermark và loại trùng ngay trong payload.
+        stage_start = time.perf_counter()
+        vals_by_txn = {}  # dict giữ nguyên thứ tự xuất hiện (Python 3.7+).
+        for item in batch:
+            vals = self._prepare_notification_vals(item)
+            if not vals:
+                stats['rejected'] += 1
                 continue
+            if watermark and watermark._is_seen(vals):
+                stats['skipped'] += 1
+                continue
+            if vals['transaction_id'] in state['seen_txn_ids']:
+                stats['duplicated'] += 1
+                continue
+            state['seen_txn_ids'].add(vals['transaction_id'])
+            vals_by_txn[vals['transaction_id']] = vals
+            # Các dòng hợp lệ (kể cả đã tồn tại trong DB) đều dùng để dời watermark.
+            latest_vals = state['latest_vals']
+            if not latest_vals or vals['notification_time'] >= latest_vals['notification_time']:
+                state['latest_vals'] = vals
+        stats['timings']['validate'] += time.perf_counter() - stage_start
 
-            # Tạo bản ghi mới.
-            self.create({
-                'notification_time': notif_time_str,
-                'bank_account': bank_account,
-                'amount': amount,
-                'content': content,
-                'transaction_id': transaction_id,
-            })
-            count_new += 1
-
-        # Ghi log kết quả.
-        if count_new > 0:
-            _logger.info(f"Đồng bộ thành công: {count_new} thông báo mới được tạo.")
-        else:
-            _logger.info("Không có thông báo mới (hoặc tất cả đã tồn tại).")
+        # 4. Kiểm tra trùng lặp với database (Idempotency check) bằng 1 câu query IN.
+        stage_start = time.perf_counter()
+        if vals_by_txn:
+            existing = self.search_fetch(
+                [('transaction_id', 'in', list(vals_by_txn))], ['transaction_id'],
+            )
+            for transaction_id in set(existing.mapped('transaction_id')):
+                if vals_by_txn.pop(transaction_id, None):
+                    stats['duplicated'] += 1
+        stats['timings']['dedup'] += time.perf_counter() - stage_start
+
+        # 5. Tạo bản ghi mới của cả lô bằng 1 lần create(vals_list).
+        stage_start = time.perf_counter()
+        if vals_by_txn:
+            vals_list = list(vals_by_txn.values())
+            if state['source']:
+                for vals in vals_list:
+                    vals['source_id'] = state['source'].id
+            state['created_ids'].extend(self.create(vals_list).ids)
+            # Ghi xuống DB và giải phóng cache của ORM để bộ nhớ không tăng theo số lô.
+            self.env.invalidate_all()
+        stats['timings']['insert'] += time.perf_counter() - stage_start
+
+    @api.model
+    def _ingest_finish(self, state, advance_watermark=True):
+        """
+        Kết thúc 1 lần chạy: dời watermark (nếu có) lên giao dịch mới nhất, trả về thống kê.
+        Đây cũng là hook cấp "lần chạy" cho các module mở rộng (ví dụ gửi thông báo
+        tổng hợp cho toàn bộ bản ghi mới), được gọi kể cả khi nguồn lỗi giữa chừng
+        (advance_watermark=False) để các bản ghi đã lưu không bị bỏ sót.
+        """
+        stats = state['stats']
+        stats['records'] = self.browse(state['created_ids'])
+        stats['inserted'] = len(state['created_ids'])
+
+        if advance_watermark and state['watermark'] and state['latest_vals']:
+            state['watermark']._advance(state['latest_vals'])
+
+        return stats
 
     @api.model
     def check_unnotified_transactions(self):
@@ -0,0 +1,175 @@
+from datetime import datetime, time, timedelta
+
+from odoo import models, fields, api
+from odoo.tools import SQL
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+# -------------------------------------------------------------------------
+# MODEL: BANK.NOTI.DAILY
+# -------------------------------------------------------------------------
+# Bảng tổng hợp (materialized) dòng tiền theo ngày và tài khoản.
+# Được cập nhật dần (incremental) mỗi khi tạo/sửa/xóa bank.noti, nên các báo cáo
+# pivot/graph chỉ đọc bảng nhỏ này thay vì quét toàn bộ bảng bank_noti.
+class BankNotiDaily(models.Model):
+    _name = 'bank.noti.daily'
+    _description = 'Bank Notification Daily Aggregate'
+    _order = 'date desc, bank_account'
+    _rec_name = 'date'
+
+    date = fields.Date(string='Ngày', required=True, readonly=True, index=True)
+    # Chuỗi rỗng ('') thay cho "không có tài khoản" để khóa UNIQUE hoạt động (NULL không bao giờ trùng).
+    bank_account = fields.Char(string='Tài khoản ngân hàng', readonly=True)
+    transaction_count = fields.Integer(string='Số giao dịch', readonly=True, aggregator='sum')
+    amount_total = fields.Float(string='Tổng tiền', readonly=True, aggregator='sum')
+    amount_min = fields.Float(string='Nhỏ nhất', readonly=True, aggregator='min')
+    amount_max = fields.Float(string='Lớn nhất', readonly=True, aggregator='max')
+
+    # Khóa của câu UPSERT trong _add_notifications (ON CONFLICT (date, bank_account)).
+    _date_account_unique = models.Constraint(
+        'UNIQUE(date, bank_account)', 'Mỗi ngày/tài khoản chỉ có một dòng tổng hợp!',
+    )
+
+    def init(self):
+        # Cài mới / nâng cấp module khi đã có dữ liệu: backfill bảng tổng hợp.
+        self.env.cr.execute(SQL("SELECT 1 FROM bank_noti_daily LIMIT 1"))
+        if not self.env.cr.fetchone():
+            self.env.cr.execute(SQL("SELECT 1 FROM bank_noti LIMIT 1"))
+            if self.env.cr.fetchone():
+                self.rebuild_daily_aggregates()
+
+    # -------------------------------------------------------------------------
+    # SQL HELPERS
+    # -------------------------------------------------------------------------
+
+    @api.model
+    def _get_day_expression(self):
+        """Ngày của giao dịch theo múi giờ báo cáo (System Parameter bank_noti.daily_tz, mặc định UTC)."""
+        tz = self.env['ir.config_parameter'].sudo().get_param('bank_noti.daily_tz') or 'UTC'
+        return SQL("(timezone(%s, timezone('UTC', n.notification_time)))::date", tz)
+
+    @api.model
+    def _aggregate_query(self, where):
+        """SELECT tổng hợp các dòng bank_noti thỏa điều kiện where, nhóm theo (ngày, tài khoản)."""
+        return SQL(
+            """
+            SELECT %(day)s, COALESCE(n.bank_account, ''), COUNT(*), SUM(n.amount), MIN(n.amount), MAX(n.amount)
+              FROM bank_noti n
+             WHERE n.notification_time IS NOT NULL AND %(where)s
+             GROUP BY 1, 2
+            """,
+            day=self._get_day_expression(), where=where,
+        )
+
+    def _flush_source(self):
+        self.env['bank.noti'].flush_model(['notification_time', 'bank_account', 'amount'])
+
+    # -------------------------------------------------------------------------
+    # INCREMENTAL REFRESH
+    # -------------------------------------------------------------------------
+
+    @api.model
+    def _add_notifications(self, notifications):
+        """
+        Cộng dồn các bank.noti MỚI TẠO vào bảng tổng hợp bằng 1 câu UPSERT
+        (INSERT ... ON CONFLICT DO UPDATE), không cần đọc lại dữ liệu cũ.
+        """
+        if not notifications:
+            return
+        self._flush_source()
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO bank_noti_daily (date, bank_account, transaction_count, amount_total, amount_min, amount_max,
+                                         create_uid, create_date, write_uid, write_date)
+            SELECT agg.*, %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+              FROM (%(aggregate)s) AS agg
+            ON CONFLICT (date, bank_account) DO UPDATE SET
+                transaction_count = bank_noti_daily.transaction_count + EXCLUDED.transaction_count,
+                amount_total = bank_noti_daily.amount_total + EXCLUDED.amount_total,
+                amount_min = LEAST(bank_noti_daily.amount_min, EXCLUDED.amount_min),
+                amount_max = GREATEST(bank_noti_daily.amount_max, EXCLUDED.amount_max),
+                write_uid = EXCLUDED.write_uid,
+                write_date = EXCLUDED.write_date
+            """,
+            uid=self.env.uid,
+            aggregate=self._aggregate_query(SQL('n.id IN %s', tuple(notifications.ids))),
+        ))
+        self.invalidate_model()
+
+    @api.model
+    def _get_keys(self, notifications):
+        """Các khóa (ngày, tài khoản) mà các bank.noti đang thuộc về."""
+        if not notifications:
+            return set()
+        self._flush_source()
+        self.env.cr.execute(SQL(
+            "SELECT DISTINCT %s, COALESCE(n.bank_account, '') FROM bank_noti n WHERE n.id IN %s AND n.notification_time IS NOT NULL",
+            self._get_day_expression(), tuple(notifications.ids),
+        ))
+        return set(self.env.cr.fetchall())
+
+    @api.model
+    def _refresh_keys(self, keys):
+        """
+        Tính lại hoàn toàn các dòng (ngày, tài khoản) cho trước từ bảng gốc.
+        Dùng khi sửa/xóa bank.noti, vì MIN/MAX không thể trừ ngược như SUM/COUNT.
+        """
+        if not keys:
+            return
+        self._flush_source()
+        keys = list(keys)
+        key_values = SQL(', ').join(SQL('(%s::date, %s)', day, account) for day, account in keys)
+        # Biểu thức ngày theo múi giờ không dùng được index: lọc thêm theo khoảng UTC
+        # (lệch ±1 ngày, đủ cho mọi múi giờ) để dùng index trên notification_time.
+        days = [fields.Date.to_date(day) for day, _account in keys]
+        time_range = SQL(
+            "n.notification_time >= %s AND n.notification_time < %s",
+            datetime.combine(min(days) - timedelta(days=1), time.min),
+            datetime.combine(max(days) + timedelta(days=2), time.min),
+        )
+        self.env.cr.execute(SQL(
+            "DELETE FROM bank_noti_daily WHERE (date, bank_account) IN (%s)", key_values,
+        ))
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO bank_noti_daily (date, bank_account, transaction_count, amount_total, amount_min, amount_max,
+                                         create_uid, create_date, write_uid, write_date)
+            SELECT agg.*, %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+              FROM (%(aggregate)s) AS agg
+            """,
+            uid=self.env.uid,
+            aggregate=self._aggregate_query(SQL(
+                "%s AND (%s, COALESCE(n.bank_account, '')) IN (%s)", time_range, self._get_day_expression(), key_values,
+            )),
+        ))
+        self.invalidate_model()
+
+    # -------------------------------------------------------------------------
+    # REBUILD (BACKFILL)
+    # -------------------------------------------------------------------------
+
+    @api.model
+    def rebuild_daily_aggregates(self):
+        """
+        Xây lại toàn bộ bảng tổng hợp từ bank_noti (lần cài đặt đầu tiên, hoặc sau khi
+        đổi bank_noti.daily_tz). Có thể gọi từ menu hoặc odoo shell:
+        env['bank.noti.daily'].rebuild_daily_aggregates()
+        """
+        self._flush_source()
+        self.env.cr.execute(SQL("DELETE FROM bank_noti_daily"))
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO bank_noti_daily (date, bank_account, transaction_count, amount_total, amount_min, amount_max,
+                                         create_uid, create_date, write_uid, write_date)
+            SELECT agg.*, %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+              FROM (%(aggregate)s) AS agg
+            """,
+            uid=self.env.uid,
+            aggregate=self._aggregate_query(SQL('TRUE')),
+        ))
+        count = self.env.cr.rowcount
+        self.invalidate_model()
+        _logger.info("Bank Noti: Rebuilt %s daily aggregate rows.", count)
+        return count
@@ -0,0 +1,260 @@
+from odoo import models, fields, _
+import base64
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
+
+from ..tools import http_client, json_stream
+from .bank_noti import INGEST_BATCH_SIZE
+
+_logger = logging.getLogger(__name__)
+
+# Kích thước mỗi chunk (bytes) khi đọc body của response theo dạng stream.
+STREAM_CHUNK_SIZE = 64 * 1024
+# Thời gian chờ (giây) khi đẩy 1 lô vào hàng đợi trước khi kiểm tra lại tín hiệu dừng.
+QUEUE_PUT_TIMEOUT = 1.0
+
+
+def _fetch_worker(job, out_queue, cancel_event):
+    """
+    Chạy trong thread của pool: CHỈ gọi HTTP và parse JSON, không đụng tới ORM/cursor.
+
+    Kết quả được đẩy vào out_queue theo từng lô INGEST_BATCH_SIZE dòng:
+    ('batch', source_id, items) ... rồi ('done', source_id, result).
+    Hàng đợi có giới hạn nên thread sẽ tự chờ nếu luồng ghi DB chưa xử lý kịp.
+    """
+    source_id = job['source_id']
+
+    def put(message):
+        while not cancel_event.is_set():
+            try:
+                out_queue.put(message, timeout=QUEUE_PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    started = time.perf_counter()
+    result = {'status': 'ok', 'error': False, 'etag': False, 'last_modified': False}
+    response = None
+    try:
+        response = job['client'].get(
+            job['url'],
+            params=job['params'],
+            headers=job['headers'],
+            etag=job['etag'],
+            last_modified=job['last_modified'],
+            stream=True,
+        )
+        if response.status_code == 304:
+            # Dữ liệu không đổi: bỏ qua hoàn toàn bước parse và truy vấn DB.
+            result['status'] = 'not_modified'
+        else:
+            result['etag'] = response.headers.get('ETag') or False
+            result['last_modified'] = response.headers.get('Last-Modified') or False
+            items = json_stream.iter_json_array(response.iter_content(chunk_size=STREAM_CHUNK_SIZE))
+            batch = []
+            for item in items:
+                batch.append(item)
+                if len(batch) >= INGEST_BATCH_SIZE:
+                    if not put(('batch', source_id, batch)):
+                        return
+                    batch = []
+            if batch and not put(('batch', source_id, batch)):
+                return
+    except (requests.RequestException, ValueError) as e:
+        result.update(status='error', error=str(e))
+    except Exception as e:  # noqa: BLE001 - lỗi bất ngờ của 1 nguồn không được làm hỏng các nguồn khác
+        _logger.exception("Lỗi không xác định khi lấy dữ liệu nguồn %s", job['url'])
+        result.update(status='error', error=str(e))
+    finally:
+        if response is not None:
+            response.close()
+    result['duration'] = time.perf_counter() - started
+    put(('done', source_id, result))
+
+
+# -------------------------------------------------------------------------
+# MODEL: BANK.NOTI.SOURCE
+# -------------------------------------------------------------------------
+# Cấu hình nguồn dữ liệu: mỗi dòng là 1 ngân hàng / tài khoản với endpoint,
+# thông tin xác thực và chu kỳ đồng bộ riêng.
+class BankNotiSource(models.Model):
+    _name = 'bank.noti.source'
+    _description = 'Bank Notification Source'
+    _order = 'sequence, id'
+
+    name = fields.Char(string='Tên nguồn', required=True)
+    sequence = fields.Integer(default=10)
+    active = fields.Boolean(default=True)
+    bank_account = fields.Char(string='Tài khoản ngân hàng')
+    endpoint_url = fields.Char(string='Endpoint URL', required=True)
+
+    # Thông tin xác thực: chỉ quản trị viên hệ thống được xem/sửa.
+    auth_type = fields.Selection([
+        ('none', 'Không xác thực'),
+        ('bearer', 'Bearer token'),
+        ('basic', 'Basic auth'),
+    ], string='Kiểu xác thực', default='none', required=True)
+    auth_username = fields.Char(string='Username', groups='base.group_system')
+    auth_secret = fields.Char(string='Token / Password', groups='base.group_system')
+
+    interval_minutes = fields.Integer(string='Chu kỳ (phút)', default=5, required=True)
+    last_fetch_at = fields.Datetime(string='Lần đồng bộ cuối', readonly=True, copy=False)
+    last_status = fields.Selection([
+        ('ok', 'Thành công'),
+        ('not_modified', 'Không đổi (304)'),
+        ('error', 'Lỗi'),
+    ], string='Trạng thái', readonly=True, copy=False)
+    last_error = fields.Text(string='Lỗi gần nhất', readonly=True, copy=False)
+    last_duration = fields.Float(string='Thời gian (giây)', readonly=True, copy=False)
+
+    # -------------------------------------------------------------------------
+    # HELPERS
+    # -------------------------------------------------------------------------
+
+    def _get_watermark(self):
+        self.ensure_one()
+        return self.env['bank.noti.watermark']._get_for_source('bank.noti.source,%s' % self.id)
+
+    def _get_request_headers(self):
+        """Header xác thực của nguồn (đọc bằng sudo vì thông tin xác thực bị giới hạn quyền)."""
+        self.ensure_one()
+        source = self.sudo()
+        if source.auth_type == 'bearer' and source.auth_secret:
+            return {'Authorization': 'Bearer %s' % source.auth_secret}
+        if source.auth_type == 'basic' and source.auth_username:
+            token = base64.b64encode(('%s:%s' % (source.auth_username, source.auth_secret or '')).encode()).decode()
+            return {'Authorization': 'Basic %s' % token}
+        return {}
+
+    def _filter_due(self):
+        """Các nguồn đã đến hạn đồng bộ theo chu kỳ riêng của từng nguồn."""
+        now = fields.Datetime.now()
+        return self.filtered(
+            lambda source: not source.last_fetch_at
+            or source.last_fetch_at + timedelta(minutes=source.interval_minutes) <= now
+        )
+
+    # -------------------------------------------------------------------------
+    # FETCH ENGINE
+    # -------------------------------------------------------------------------
+
+    def _fetch_notifications(self):
+        """
+        Đồng bộ nhiều nguồn cùng lúc.
+
+        - Các thread trong pool (giới hạn bởi System Parameter bank_noti.fetch_max_workers)
+          gọi HTTP và parse JSON song song, mỗi nguồn độc lập với nhau.
+        - Luồng chính (cursor của cron) nhận từng lô qua hàng đợi và ghi DB tuần tự,
+          vì cursor/ORM không dùng chung được giữa các thread.
+        Tổng thời gian mỗi chu kỳ xấp xỉ thời gian của nguồn chậm nhất thay vì tổng các nguồn.
+
+        Trả về dict {source_id: stats}.
+        """
+        BankNoti = self.env['bank.noti']
+        ICP = self.env['ir.config_parameter'].sudo()
+        max_workers = max(1, int(ICP.get_param('bank_noti.fetch_max_workers', 4)))
+        client = BankNoti._get_http_client()
+
+        # Chuẩn bị dữ liệu cho từng nguồn ở luồng chính (các thread không được đọc ORM).
+        jobs = []
+        states = {}
+        for source in self:
+            watermark = source._get_watermark()
+            jobs.append({
+                'source_id': source.id,
+                'url': source.endpoint_url,
+                'params': watermark._get_request_params(),
+                'headers': source._get_request_headers(),
+                'etag': watermark.etag,
+                'last_modified': watermark.last_modified,
+                'client': client,
+            })
+            states[source.id] = BankNoti._ingest_start(watermark=watermark, source=source)
+
+        # Hàng đợi có giới hạn: giữ bộ nhớ ổn định khi các nguồn trả về dữ liệu lớn.
+        out_queue = queue.Queue(maxsize=max_workers * 2)
+        cancel_event = threading.Event()
+        results = {}
+        failed = set()
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='bank_noti_fetch') as executor:
+            for job in jobs:
+                executor.submit(_fetch_worker, job, out_queue, cancel_event)
+            try:
+                while len(results) < len(jobs):
+                    kind, source_id, payload = out_queue.get()
+                    if kind == 'done':
+                        results[source_id] = payload
+                        continue
+                    if source_id in failed:
+                        continue
+                    # Savepoint: lỗi ghi DB của 1 nguồn không làm mất dữ liệu của các nguồn khác.
+                    try:
+                        with self.env.cr.savepoint():
+                            BankNoti._ingest_batch(states[source_id], payload)
+                    except Exception as e:
+                        _logger.exception("Lỗi ghi dữ liệu của nguồn %s", source_id)
+                        failed.add(source_id)
+                        states[source_id]['error'] = str(e)
+            finally:
+                # Báo các thread còn chạy dừng lại (ví dụ khi luồng chính gặp lỗi),
+                # tránh executor chờ mãi các thread đang bị chặn ở hàng đợi đầy.
+                cancel_event.set()
+
+        all_stats = {}
+        for source in self:
+            result = results.get(source.id, {'status': 'error', 'error': _('Không nhận được kết quả'), 'duration': 0.0})
+            state = states[source.id]
+            if source.id in failed:
+                result = dict(result, status='error', error=state.get('error'))
+            all_stats[source.id] = source._finish_fetch(state, result)
+        return all_stats
+
+    def _finish_fetch(self, state, result):
+        """Ghi nhận kết quả đồng bộ của 1 nguồn (chạy ở luồng chính)."""
+        self.ensure_one()
+        BankNoti = self.env['bank.noti']
+        label = 'Bank Noti [%s]' % self.name
+        if result['status'] == 'ok':
+            stats = BankNoti._ingest_finish(state)
+            # Chỉ lưu ETag/Last-Modified khi đã xử lý trọn vẹn response.
+            state['watermark']._set_http_validators(result['etag'], result['last_modified'])
+            BankNoti._log_ingest_stats(stats, label=label)
+        else:
+            # Lỗi giữa chừng: các lô trước đó vẫn được lưu nhưng watermark không được dời,
+            # lần chạy sau sẽ lấy lại và bỏ qua các dòng đã tồn tại.
+            stats = BankNoti._ingest_finish(state, advance_watermark=False)
+            if result['status'] == 'not_modified':
+                _logger.info("%s: Không có thông báo mới (304 Not Modified).", label)
+            else:
+                _logger.error("%s: Lỗi đồng bộ từ %s: %s", label, self.endpoint_url, result['error'])
+
+        endpoint_stats = http_client.get_endpoint_stats().get(http_client.endpoint_key(self.endpoint_url))
+        if endpoint_stats:
+            _logger.info(
+                "%s HTTP: requests=%s failures=%s retries=%s not_modified=%s latency_avg=%.3fs latency_max=%.3fs",
+                label, endpoint_stats['requests'], endpoint_stats['failures'], endpoint_stats['retries'],
+                endpoint_stats['not_modified'], endpoint_stats['latency_avg'], endpoint_stats['latency_max'],
+            )
+
+        self.write({
+            'last_fetch_at': fields.Datetime.now(),
+            'last_status': result['status'],
+            'last_error': result.get('error') or False,
+            'last_duration': result.get('duration', 0.0),
+        })
+        return stats
+
+    def action_fetch_now(self):
+        """
+        Nút bấm: đồng bộ ngay các nguồn được chọn (không chờ chu kỳ).
+        Chạy bằng sudo như cron: bank.noti chỉ đọc với mọi nhóm (kể cả quản trị viên).
+        """
+        self.sudo()._fetch_notifications()
+        return True
@@ -0,0 +1,82 @@
+from odoo import models, fields, api
+
+
+# -------------------------------------------------------------------------
+# MODEL: BANK.NOTI.WATERMARK
+# -------------------------------------------------------------------------
+# Lưu "vạch mốc" (watermark) của từng nguồn dữ liệu ngân hàng:
+# giao dịch mới nhất đã đồng bộ được. Lần chạy cron sau chỉ cần lấy
+# các giao dịch phát sinh sau mốc này thay vì tải lại toàn bộ lịch sử.
+class BankNotiWatermark(models.Model):
+    _name = 'bank.noti.watermark'
+    _description = 'Bank Notification Fetch Watermark'
+    _rec_name = 'source_key'
+
+    # Khóa định danh nguồn dữ liệu (ví dụ: URL của endpoint).
+    source_key = fields.Char(string='Nguồn dữ liệu', required=True, index=True)
+    last_notification_time = fields.Datetime(string='Thời gian giao dịch cuối')
+    last_transaction_id = fields.Char(string='Transaction ID cuối')
+
+    # Validator HTTP của response lần trước, gửi lại để server trả 304 nếu không có gì mới.
+    etag = fields.Char(string='ETag')
+    last_modified = fields.Char(string='Last-Modified')
+
+    _source_key_unique = models.Constraint(
+        'UNIQUE(source_key)', 'Mỗi nguồn dữ liệu chỉ có một watermark!',
+    )
+
+    @api.model
+    def _get_for_source(self, source_key):
+        """Lấy watermark của nguồn, tạo mới (rỗng) nếu chưa có."""
+        watermark = self.search([('source_key', '=', source_key)], limit=1)
+        if not watermark:
+            watermark = self.create({'source_key': source_key})
+        return watermark
+
+    def _get_request_params(self):
+        """Tham số 'since' gửi kèm request để API chỉ trả về dữ liệu mới."""
+        self.ensure_one()
+        params = {}
+        if self.last_notification_time:
+            params['since'] = fields.Datetime.to_string(self.last_notification_time)
+        if self.last_transaction_id:
+            params['since_id'] = self.last_transaction_id
+        return params
+
+    def _set_http_validators(self, etag, last_modified):
+        """Lưu ETag/Last-Modified của response đã xử lý xong cho lần gọi sau."""
+        self.ensure_one()
+        etag = etag or False
+        last_modified = last_modified or False
+        if (etag, last_modified) != (self.etag, self.last_modified):
+            self.write({'etag': etag, 'last_modified': last_modified})
+
+    def _is_seen(self, vals):
+        """
+        Kiểm tra 1 dòng (đã qua _prepare_notification_vals) có nằm dưới mốc không.
+
+        Dòng cũ hơn mốc thời gian -> bỏ qua.
+        Dòng trùng đúng mốc thời gian chỉ bị bỏ qua nếu chính là giao dịch cuối,
+        vì nhiều giao dịch có thể cùng một thời điểm; các dòng còn lại sẽ được
+        bước kiểm tra trùng với database xử lý.
+        """
+        self.ensure_one()
+        if not self.last_notification_time:
+            return False
+        notification_time = vals['notification_time']
+        if notification_time < self.last_notification_time:
+            return True
+        return (
+            notification_time == self.last_notification_time
+            and vals['transaction_id'] == self.last_transaction_id
+        )
+
+    def _advance(self, vals):
+        """Dời mốc lên giao dịch vals (nếu không cũ hơn mốc hiện tại)."""
+        self.ensure_one()
+        if self.last_notification_time and vals['notification_time'] < self.last_notification_time:
+            return
+        self.write({
+            'last_notification_time': vals['notification_time'],
+            'last_transaction_id': vals['transaction_id'],
+        })
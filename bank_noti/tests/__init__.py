@@ -0,0 +1,4 @@
+from . import test_json_stream
+from . import test_http_client
+from . import test_bank_noti_source
+from . import test_bank_noti_daily
@@ -0,0 +1,99 @@
+from datetime import datetime
+
+from odoo.tests.common import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestBankNotiDaily(TransactionCase):
+    """Bảng tổng hợp cập nhật dần phải luôn khớp với kết quả tính lại toàn bộ (rebuild_daily_aggregates)."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Daily = cls.env['bank.noti.daily']
+        cls.notifications = cls.env['bank.noti'].create([
+            cls._vals(datetime(2025, 3, 1, 8, 0), '111', 100, 'D1'),
+            cls._vals(datetime(2025, 3, 1, 9, 0), '111', 300, 'D2'),
+            cls._vals(datetime(2025, 3, 1, 10, 0), '222', 50, 'D3'),
+            cls._vals(datetime(2025, 3, 2, 23, 30), '111', 70, 'D4'),
+        ])
+
+    @classmethod
+    def _vals(cls, notification_time, bank_account, amount, transaction_id):
+        return {
+            'notification_time': notification_time,
+            'bank_account': bank_account,
+            'amount': amount,
+            'content': 'CK %s' % transaction_id,
+            'transaction_id': 'DAILY-TEST-%s' % transaction_id,
+        }
+
+    def _snapshot(self):
+        rows = self.Daily.search_read([], ['date', 'bank_account', 'transaction_count', 'amount_total', 'amount_min', 'amount_max'])
+        return sorted(
+            (row['date'], row['bank_account'] or '', row['transaction_count'], row['amount_total'], row['amount_min'], row['amount_max'])
+            for row in rows
+        )
+
+    def assertMatchesRebuild(self):
+        incremental = self._snapshot()
+        self.Daily.rebuild_daily_aggregates()
+        self.assertEqual(incremental, self._snapshot())
+
+    def _row(self, date, bank_account):
+        return self.Daily.search([('date', '=', date), ('bank_account', '=', bank_account)])
+
+    def test_create(self):
+        row = self._row('2025-03-01', '111')
+        self.assertEqual((row.transaction_count, row.amount_total, row.amount_min, row.amount_max), (2, 400, 100, 300))
+        self.assertMatchesRebuild()
+
+        # Lô mới vừa cộng vào dòng có sẵn vừa tạo dòng mới.
+        self.env['bank.noti'].create([
+            self._vals(datetime(2025, 3, 1, 11, 0), '111', 20, 'D5'),
+            self._vals(datetime(2025, 3, 1, 12, 0), '111', 500, 'D6'),
+            self._vals(datetime(2025, 3, 3, 8, 0), '333', 10, 'D7'),
+        ])
+        row = self._row('2025-03-01', '111')
+        self.assertEqual((row.transaction_count, row.amount_total, row.amount_min, row.amount_max), (4, 920, 20, 500))
+        self.assertMatchesRebuild()
+
+    def test_write(self):
+        first, second, third, fourth = self.notifications
+        # Đổi số tiền: MIN/MAX được tính lại.
+        second.amount = 10
+        self.assertMatchesRebuild()
+        # Đổi tài khoản: giao dịch chuyển sang dòng khác, dòng cũ còn lại được tính lại.
+        first.bank_account = '222'
+        self.assertMatchesRebuild()
+        # Đổi ngày: dòng cũ không còn giao dịch nào thì bị xóa.
+        fourth.notification_time = datetime(2025, 3, 1, 7, 0)
+        self.assertFalse(self._row('2025-03-02', '111'))
+        self.assertMatchesRebuild()
+        # Ghi nhiều bản ghi cùng lúc.
+        (first | third).write({'amount': 999})
+        self.assertMatchesRebuild()
+
+    def test_unlink(self):
+        first, second, third, fourth = self.notifications
+        second.unlink()
+        row = self._row('2025-03-01', '111')
+        self.assertEqual((row.transaction_count, row.amount_total, row.amount_min, row.amount_max), (1, 100, 100, 100))
+        self.assertMatchesRebuild()
+
+        (third | fourth).unlink()
+        self.assertFalse(self._row('2025-03-01', '222'))
+        self.assertFalse(self._row('2025-03-02', '111'))
+        self.assertMatchesRebuild()
+
+    def test_report_timezone(self):
+        # 23:30 UTC ngày 02/03 là ngày 03/03 theo giờ Việt Nam.
+        self.env['ir.config_parameter'].sudo().set_param('bank_noti.daily_tz', 'Asia/Ho_Chi_Minh')
+        self.Daily.rebuild_daily_aggregates()
+        self.assertTrue(self._row('2025-03-03', '111'))
+
+        self.notifications[3].amount = 5
+        self.env['bank.noti'].create(self._vals(datetime(2025, 3, 2, 20, 0), '111', 15, 'D8'))
+        row = self._row('2025-03-03', '111')
+        self.assertEqual((row.transaction_count, row.amount_total), (2, 20))
+        self.assertMatchesRebuild()
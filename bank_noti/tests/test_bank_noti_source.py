@@ -0,0 +1,159 @@
+import json
+import queue
+import threading
+from unittest.mock import patch
+
+import requests
+
+from odoo.tests.common import TransactionCase, new_test_user, tagged
+
+from odoo.addons.bank_noti.models import bank_noti_source as bank_noti_source_module
+from odoo.addons.bank_noti.tests.test_http_client import make_response
+
+
+class _FakeClient:
+    """Client giả: trả response (hoặc raise exception) đã cấu hình theo URL."""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.calls = []
+
+    def get(self, url, **kwargs):
+        self.calls.append((url, kwargs))
+        response = self.responses[url]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+@tagged('post_install', '-at_install')
+class TestBankNotiSource(TransactionCase):
+
+    def setUp(self):
+        super().setUp()
+        # Lô nhỏ để thấy rõ việc chia lô.
+        patcher = patch.object(bank_noti_source_module, 'INGEST_BATCH_SIZE', 10)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _rows(self, count, prefix):
+        return [{
+            'time': '2024-02-01 08:%02d:%02d' % (i // 60 % 60, i % 60),
+            'content': 'Chuyen khoan %s' % i,
+            'bank_account': '1234567890',
+            'amount': 1000 + i,
+            'transaction_id': '%s%05d' % (prefix, i),
+        } for i in range(count)]
+
+    def _body(self, rows):
+        return json.dumps(rows).encode()
+
+    def _job(self, client, url):
+        return {
+            'source_id': 1, 'url': url, 'params': {}, 'headers': {},
+            'etag': False, 'last_modified': False, 'client': client,
+        }
+
+    def _run_worker(self, response):
+        url = 'http://bank.test/worker'
+        out_queue = queue.Queue()
+        bank_noti_source_module._fetch_worker(self._job(_FakeClient({url: response}), url), out_queue, threading.Event())
+        messages = []
+        while not out_queue.empty():
+            messages.append(out_queue.get_nowait())
+        return messages
+
+    # -------------------------------------------------------------------------
+    # _fetch_worker
+    # -------------------------------------------------------------------------
+
+    def test_worker_success(self):
+        rows = self._rows(25, 'W')
+        messages = self._run_worker(make_response(200, self._body(rows), headers={'ETag': '"e1"', 'Last-Modified': 'lm'}))
+        batches = [payload for kind, _source_id, payload in messages if kind == 'batch']
+        self.assertEqual([len(batch) for batch in batches], [10, 10, 5])
+        self.assertEqual([item for batch in batches for item in batch], rows)
+        kind, source_id, result = messages[-1]
+        self.assertEqual((kind, source_id), ('done', 1))
+        self.assertEqual(result['status'], 'ok')
+        self.assertEqual((result['etag'], result['last_modified']), ('"e1"', 'lm'))
+
+    def test_worker_not_modified(self):
+        messages = self._run_worker(make_response(304))
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(messages[0][2]['status'], 'not_modified')
+
+    def test_worker_failure(self):
+        messages = self._run_worker(requests.ConnectionError("down"))
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(messages[0][2]['status'], 'error')
+        self.assertIn('down', messages[0][2]['error'])
+
+    def test_worker_partial_batch(self):
+        # Response bị cắt giữa chừng: các lô đầy đã gửi, lỗi được báo ở cuối, không có ETag.
+        body = self._body(self._rows(25, 'P'))[:-40]
+        messages = self._run_worker(make_response(200, body, headers={'ETag': '"e1"'}))
+        kinds = [kind for kind, _source_id, _payload in messages]
+        self.assertEqual(kinds, ['batch', 'batch', 'done'])
+        self.assertEqual(messages[-1][2]['status'], 'error')
+
+    def test_worker_bounded_queue_cancel(self):
+        # Hàng đợi đầy và luồng chính đã dừng: thread không bị treo mãi.
+        url = 'http://bank.test/worker_cancel'
+        out_queue = queue.Queue(maxsize=1)
+        cancel_event = threading.Event()
+        job = self._job(_FakeClient({url: make_response(200, self._body(self._rows(50, 'C')))}), url)
+        with patch.object(bank_noti_source_module, 'QUEUE_PUT_TIMEOUT', 0.05):
+            thread = threading.Thread(target=bank_noti_source_module._fetch_worker, args=(job, out_queue, cancel_event))
+            thread.start()
+            first = out_queue.get(timeout=5)
+            cancel_event.set()
+            thread.join(timeout=5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(first[0], 'batch')
+
+    # -------------------------------------------------------------------------
+    # _fetch_notifications (luồng chính)
+    # -------------------------------------------------------------------------
+
+    def test_fetch_sources(self):
+        Source = self.env['bank.noti.source']
+        ok_source = Source.create({'name': 'OK', 'endpoint_url': 'http://bank.test/ok'})
+        partial_source = Source.create({'name': 'Partial', 'endpoint_url': 'http://bank.test/partial'})
+        cached_source = Source.create({'name': 'Cached', 'endpoint_url': 'http://bank.test/cached'})
+        down_source = Source.create({'name': 'Down', 'endpoint_url': 'http://bank.test/down'})
+        client = _FakeClient({
+            'http://bank.test/ok': make_response(200, self._body(self._rows(25, 'OK')), headers={'ETag': '"ok"'}),
+            'http://bank.test/partial': make_response(200, self._body(self._rows(25, 'PA'))[:-40], headers={'ETag': '"pa"'}),
+            'http://bank.test/cached': make_response(304),
+            'http://bank.test/down': requests.ConnectionError("down"),
+        })
+        with patch.object(type(self.env['bank.noti']), '_get_http_client', lambda self: client):
+            stats = (ok_source | partial_source | cached_source | down_source)._fetch_notifications()
+
+        BankNoti = self.env['bank.noti']
+        self.assertEqual(stats[ok_source.id]['inserted'], 25)
+        self.assertEqual(ok_source.last_status, 'ok')
+        self.assertEqual(ok_source._get_watermark().etag, '"ok"')
+        self.assertEqual(ok_source._get_watermark().last_transaction_id, 'OK00024')
+
+        # Lô đầy đã nhận được vẫn được lưu, nhưng watermark/ETag không được dời.
+        self.assertEqual(BankNoti.search_count([('transaction_id', '=like', 'PA%')]), 20)
+        self.assertEqual(partial_source.last_status, 'error')
+        self.assertFalse(partial_source._get_watermark().etag)
+        self.assertFalse(partial_source._get_watermark().last_transaction_id)
+
+        self.assertEqual(cached_source.last_status, 'not_modified')
+        self.assertEqual(stats[cached_source.id]['inserted'], 0)
+        self.assertEqual(down_source.last_status, 'error')
+        self.assertIn('down', down_source.last_error)
+
+    def test_action_fetch_now(self):
+        # Quản trị viên (không phải superuser) bấm "Đồng bộ ngay": bank.noti không cho tạo theo ACL.
+        admin = new_test_user(self.env, login='bank_noti_admin', groups='base.group_user,base.group_system')
+        source = self.env['bank.noti.source'].create({'name': 'Now', 'endpoint_url': 'http://bank.test/now'})
+        client = _FakeClient({'http://bank.test/now': make_response(200, self._body(self._rows(5, 'NOW')))})
+        with patch.object(type(self.env['bank.noti']), '_get_http_client', lambda self: client):
+            source.with_user(admin).action_fetch_now()
+        self.assertEqual(source.last_status, 'ok')
+        self.assertEqual(self.env['bank.noti'].search_count([('transaction_id', '=like', 'NOW%')]), 5)
@@ -0,0 +1,115 @@
+import io
+from unittest.mock import patch
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from odoo.tests.common import TransactionCase, tagged
+
+from odoo.addons.bank_noti.tools import http_client
+
+
+def make_response(status, body=b'', headers=None):
+    """Response giả (không gọi mạng), đọc được cả dạng stream qua iter_content()."""
+    response = requests.Response()
+    response.status_code = status
+    response.headers = CaseInsensitiveDict(headers or {})
+    response.raw = io.BytesIO(body)
+    response.url = 'http://bank.test/feed'
+    return response
+
+
+@tagged('post_install', '-at_install')
+class TestHttpClient(TransactionCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = http_client.BankFeedClient(max_retries=3, backoff_factor=0.5, backoff_max=4.0, timeout=5)
+        self.addCleanup(self.client.session.close)
+        # Không chờ thật: ghi lại thời gian chờ của từng lần thử lại.
+        sleep_patcher = patch.object(http_client.time, 'sleep')
+        self.sleep = sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+
+    def _get(self, url, responses, **kwargs):
+        """Gọi client.get() với session.get trả lần lượt các response / exception đã cho."""
+        with patch.object(self.client.session, 'get', side_effect=responses) as session_get:
+            try:
+                return self.client.get(url, **kwargs)
+            finally:
+                self.session_get = session_get
+
+    def _stats(self, url):
+        return http_client.get_endpoint_stats()[http_client.endpoint_key(url)]
+
+    def test_retry_then_success(self):
+        url = 'http://bank.test/retry_then_success'
+        response = self._get(url, [
+            make_response(503),
+            requests.ConnectionError("connection reset"),
+            requests.Timeout("read timeout"),
+            make_response(200, b'[]'),
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.session_get.call_count, 4)
+        self.assertEqual(self.sleep.call_count, 3)
+        stats = self._stats(url)
+        self.assertEqual(stats['retries'], 3)
+        self.assertEqual(stats['success'], 1)
+        self.assertEqual(stats['failures'], 0)
+        self.assertEqual(stats['requests'], 4)
+
+    def test_retries_exhausted(self):
+        url = 'http://bank.test/retries_exhausted'
+        with self.assertRaises(requests.HTTPError):
+            self._get(url, [make_response(502) for _ in range(4)])
+        # 1 lần gọi đầu + max_retries lần thử lại.
+        self.assertEqual(self.session_get.call_count, 4)
+        stats = self._stats(url)
+        self.assertEqual(stats['retries'], 3)
+        self.assertEqual(stats['failures'], 1)
+        self.assertTrue(stats['last_error'])
+
+    def test_client_errors_are_not_retried(self):
+        url = 'http://bank.test/not_found'
+        with self.assertRaises(requests.HTTPError):
+            self._get(url, [make_response(404), make_response(200)])
+        self.assertEqual(self.session_get.call_count, 1)
+        self.sleep.assert_not_called()
+
+    def test_exponential_backoff_with_cap(self):
+        # random.uniform trả cận trên: thời gian chờ = min(backoff_max, factor * 2^(attempt-1)).
+        with patch.object(http_client.random, 'uniform', side_effect=lambda low, high: high):
+            delays = [self.client._backoff(attempt) for attempt in range(1, 6)]
+        self.assertEqual(delays, [0.5, 1.0, 2.0, 4.0, 4.0])
+        # Full jitter: luôn nằm trong [0, delay].
+        for attempt in range(1, 6):
+            self.assertTrue(0 <= self.client._backoff(attempt) <= min(4.0, 0.5 * 2 ** (attempt - 1)))
+
+    def test_retry_after_header(self):
+        url = 'http://bank.test/retry_after'
+        self._get(url, [make_response(429, headers={'Retry-After': '3'}), make_response(200, b'[]')])
+        self.sleep.assert_called_once_with(3.0)
+        # Retry-After lớn hơn backoff_max bị giới hạn lại.
+        self.sleep.reset_mock()
+        self._get(url, [make_response(503, headers={'Retry-After': '120'}), make_response(200, b'[]')])
+        self.sleep.assert_called_once_with(4.0)
+
+    def test_conditional_request(self):
+        url = 'http://bank.test/conditional'
+        response = self._get(url, [make_response(304)], etag='"v1"', last_modified='Mon, 01 Jan 2024 00:00:00 GMT')
+        self.assertEqual(response.status_code, 304)
+        headers = self.session_get.call_args.kwargs['headers']
+        self.assertEqual(headers['If-None-Match'], '"v1"')
+        self.assertEqual(headers['If-Modified-Since'], 'Mon, 01 Jan 2024 00:00:00 GMT')
+        self.assertEqual(self._stats(url)['not_modified'], 1)
+
+        # Chưa có validator: không gửi header điều kiện.
+        self._get(url, [make_response(200, b'[]', headers={'ETag': '"v2"'})])
+        headers = self.session_get.call_args.kwargs['headers']
+        self.assertNotIn('If-None-Match', headers)
+        self.assertNotIn('If-Modified-Since', headers)
+
+    def test_shared_client_per_settings(self):
+        self.assertIs(http_client.get_client(max_retries=2), http_client.get_client(max_retries=2))
+        self.assertIsNot(http_client.get_client(max_retries=2), http_client.get_client(max_retries=5))
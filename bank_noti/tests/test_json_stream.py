@@ -0,0 +1,144 @@
+import functools
+import json
+import os
+import shutil
+import tempfile
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import requests
+
+from odoo.tests.common import TransactionCase, tagged
+
+from odoo.addons.bank_noti.models import bank_noti as bank_noti_module
+from odoo.addons.bank_noti.tools import json_stream
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@tagged('post_install', '-at_install')
+class TestJsonStream(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Server HTTP cục bộ đóng vai API ngân hàng, phục vụ các file fixture lớn.
+        cls.fixture_dir = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, cls.fixture_dir)
+        handler = functools.partial(_QuietHandler, directory=cls.fixture_dir)
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        thread.start()
+        cls.addClassCleanup(cls.server.server_close)
+        cls.addClassCleanup(cls.server.shutdown)
+        cls.base_url = 'http://127.0.0.1:%s' % cls.server.server_address[1]
+
+    def _make_rows(self, count, prefix='TXN'):
+        return [{
+            'time': '2024-01-%02d 08:%02d:00' % (i % 28 + 1, i % 60),
+            'content': 'Chuyển khoản "HD%05d" \\ thanh toán ✓' % i,
+            'bank_account': '1234567890',
+            'amount': 100000 + i,
+            'transaction_id': '%s%06d' % (prefix, i),
+        } for i in range(count)]
+
+    def _serve(self, name, rows):
+        with open(os.path.join(self.fixture_dir, name), 'w', encoding='utf-8') as f:
+            json.dump(rows, f, ensure_ascii=False, indent=1)
+        return '%s/%s' % (self.base_url, name)
+
+    def _stream(self, url, chunk_size, use_ijson=None):
+        response = requests.get(url, stream=True, timeout=10)
+        response.raise_for_status()
+        self.addCleanup(response.close)
+        return json_stream.iter_json_array(response.iter_content(chunk_size=chunk_size), use_ijson=use_ijson)
+
+    def test_pure_python_parser_matches_json_load(self):
+        rows = self._make_rows(5000)
+        url = self._serve('large.json', rows)
+        # Chunk nhỏ, lẻ: phần tử, chuỗi escape và ký tự UTF-8 bị cắt giữa 2 chunk.
+        for chunk_size in (7, 1024, 64 * 1024):
+            self.assertEqual(list(self._stream(url, chunk_size, use_ijson=False)), rows)
+
+    def test_ijson_parser_matches_json_load(self):
+        if json_stream.ijson is None:
+            self.skipTest("ijson is not installed")
+        rows = self._make_rows(5000)
+        url = self._serve('large_ijson.json', rows)
+        self.assertEqual(list(self._stream(url, 1024, use_ijson=True)), rows)
+
+    def test_parser_is_lazy(self):
+        chunks = iter([b'[{"a": 1}, ', b'{"a": 2}, ', b'{"a": 3}]'])
+        items = json_stream.iter_json_array(chunks, use_ijson=False)
+        self.assertEqual(next(items), {'a': 1})
+        # Phần tử đầu tiên có được mà chưa cần đọc hết các chunk.
+        self.assertEqual(list(chunks), [b'{"a": 2}, ', b'{"a": 3}]'])
+
+    def _parsers(self):
+        parsers = [False]
+        if json_stream.ijson is not None:
+            parsers.append(True)
+        return parsers
+
+    def test_invalid_payloads(self):
+        payloads = (
+            b'{"a": 1}', b'{"error": "bad token"}', b'{"item": 1}', b'"item"', b'',
+            b'[{"a": 1}', b'[1 2]', b'[1,]', b'[1] x', b'[1] [2]', b'[]]',
+        )
+        for use_ijson in self._parsers():
+            for payload in payloads:
+                with self.assertRaises(ValueError, msg=(use_ijson, payload)):
+                    list(json_stream.iter_json_array([payload], use_ijson=use_ijson))
+
+    def test_valid_payloads(self):
+        payloads = {
+            b'[]': [],
+            b' [ ] \n': [],
+            b'\xef\xbb\xbf[1, {"a": [2]}]': [1, {'a': [2]}],
+            b'[1.5e3, "x"]  \r\n': [1500.0, 'x'],
+        }
+        for use_ijson in self._parsers():
+            for payload, expected in payloads.items():
+                # Từng byte một: ranh giới chunk rơi vào mọi vị trí.
+                chunks = [payload[i:i + 1] for i in range(len(payload))]
+                self.assertEqual(list(json_stream.iter_json_array(chunks, use_ijson=use_ijson)), expected, (use_ijson, payload))
+            # Số tiền là float như json.loads(), không phải Decimal (Decimal('1500') == 1500.0).
+            items = list(json_stream.iter_json_array([b'[{"amount": 1500.0}, {"amount": 2e3}]'], use_ijson=use_ijson))
+            for item in items:
+                self.assertIsInstance(item['amount'], float, use_ijson)
+
+    def test_streaming_ingestion_in_batches(self):
+        rows = self._make_rows(1200, prefix='STREAM')
+        rows += rows[:10]                      # Trùng trong payload.
+        rows.append({'time': '2024-01-01 00:00:00'})  # Thiếu dữ liệu.
+        url = self._serve('ingest.json', rows)
+
+        BankNoti = self.env['bank.noti']
+        create_sizes = []
+        original_create = type(BankNoti).create
+
+        def spy_create(records, vals_list):
+            create_sizes.append(len(vals_list))
+            return original_create(records, vals_list)
+
+        with patch.object(bank_noti_module, 'INGEST_BATCH_SIZE', 500), \
+                patch.object(type(BankNoti), 'create', spy_create):
+            stats = BankNoti._ingest_notifications(self._stream(url, 4096))
+
+        self.assertEqual(stats['fetched'], 1211)
+        self.assertEqual(stats['inserted'], 1200)
+        self.assertEqual(stats['duplicated'], 10)
+        self.assertEqual(stats['rejected'], 1)
+        # Dữ liệu được ghi theo từng lô cố định, không phải một lần cho cả response.
+        self.assertTrue(all(size <= 500 for size in create_sizes))
+        self.assertEqual(sum(create_sizes), 1200)
+        self.assertEqual(BankNoti.search_count([('transaction_id', '=like', 'STREAM%')]), 1200)
+
+        # Chạy lại cùng response: tất cả đều đã tồn tại.
+        stats = BankNoti._ingest_notifications(self._stream(url, 4096))
+        self.assertEqual(stats['inserted'], 0)
+        self.assertEqual(stats['duplicated'], 1210)
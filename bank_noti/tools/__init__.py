@@ -0,0 +1,2 @@
+from . import http_client
+from . import json_stream
@@ -0,0 +1,147 @@
+"""
+HTTP client dùng chung cho các lần gọi API ngân hàng.
+
+- Connection pooling: Một ``requests.Session`` dùng chung trong mỗi worker (process),
+  giữ kết nối keep-alive nên không phải bắt tay TCP + TLS lại ở mỗi lần cron chạy.
+- Retry: Tự động thử lại khi lỗi kết nối/timeout hoặc HTTP 429/5xx, thời gian chờ
+  tăng theo cấp số nhân (exponential backoff) kèm ngẫu nhiên (jitter).
+- Conditional request: Gửi If-None-Match / If-Modified-Since, server trả 304
+  Not Modified khi dữ liệu không đổi.
+- Thống kê theo endpoint: số request, lỗi, retry, 304 và độ trễ.
+"""
+import logging
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+_logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def get_client(pool_size=10, max_retries=3, backoff_factor=0.5, backoff_max=30.0, timeout=15):
+    """Trả về client dùng chung của worker hiện tại cho bộ tham số đã cho."""
+    key = (pool_size, max_retries, backoff_factor, backoff_max, timeout)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = BankFeedClient(*key)
+        return client
+
+
+def get_endpoint_stats():
+    """Bản sao thống kê theo endpoint (kèm độ trễ trung bình) của worker hiện tại."""
+    with _stats_lock:
+        result = {}
+        for endpoint, values in _stats.items():
+            values = dict(values)
+            values['latency_avg'] = values['latency_total'] / values['requests'] if values['requests'] else 0.0
+            result[endpoint] = values
+        return result
+
+
+def endpoint_key(url):
+    parts = urlsplit(url)
+    return '%s://%s%s' % (parts.scheme, parts.netloc, parts.path)
+
+
+def _record(url, **increments):
+    with _stats_lock:
+        values = _stats.setdefault(endpoint_key(url), {
+            'requests': 0,
+            'success': 0,
+            'failures': 0,
+            'retries': 0,
+            'not_modified': 0,
+            'latency_total': 0.0,
+            'latency_max': 0.0,
+            'last_error': False,
+        })
+        for name, value in increments.items():
+            if name == 'latency':
+                values['latency_total'] += value
+                values['latency_max'] = max(values['latency_max'], value)
+            elif name == 'last_error':
+                values['last_error'] = value
+            else:
+                values[name] += value
+
+
+class BankFeedClient:
+
+    def __init__(self, pool_size=10, max_retries=3, backoff_factor=0.5, backoff_max=30.0, timeout=15):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.session = requests.Session()
+        # max_retries=0: Retry được xử lý ở get() để có jitter và thống kê.
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _backoff(self, attempt, response=None):
+        """Thời gian chờ trước lần thử lại thứ attempt (bắt đầu từ 1)."""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        delay = min(self.backoff_max, self.backoff_factor * (2 ** (attempt - 1)))
+        # "Full jitter": chờ ngẫu nhiên trong [0, delay] để các worker không dồn cùng lúc.
+        return random.uniform(0, delay)
+
+    def get(self, url, params=None, etag=None, last_modified=None, stream=False, headers=None):
+        """
+        Gọi HTTP GET với retry/backoff và conditional request.
+
+        Trả về ``requests.Response``: status 304 nghĩa là dữ liệu không đổi
+        (không có body), các status lỗi khác đã được raise_for_status().
+        """
+        headers = dict(headers or {})
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+        attempt = 0
+        while True:
+            attempt += 1
+            started = time.perf_counter()
+            response = None
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=self.timeout, stream=stream)
+                if response.status_code in RETRY_STATUSES and attempt <= self.max_retries:
+                    raise requests.HTTPError("HTTP %s" % response.status_code, response=response)
+                response.raise_for_status()
+            except requests.RequestException as e:
+                _record(url, requests=1, latency=time.perf_counter() - started)
+                retryable = isinstance(e, (requests.ConnectionError, requests.Timeout)) or (
+                    isinstance(e, requests.HTTPError)
+                    and e.response is not None
+                    and e.response.status_code in RETRY_STATUSES
+                )
+                if response is not None:
+                    response.close()
+                if not retryable or attempt > self.max_retries:
+                    _record(url, failures=1, last_error=str(e))
+                    raise
+                delay = self._backoff(attempt, response)
+                _record(url, retries=1)
+                _logger.warning("Bank feed %s: %s, thử lại lần %s sau %.1fs", url, e, attempt, delay)
+                time.sleep(delay)
+                continue
+
+            _record(url, requests=1, success=1, latency=time.perf_counter() - started)
+            if response.status_code == 304:
+                _record(url, not_modified=1)
+            return response
@@ -0,0 +1,171 @@
+"""
+Đọc (parse) JSON dạng stream cho response lớn từ API ngân hàng.
+
+API trả về một mảng JSON ``[{...}, {...}, ...]``. Thay vì tải toàn bộ body rồi
+gọi ``response.json()``, các hàm ở đây nhận từng chunk bytes (ví dụ từ
+``response.iter_content()``) và trả về (yield) lần lượt từng phần tử của mảng,
+nên bộ nhớ sử dụng không phụ thuộc vào kích thước response.
+
+Nếu thư viện ``ijson`` được cài đặt thì dùng nó (nhanh hơn, có backend C),
+ngược lại dùng bộ parser thuần Python dựa trên ``json.JSONDecoder.raw_decode``.
+"""
+import codecs
+import json
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+_WHITESPACE = ' \t\n\r'
+
+
+class _ChunkReader:
+    """Bọc một iterable các chunk bytes thành đối tượng giống file (có read())."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = b''
+        self._started = False
+
+    def read(self, size=-1):
+        exhausted = False
+        # Đọc đủ 3 byte đầu để nhận ra BOM UTF-8 (bộ parser thuần Python cũng bỏ qua nó).
+        while size < 0 or len(self._buffer) < max(size, 0 if self._started else 3):
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                exhausted = True
+                break
+            self._buffer += chunk
+        if not self._started and (len(self._buffer) >= 3 or exhausted):
+            self._started = True
+            if self._buffer.startswith(codecs.BOM_UTF8):
+                self._buffer = self._buffer[3:]
+        if size < 0:
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def _iter_with_ijson(chunks):
+    try:
+        # use_float=True: trả về float thay vì Decimal, giống json.loads(). Phải truyền cho
+        # ijson.parse(): ijson.items() bỏ qua tham số này khi nhận vào một iterator sự kiện.
+        events = ijson.parse(_ChunkReader(chunks), use_float=True)
+        # Giống bộ parser thuần Python: giá trị gốc phải là mảng. Nếu không, ijson.items(..., 'item')
+        # sẽ trả về [] cho body lỗi kiểu {"error": ...} (hoặc giá trị của khóa "item" của object).
+        first = next(events, None)
+        if first is None or first[1] != 'start_array':
+            raise ValueError("JSON stream is not an array")
+        yield from ijson.items(events, 'item')
+    except ijson.JSONError as e:
+        # Chuẩn hóa lỗi về ValueError giống bộ parser thuần Python.
+        raise ValueError("Invalid JSON in stream: %s" % e) from e
+
+
+def _iter_pure_python(chunks):
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    chunks = iter(chunks)
+    buf = ''
+    pos = 0
+    eof = False
+    started = False
+    first = True  # Đang ở phần tử đầu tiên (cho phép mảng rỗng "[]").
+    after_item = False
+    ended = False  # Đã gặp ']' của mảng gốc: phía sau chỉ được là khoảng trắng.
+
+    def read_more():
+        nonlocal buf, pos, eof
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+            buf = buf[pos:] + utf8.decode(b'', final=True)
+        else:
+            if isinstance(chunk, bytes):
+                chunk = utf8.decode(chunk)
+            # Cắt bỏ phần đã xử lý để buffer không phình to theo response.
+            buf = buf[pos:] + chunk
+        pos = 0
+
+    while True:
+        # Bỏ qua khoảng trắng giữa các token.
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        if pos >= len(buf):
+            if eof:
+                if ended:
+                    return
+                raise ValueError("Unexpected end of JSON stream")
+            read_more()
+            continue
+
+        if ended:
+            # Giống ijson: dữ liệu thừa sau mảng là lỗi.
+            raise ValueError("Invalid JSON in stream: trailing data")
+
+        if not started:
+            # Ký tự đầu tiên (bỏ qua BOM) phải là '['.
+            if buf[pos] == '\ufeff':
+                pos += 1
+                continue
+            if buf[pos] != '[':
+                raise ValueError("JSON stream is not an array")
+            started = True
+            pos += 1
+            continue
+
+        if after_item:
+            # Sau mỗi phần tử chỉ có thể là ',' (phần tử tiếp theo) hoặc ']' (hết mảng).
+            if buf[pos] == ']':
+                ended = True
+                pos += 1
+                continue
+            if buf[pos] != ',':
+                raise ValueError("Invalid JSON in stream")
+            after_item = False
+            pos += 1
+            continue
+
+        if buf[pos] == ']' and first:
+            ended = True
+            pos += 1
+            continue
+
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise ValueError("Invalid JSON in stream") from None
+            read_more()
+            continue
+
+        # Phần tử phải được theo sau bởi khoảng trắng, ',' hoặc ']'. Nếu chưa thấy thì
+        # phần tử có thể đang bị cắt giữa chừng (ví dụ số "1.5" trong khi dữ liệu
+        # thật là "1.5e3"), cần đọc thêm chunk rồi parse lại.
+        if not eof and (end >= len(buf) or buf[end] not in _WHITESPACE + ',]'):
+            read_more()
+            continue
+
+        pos = end
+        first = False
+        after_item = True
+        yield item
+
+
+def iter_json_array(chunks, use_ijson=None):
+    """
+    Yield lần lượt từng phần tử của mảng JSON gốc từ một iterable các chunk bytes/str.
+
+    :param chunks: iterable các chunk (ví dụ ``response.iter_content(chunk_size)``).
+    :param use_ijson: None = tự chọn (ưu tiên ijson nếu có), True/False để ép buộc.
+    :raises ValueError: khi dữ liệu không phải mảng JSON hợp lệ.
+    """
+    if use_ijson is None:
+        use_ijson = ijson is not None
+    if use_ijson:
+        if ijson is None:
+            raise ImportError("ijson is not installed")
+        return _iter_with_ijson(chunks)
+    return _iter_pure_python(chunks)
@@ -9,7 +9,12 @@
     'author': 'Diego Nguyen',
     'category': 'Accounting',
     'depends': ['base', 'bank_noti', 'mail'],
-    'data': [],
+    'data': [
+        'security/ir.model.access.csv',
+        'data/bank_noti_alert_cron.xml',
+        'views/bank_noti_alert_queue_views.xml',
+        'views/bank_noti_alert_rule_views.xml',
+    ],
     'installable': True,
     'application': False,
     'auto_install': True,
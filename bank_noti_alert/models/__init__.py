@@ -1 +1,3 @@
-from . import bank_noti_extension
\ No newline at end of file
+from . import bank_noti_extension
+from . import bank_noti_alert_queue
+from . import bank_noti_alert_rule
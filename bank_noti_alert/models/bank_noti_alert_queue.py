@@ -0,0 +1,97 @@
+from odoo import models, fields, api
+import logging
+from datetime import timedelta
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_MAX_ATTEMPTS = 5
+# Retry delay is 2^attempts minutes, capped here.
+MAX_RETRY_DELAY_MINUTES = 60
+SENT_RETENTION_DAYS = 7
+
+
+class BankNotiAlertQueue(models.Model):
+    """Outbox of Discuss messages, filled by ingestion and drained by a cron."""
+    _name = 'bank.noti.alert.queue'
+    _description = 'Bank Notification Alert Queue'
+    _order = 'id'
+
+    channel_id = fields.Many2one('discuss.channel', string='Channel', required=True, ondelete='cascade')
+    body = fields.Html(string='Message', sanitize=False, required=True)
+    transaction_count = fields.Integer(string='Transactions')
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ], string='Status', default='pending', required=True, index=True)
+    attempts = fields.Integer(string='Attempts', default=0)
+    last_error = fields.Text(string='Last Error')
+    next_attempt_at = fields.Datetime(string='Next Attempt', default=fields.Datetime.now, index=True)
+    sent_at = fields.Datetime(string='Sent At')
+
+    @api.model
+    def _enqueue(self, channel, bodies, transaction_counts):
+        """Queue one message per body and wake up the sender cron."""
+        rows = self.create([
+            {'channel_id': channel.id, 'body': body, 'transaction_count': count}
+            for body, count in zip(bodies, transaction_counts)
+        ])
+        cron = self.env.ref('bank_noti_alert.cron_process_alert_queue', raise_if_not_found=False)
+        if cron:
+            # Runs as soon as the ingestion transaction is committed.
+            cron._trigger()
+        return rows
+
+    @api.model
+    def _cron_process_queue(self, batch_size=None):
+        ICP = self.env['ir.config_parameter'].sudo()
+        batch_size = batch_size or int(ICP.get_param('bank_noti_alert.queue_batch_size', DEFAULT_BATCH_SIZE))
+        max_attempts = int(ICP.get_param('bank_noti_alert.queue_max_attempts', DEFAULT_MAX_ATTEMPTS))
+
+        domain = [('state', '=', 'pending'), ('next_attempt_at', '<=', fields.Datetime.now())]
+        rows = self.search(domain, limit=batch_size)
+        sent = failed = 0
+        for row in rows:
+            try:
+                with self.env.cr.savepoint():
+                    row.channel_id.message_post(
+                        body=row.body,
+                        message_type='comment',
+                        subtype_xmlid='mail.mt_comment'
+                    )
+            except Exception as e:
+                row._schedule_retry(str(e), max_attempts)
+                failed += 1
+                continue
+            row.write({'state': 'sent', 'sent_at': fields.Datetime.now(), 'attempts': row.attempts + 1})
+            sent += 1
+
+        if rows:
+            _logger.info("Bank Noti Alert: Queue processed, %s sent, %s failed.", sent, failed)
+        # More due rows than one batch: run again right away instead of waiting for the next interval.
+        if len(rows) == batch_size and self.search_count(domain, limit=1):
+            self.env.ref('bank_noti_alert.cron_process_alert_queue')._trigger()
+
+    def _schedule_retry(self, error, max_attempts):
+        self.ensure_one()
+        attempts = self.attempts + 1
+        vals = {'attempts': attempts, 'last_error': error}
+        if attempts >= max_attempts:
+            vals['state'] = 'failed'
+            _logger.error("Bank Noti Alert: Giving up on queued alert %s after %s attempts: %s", self.id, attempts, error)
+        else:
+            delay = min(2 ** attempts, MAX_RETRY_DELAY_MINUTES)
+            vals['next_attempt_at'] = fields.Datetime.now() + timedelta(minutes=delay)
+            _logger.warning("Bank Noti Alert: Queued alert %s failed (%s), retrying in %s min.", self.id, error, delay)
+        self.write(vals)
+
+    def action_retry(self):
+        self.write({'state': 'pending', 'attempts': 0, 'next_attempt_at': fields.Datetime.now()})
+        self.env.ref('bank_noti_alert.cron_process_alert_queue')._trigger()
+        return True
+
+    @api.autovacuum
+    def _gc_sent_alerts(self):
+        limit_date = fields.Datetime.now() - timedelta(days=SENT_RETENTION_DAYS)
+        self.search([('state', '=', 'sent'), ('sent_at', '<', limit_date)]).unlink()
@@ -0,0 +1,167 @@
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import ValidationError
+import re
+from bisect import bisect_right
+from collections import defaultdict
+
+
+class AlertMatcher:
+    """
+    In-memory matcher built from the active rules (plain data only, no records),
+    so it can be cached per registry and shared by all requests of a worker.
+    """
+
+    def __init__(self, rules):
+        self.rule_ids = frozenset(rule['id'] for rule in rules)
+
+        # Account: exact match, rules without account apply to every account.
+        self.any_account = set()
+        self.by_account = defaultdict(set)
+        # Amount: rules sorted by lower bound, bisect gives the rules whose min <= amount.
+        # A rule without minimum has no lower bound, so debits (negative amounts) match too.
+        ranges = sorted(
+            (
+                rule['amount_min'] if rule['has_amount_min'] else float('-inf'),
+                rule['id'],
+                rule['amount_max'] if rule['has_amount_max'] else float('inf'),
+            )
+            for rule in rules
+        )
+        self.range_mins = [low for low, _rule_id, _high in ranges]
+        self.range_rules = [(rule_id, high) for _low, rule_id, high in ranges]
+        # Content: keywords of every keyword rule (lowercase), regex rules compiled once.
+        self.keywords_by_rule = {}
+        self.regex_rules = {}
+
+        for rule in rules:
+            account = (rule['bank_account'] or '').strip()
+            if account:
+                self.by_account[account].add(rule['id'])
+            else:
+                self.any_account.add(rule['id'])
+            if rule['match_type'] == 'keyword':
+                self.keywords_by_rule[rule['id']] = frozenset(_split_keywords(rule['keywords']))
+            elif rule['match_type'] == 'regex' and rule['pattern']:
+                self.regex_rules[rule['id']] = re.compile(rule['pattern'], re.IGNORECASE)
+
+    def __bool__(self):
+        return bool(self.rule_ids)
+
+    def match(self, bank_account, amount, content):
+        """Return the ids of the rules matching one transaction."""
+        candidates = self.any_account | self.by_account.get(bank_account or '', set())
+        if not candidates:
+            return set()
+
+        amount = amount or 0.0
+        in_range = {
+            rule_id
+            for rule_id, high in self.range_rules[:bisect_right(self.range_mins, amount)]
+            if amount <= high
+        }
+        candidates &= in_range
+        if not candidates:
+            return candidates
+
+        content = content or ''
+        keyword_candidates = candidates & self.keywords_by_rule.keys()
+        if keyword_candidates:
+            # Every keyword is tested on its own: overlapping or nested keywords
+            # ("chuyen khoan" / "khoan") all match, each keyword is tested once per call.
+            lowered = content.lower()
+            hits = {}
+            for rule_id in keyword_candidates:
+                for keyword in self.keywords_by_rule[rule_id]:
+                    if keyword not in hits:
+                        hits[keyword] = keyword in lowered
+                    if hits[keyword]:
+                        break
+                else:
+                    candidates.discard(rule_id)
+        for rule_id in candidates & self.regex_rules.keys():
+            if not self.regex_rules[rule_id].search(content):
+                candidates.discard(rule_id)
+        return candidates
+
+
+def _split_keywords(keywords):
+    return {keyword.strip().lower() for keyword in (keywords or '').split(',') if keyword.strip()}
+
+
+class BankNotiAlertRule(models.Model):
+    _name = 'bank.noti.alert.rule'
+    _description = 'Bank Notification Alert Rule'
+    _order = 'sequence, id'
+
+    name = fields.Char(string='Name', required=True)
+    sequence = fields.Integer(default=10)
+    active = fields.Boolean(default=True)
+
+    bank_account = fields.Char(string='Bank Account', help="Leave empty to match every account.")
+    # Explicit flags instead of "0 means unbounded", so that 0 itself can be a bound (e.g. debits only).
+    has_amount_min = fields.Boolean(string='Has Minimum')
+    amount_min = fields.Float(string='Minimum Amount', help="Inclusive, only applied when Has Minimum is set.")
+    has_amount_max = fields.Boolean(string='Has Maximum')
+    amount_max = fields.Float(string='Maximum Amount', help="Inclusive, only applied when Has Maximum is set.")
+    match_type = fields.Selection([
+        ('none', 'Any Content'),
+        ('keyword', 'Keywords'),
+        ('regex', 'Regular Expression'),
+    ], string='Content Match', default='none', required=True)
+    keywords = fields.Char(string='Keywords', help="Comma-separated, case-insensitive.")
+    pattern = fields.Char(string='Pattern', help="Python regular expression, case-insensitive.")
+
+    channel_id = fields.Many2one('discuss.channel', string='Channel', ondelete='cascade')
+    user_id = fields.Many2one('res.users', string='User', ondelete='cascade',
+                              help="Send the alert as a direct message to this user.")
+
+    @api.constrains('match_type', 'keywords', 'pattern', 'channel_id', 'user_id',
+                    'has_amount_min', 'amount_min', 'has_amount_max', 'amount_max')
+    def _check_rule(self):
+        for rule in self:
+            if not rule.channel_id and not rule.user_id:
+                raise ValidationError(_("Rule '%s' needs a target channel or user.", rule.name))
+            if rule.has_amount_min and rule.has_amount_max and rule.amount_min > rule.amount_max:
+                raise ValidationError(_("Rule '%s' has a minimum amount above its maximum.", rule.name))
+            if rule.match_type == 'keyword' and not _split_keywords(rule.keywords):
+                raise ValidationError(_("Rule '%s' needs at least one keyword.", rule.name))
+            if rule.match_type == 'regex':
+                try:
+                    re.compile(rule.pattern or '')
+                except re.error as e:
+                    raise ValidationError(_("Invalid pattern in rule '%(rule)s': %(error)s", rule=rule.name, error=e))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        rules = super().create(vals_list)
+        self.env.registry.clear_cache()
+        return rules
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
+
+    @api.model
+    @tools.ormcache()
+    def _get_matcher(self):
+        rules = self.sudo().search_read([], [
+            'bank_account', 'has_amount_min', 'amount_min', 'has_amount_max', 'amount_max',
+            'match_type', 'keywords', 'pattern',
+        ])
+        return AlertMatcher(rules)
+
+    def _get_target_channels(self):
+        """Channels to post to for these rules (a user target resolves to the direct chat)."""
+        channels = self.env['discuss.channel']
+        for rule in self:
+            if rule.channel_id:
+                channels |= rule.channel_id
+            if rule.user_id:
+                channels |= self.env['discuss.channel']._get_or_create_chat([rule.user_id.partner_id.id])
+        return channels
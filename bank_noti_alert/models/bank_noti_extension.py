@@ -1,5 +1,6 @@
 from odoo import models, api, _
 import logging
+from collections import defaultdict
 
 _logger = logging.getLogger(__name__)
 
@@ -8,36 +9,155 @@ try:
 except ImportError:
     from markupsafe import Markup
 
+# Runs with more new transactions than this are posted as digest messages.
+DEFAULT_DIGEST_THRESHOLD = 10
+# Maximum number of transactions listed in one digest message.
+DEFAULT_DIGEST_SIZE = 50
+
+
 class BankNoti(models.Model):
     _inherit = 'bank.noti'
 
     @api.model_create_multi
     def create(self, vals_list):
         records = super(BankNoti, self).create(vals_list)
-        
-        channel = self.env['discuss.channel'].search([('name', 'ilike', 'BankNoti')], limit=1)
-        
+        # Ingestion runs alert once at the end of the run (see _ingest_finish).
+        if not self.env.context.get('bank_noti_alert_deferred'):
+            records._post_alerts()
+        return records
+
+    @api.model
+    def _ingest_batch(self, state, batch):
+        return super(BankNoti, self.with_context(bank_noti_alert_deferred=True))._ingest_batch(state, batch)
+
+    @api.model
+    def _ingest_finish(self, state, advance_watermark=True):
+        stats = super(BankNoti, self)._ingest_finish(state, advance_watermark=advance_watermark)
+        stats['records']._post_alerts()
+        return stats
+
+    # -------------------------------------------------------------------------
+    # CHANNEL
+    # -------------------------------------------------------------------------
+
+    @api.model
+    def _find_alert_channel(self):
+        channel = self.env['discuss.channel'].sudo().search([('name', 'ilike', 'BankNoti')], limit=1)
         if not channel:
-            channel = self.env['discuss.channel'].search([], limit=1)
-
-        if channel:
-            _logger.info("Bank Noti Alert: Found channel '%s' for notifications.", channel.name)
-            for record in records:
-                amount_formatted = f"{record.amount:,.0f}" if record.amount else "0"
-                
-                msg_body = Markup(
-                    "<p>📢 <b>New Bank Transaction Detected</b></p>"
-                    "<ul style='list-style-type: none; padding-left: 0;'>"
-                    "<li>💰 <b>Amount:</b> %s</li>"
-                    "<li>📝 <b>Content:</b> %s</li>"
-                    "<li>🏦 <b>Account:</b> %s</li>"
-                    "</ul>"
-                ) % (amount_formatted, record.content or 'N/A', record.bank_account or 'N/A')
-                
-                channel.message_post(
-                    body=msg_body,
-                    message_type='comment',
-                    subtype_xmlid='mail.mt_comment'
-                )
-                
-        return records
\ No newline at end of file
+            channel = self.env['discuss.channel'].sudo().search([], limit=1)
+        return channel
+
+    @api.model
+    def _get_alert_channel(self):
+        """
+        Default alert channel. Its id is kept in the bank_noti_alert.channel_id system
+        parameter (cached by ir.config_parameter) and only looked up again when that
+        channel no longer exists; the parameter is written only when the channel changes.
+        """
+        ICP = self.env['ir.config_parameter'].sudo()
+        channel_id = int(ICP.get_param('bank_noti_alert.channel_id', 0) or 0)
+        channel = self.env['discuss.channel'].browse(channel_id).exists() if channel_id else self.env['discuss.channel']
+        if not channel:
+            channel = self._find_alert_channel()
+            if channel:
+                ICP.set_param('bank_noti_alert.channel_id', channel.id)
+        return self.env['discuss.channel'].browse(channel.id)
+
+    # -------------------------------------------------------------------------
+    # POSTING
+    # -------------------------------------------------------------------------
+
+    def _route_alerts(self):
+        """
+        Group the records by target channel using the alert rules, in one pass over the
+        records with the cached matcher. Without any active rule every record goes to
+        the default channel.
+        """
+        matcher = self.env['bank.noti.alert.rule']._get_matcher()
+        if not matcher:
+            channel = self._get_alert_channel()
+            return {channel: self} if channel else {}
+
+        ids_by_rule = defaultdict(list)
+        for record in self:
+            for rule_id in matcher.match(record.bank_account, record.amount, record.content):
+                ids_by_rule[rule_id].append(record.id)
+
+        ids_by_channel = defaultdict(set)
+        for rule in self.env['bank.noti.alert.rule'].sudo().browse(list(ids_by_rule)):
+            for channel in rule._get_target_channels():
+                ids_by_channel[channel].update(ids_by_rule[rule.id])
+        # Keep the ingestion order of the records in every channel.
+        return {
+            channel: self.filtered(lambda record: record.id in ids)
+            for channel, ids in ids_by_channel.items()
+        }
+
+    def _post_alerts(self):
+        if not self:
+            return
+        for channel, records in self._route_alerts().items():
+            records._queue_channel_alerts(channel)
+
+    def _queue_channel_alerts(self, channel):
+        """Queue per-record alerts for small sets, digest messages above the threshold."""
+        ICP = self.env['ir.config_parameter'].sudo()
+        threshold = int(ICP.get_param('bank_noti_alert.digest_threshold', DEFAULT_DIGEST_THRESHOLD))
+        digest_size = max(1, int(ICP.get_param('bank_noti_alert.digest_size', DEFAULT_DIGEST_SIZE)))
+
+        if len(self) <= threshold:
+            bodies = [record._format_alert_body() for record in self]
+            counts = [1] * len(bodies)
+        else:
+            chunks = [self[i:i + digest_size] for i in range(0, len(self), digest_size)]
+            bodies = [
+                chunk._format_digest_body(index, len(chunks))
+                for index, chunk in enumerate(chunks, start=1)
+            ]
+            counts = [len(chunk) for chunk in chunks]
+
+        # Only queue the messages here: delivery happens in the alert queue cron, so a slow
+        # or failing mail/bus layer neither slows down nor rolls back the ingestion.
+        _logger.info("Bank Noti Alert: Queuing %s message(s) for %s transaction(s) to '%s'.",
+                     len(bodies), len(self), channel.name)
+        self.env['bank.noti.alert.queue'].sudo()._enqueue(channel, bodies, counts)
+
+    @api.model
+    def _format_amount(self, amount):
+        return f"{amount:,.0f}" if amount else "0"
+
+    def _format_alert_body(self):
+        self.ensure_one()
+        return Markup(
+            "<p>📢 <b>New Bank Transaction Detected</b></p>"
+            "<ul style='list-style-type: none; padding-left: 0;'>"
+            "<li>💰 <b>Amount:</b> %s</li>"
+            "<li>📝 <b>Content:</b> %s</li>"
+            "<li>🏦 <b>Account:</b> %s</li>"
+            "</ul>"
+        ) % (self._format_amount(self.amount), self.content or 'N/A', self.bank_account or 'N/A')
+
+    def _format_digest_body(self, index=1, count=1):
+        totals = defaultdict(lambda: [0, 0])
+        for record in self:
+            account_totals = totals[record.bank_account or 'N/A']
+            account_totals[0] += 1
+            account_totals[1] += record.amount or 0
+
+        title = _("%s New Bank Transactions", len(self))
+        if count > 1:
+            title = "%s (%s/%s)" % (title, index, count)
+
+        body = Markup("<p>📢 <b>%s</b></p><ul style='list-style-type: none; padding-left: 0;'>") % title
+        for account, (number, amount) in sorted(totals.items()):
+            body += Markup("<li>🏦 <b>%s:</b> %s transaction(s), 💰 %s</li>") % (
+                account, number, self._format_amount(amount))
+        body += Markup("</ul><table class='table table-sm'>"
+                       "<thead><tr><th>Time</th><th>Account</th><th>Amount</th><th>Content</th></tr></thead>"
+                       "<tbody>")
+        for record in self:
+            body += Markup("<tr><td>%s</td><td>%s</td><td>%s</td><td>%s</td></tr>") % (
+                record.notification_time or '', record.bank_account or 'N/A',
+                self._format_amount(record.amount), record.content or 'N/A')
+        body += Markup("</tbody></table>")
+        return body
@@ -0,0 +1,2 @@
+from . import test_alert_matcher
+from . import test_alert_queue
@@ -0,0 +1,96 @@
+from odoo.tests.common import TransactionCase, tagged
+
+from odoo.addons.bank_noti_alert.models.bank_noti_alert_rule import AlertMatcher
+
+
+def _rule(rule_id, bank_account=False, amount_min=None, amount_max=None, match_type='none', keywords=False, pattern=False):
+    return {
+        'id': rule_id,
+        'bank_account': bank_account,
+        'has_amount_min': amount_min is not None,
+        'amount_min': amount_min or 0.0,
+        'has_amount_max': amount_max is not None,
+        'amount_max': amount_max or 0.0,
+        'match_type': match_type,
+        'keywords': keywords,
+        'pattern': pattern,
+    }
+
+
+@tagged('post_install', '-at_install')
+class TestAlertMatcher(TransactionCase):
+
+    def test_no_rules(self):
+        matcher = AlertMatcher([])
+        self.assertFalse(matcher)
+        self.assertEqual(matcher.match('123', 1000, 'content'), set())
+
+    def test_catch_all_rule(self):
+        matcher = AlertMatcher([_rule(1)])
+        self.assertEqual(matcher.match('123', 1000, 'anything'), {1})
+        self.assertEqual(matcher.match(False, 0, False), {1})
+        # Debits (negative amounts) also match a rule without lower bound.
+        self.assertEqual(matcher.match('123', -500000, 'debit'), {1})
+
+    def test_account(self):
+        matcher = AlertMatcher([_rule(1, bank_account='111'), _rule(2, bank_account=' 222 '), _rule(3)])
+        self.assertEqual(matcher.match('111', 10, ''), {1, 3})
+        self.assertEqual(matcher.match('222', 10, ''), {2, 3})
+        self.assertEqual(matcher.match('333', 10, ''), {3})
+
+    def test_amount_range(self):
+        matcher = AlertMatcher([
+            _rule(1, amount_min=1000),
+            _rule(2, amount_max=1000),
+            _rule(3, amount_min=500, amount_max=2000),
+            _rule(4, amount_min=-100, amount_max=-10),
+        ])
+        self.assertEqual(matcher.match('1', 1000, ''), {1, 2, 3})
+        self.assertEqual(matcher.match('1', 999.99, ''), {2, 3})
+        self.assertEqual(matcher.match('1', 2000.01, ''), {1})
+        self.assertEqual(matcher.match('1', 100, ''), {2})
+        self.assertEqual(matcher.match('1', -50, ''), {2, 4})
+        self.assertEqual(matcher.match('1', -5000, ''), {2})
+
+    def test_zero_bounds(self):
+        # 0 is a real bound: credits only (>= 0), debits only (<= 0), exactly 0.
+        matcher = AlertMatcher([
+            _rule(1, amount_min=0),
+            _rule(2, amount_max=0),
+            _rule(3, amount_min=0, amount_max=0),
+        ])
+        self.assertEqual(matcher.match('1', 1000, ''), {1})
+        self.assertEqual(matcher.match('1', -1000, ''), {2})
+        self.assertEqual(matcher.match('1', 0, ''), {1, 2, 3})
+
+    def test_overlapping_keywords(self):
+        matcher = AlertMatcher([
+            _rule(1, match_type='keyword', keywords='chuyen khoan'),
+            _rule(2, match_type='keyword', keywords='khoan'),
+            _rule(3, match_type='keyword', keywords='khoan vay, luong'),
+            _rule(4, match_type='keyword', keywords='hoan tien'),
+        ])
+        self.assertEqual(matcher.match('1', 10, 'CHUYEN KHOAN hd001'), {1, 2})
+        self.assertEqual(matcher.match('1', 10, 'tra khoan vay thang 5'), {2, 3})
+        self.assertEqual(matcher.match('1', 10, 'Luong thang 5'), {3})
+        self.assertEqual(matcher.match('1', 10, 'hoan tien, chuyen khoan'), {1, 2, 4})
+        self.assertEqual(matcher.match('1', 10, 'nop tien mat'), set())
+        self.assertEqual(matcher.match('1', 10, False), set())
+
+    def test_regex(self):
+        matcher = AlertMatcher([
+            _rule(1, match_type='regex', pattern=r'HD\d{3}'),
+            _rule(2, match_type='regex', pattern=False),
+        ])
+        self.assertEqual(matcher.match('1', 10, 'thanh toan hd123'), {1, 2})
+        self.assertEqual(matcher.match('1', 10, 'thanh toan'), {2})
+
+    def test_all_criteria(self):
+        matcher = AlertMatcher([
+            _rule(1, bank_account='111', amount_min=1000, match_type='keyword', keywords='luong'),
+            _rule(2, bank_account='111', match_type='regex', pattern='^CK'),
+        ])
+        self.assertEqual(matcher.match('111', 5000, 'CK luong'), {1, 2})
+        self.assertEqual(matcher.match('111', 500, 'CK luong'), {2})
+        self.assertEqual(matcher.match('222', 5000, 'CK luong'), set())
+        self.assertEqual(matcher.match('111', 5000, 'luong CK'), {1})
@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from odoo import fields
+from odoo.tests.common import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestAlertQueue(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Queue = cls.env['bank.noti.alert.queue']
+        cls.channel = cls.env['discuss.channel'].create({'name': 'BankNoti Queue Test'})
+        # No rule: every transaction goes to the default channel.
+        cls.env['bank.noti.alert.rule'].search([]).active = False
+        ICP = cls.env['ir.config_parameter'].sudo()
+        ICP.set_param('bank_noti_alert.channel_id', cls.channel.id)
+        ICP.set_param('bank_noti_alert.digest_threshold', 3)
+        ICP.set_param('bank_noti_alert.digest_size', 2)
+        ICP.set_param('bank_noti_alert.queue_max_attempts', 3)
+
+    def _create_notifications(self, count, prefix):
+        return self.env['bank.noti'].create([{
+            'notification_time': datetime(2025, 4, 1, 8, i),
+            'bank_account': '111' if i % 2 else '222',
+            'amount': 1000 * (i + 1),
+            'content': 'CK %s%s' % (prefix, i),
+            'transaction_id': 'ALERT-QUEUE-%s%s' % (prefix, i),
+        } for i in range(count)])
+
+    def _queued(self):
+        return self.Queue.search([('channel_id', '=', self.channel.id)])
+
+    # -------------------------------------------------------------------------
+    # Digest vs. single alerts
+    # -------------------------------------------------------------------------
+
+    def test_single_alerts(self):
+        self._create_notifications(3, 'S')
+        rows = self._queued()
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows.mapped('transaction_count'), [1, 1, 1])
+        self.assertIn('New Bank Transaction Detected', rows[0].body)
+
+    def test_digest_alerts(self):
+        # Above the threshold: digests of at most digest_size transactions, in ingestion order.
+        notifications = self._create_notifications(5, 'D')
+        rows = self._queued()
+        self.assertEqual(rows.mapped('transaction_count'), [2, 2, 1])
+        self.assertIn('(1/3)', rows[0].body)
+        self.assertIn('(3/3)', rows[2].body)
+        self.assertIn(notifications[4].content, rows[2].body)
+        self.assertNotIn(notifications[4].content, rows[0].body)
+
+    def test_ingestion_run_is_one_digest_batch(self):
+        # Ingestion creates in batches but alerts once for the whole run.
+        BankNoti = self.env['bank.noti']
+        state = BankNoti._ingest_start()
+        for i in range(2):
+            BankNoti._ingest_batch(state, [{
+                'time': '2025-04-02 09:%02d:00' % (i * 2 + j),
+                'content': 'CK RUN%s%s' % (i, j),
+                'bank_account': '111',
+                'amount': 1000,
+                'transaction_id': 'ALERT-QUEUE-RUN%s%s' % (i, j),
+            } for j in range(2)])
+            self.assertFalse(self._queued())
+        BankNoti._ingest_finish(state)
+        self.assertEqual(self._queued().mapped('transaction_count'), [2, 2])
+
+    # -------------------------------------------------------------------------
+    # Drain, retry and backoff
+    # -------------------------------------------------------------------------
+
+    def test_drain(self):
+        self._create_notifications(3, 'Q')
+        rows = self._queued()
+        self.Queue._cron_process_queue()
+        self.assertEqual(set(rows.mapped('state')), {'sent'})
+        self.assertEqual(rows.mapped('attempts'), [1, 1, 1])
+        messages = self.env['mail.message'].search([('model', '=', 'discuss.channel'), ('res_id', '=', self.channel.id)])
+        self.assertEqual(len(messages), 3)
+
+    def test_drain_in_batches(self):
+        self._create_notifications(3, 'B')
+        rows = self._queued()
+        with patch.object(type(self.env['ir.cron']), '_trigger') as trigger:
+            self.Queue._cron_process_queue(batch_size=2)
+        self.assertEqual(rows.mapped('state'), ['sent', 'sent', 'pending'])
+        # Due rows left after a full batch: the cron is triggered again right away.
+        trigger.assert_called_once()
+
+    def test_retry_with_backoff(self):
+        self._create_notifications(1, 'R')
+        row = self._queued()
+
+        def failing_post(channel, **kwargs):
+            raise ValueError("bus down")
+
+        with patch.object(type(self.env['discuss.channel']), 'message_post', failing_post):
+            before = fields.Datetime.now()
+            self.Queue._cron_process_queue()
+            self.assertEqual((row.state, row.attempts), ('pending', 1))
+            self.assertIn('bus down', row.last_error)
+            self.assertGreaterEqual(row.next_attempt_at, before + timedelta(minutes=2))
+            first_attempt_at = row.next_attempt_at
+
+            # Not due yet: the next run leaves it alone.
+            self.Queue._cron_process_queue()
+            self.assertEqual(row.attempts, 1)
+
+            # Due again: the delay doubles.
+            row.next_attempt_at = before
+            self.Queue._cron_process_queue()
+            self.assertEqual((row.state, row.attempts), ('pending', 2))
+            self.assertGreater(row.next_attempt_at, first_attempt_at)
+
+            # Third failure reaches queue_max_attempts: the row is given up.
+            row.next_attempt_at = before
+            self.Queue._cron_process_queue()
+            self.assertEqual((row.state, row.attempts), ('failed', 3))
+
+        # Manual retry puts it back in the queue and it is sent.
+        row.action_retry()
+        self.Queue._cron_process_queue()
+        self.assertEqual(row.state, 'sent')
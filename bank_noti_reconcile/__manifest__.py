@@ -0,0 +1,21 @@
+{
+    'name': 'Bank Notification Reconciliation',
+    'version': '19.0.1.0.0',
+    'summary': 'Match bank notifications to open customer invoices',
+    'description': """
+        Parses invoice and sale order references from the content of bank
+        notifications, matches them to open customer invoices (falling back to
+        amount + payer bank account) and proposes the matches. Payments are only
+        registered automatically when bank_noti_reconcile.auto_apply is True.
+    """,
+    'author': 'Diego Nguyen',
+    'category': 'Accounting',
+    'depends': ['bank_noti', 'account'],
+    'data': [
+        'views/bank_noti_views.xml',
+        'data/bank_noti_reconcile_cron.xml',
+    ],
+    'installable': True,
+    'application': False,
+    'auto_install': True,
+}
@@ -0,0 +1 @@
+from . import bank_noti
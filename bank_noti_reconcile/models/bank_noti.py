@@ -0,0 +1,263 @@
+from odoo import models, fields, api
+from odoo.tools import SQL
+import logging
+import re
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+_logger = logging.getLogger(__name__)
+
+# Candidate references in the transfer content: letters followed by digit groups,
+# e.g. "INV/2025/00012", "INV 2025 00012", "S00012".
+REFERENCE_RE = re.compile(r'[A-Z]{1,10}[\W_]*\d+(?:[\W_]{0,2}\d+)*')
+DIGIT_GROUP_RE = re.compile(r'\d+')
+NON_ALNUM_RE = re.compile(r'[\W_]+')
+UPDATE_CHUNK_SIZE = 1000
+# Keys of the payer's account in the raw feed items (the feed's bank_account is our own account).
+COUNTERPARTY_KEYS = ('counterparty_account', 'partner_account', 'from_account')
+
+
+def _normalize_reference(value):
+    return NON_ALNUM_RE.sub('', (value or '').upper())
+
+
+def _candidate_references(content):
+    """
+    Normalized references found in the content. Separators are often dropped or
+    changed by banks, so every prefix ending on a digit group is a candidate
+    ("INV 2025 00012 500000" -> INV2025, INV202500012, INV202500012500000).
+    """
+    candidates = []
+    for match in REFERENCE_RE.finditer((content or '').upper()):
+        token = match.group(0)
+        for group in DIGIT_GROUP_RE.finditer(token):
+            candidates.append(_normalize_reference(token[:group.end()]))
+    # Longest first: the most specific reference wins.
+    return sorted(set(candidates), key=len, reverse=True)
+
+
+class ReconcileIndex:
+    """Open customer invoices indexed by reference and by (partner, amount), loaded once per run."""
+
+    def __init__(self, env):
+        started = time.perf_counter()
+        self.by_reference = {}
+        self.by_partner_amount = defaultdict(list)
+        self.residual = {}
+        moves = env['account.move'].search_fetch([
+            ('move_type', '=', 'out_invoice'),
+            ('state', '=', 'posted'),
+            ('payment_state', 'in', ('not_paid', 'partial')),
+        ], ['name', 'payment_reference', 'invoice_origin', 'amount_residual', 'commercial_partner_id'], order='id')
+        for move in moves:
+            self.residual[move.id] = move.amount_residual
+            references = [move.name, move.payment_reference] + (move.invoice_origin or '').split(',')
+            for reference in references:
+                key = _normalize_reference(reference)
+                # A reference shared by several invoices is ambiguous: keep the oldest one.
+                if key and key not in self.by_reference:
+                    self.by_reference[key] = move.id
+            self.by_partner_amount[(move.commercial_partner_id.id, _amount_key(move.amount_residual))].append(move.id)
+
+        self.partner_by_account = {}
+        for bank in env['res.partner.bank'].search_fetch([], ['sanitized_acc_number', 'partner_id']):
+            if bank.sanitized_acc_number:
+                self.partner_by_account[bank.sanitized_acc_number] = bank.partner_id.commercial_partner_id.id
+        _logger.info("Bank Noti Reconcile: Indexed %s open invoices, %s references, %s bank accounts in %.3fs.",
+                     len(moves), len(self.by_reference), len(self.partner_by_account), time.perf_counter() - started)
+
+    def match(self, content, amount, counterparty_account):
+        """
+        Return (move_id, method) or (False, False).
+        The amount fallback is keyed on the payer's account (counterparty_account), never
+        on the receiving account of the notification, which is one of our own accounts.
+        """
+        for reference in _candidate_references(content):
+            move_id = self.by_reference.get(reference)
+            if move_id:
+                return move_id, 'reference'
+
+        partner_id = counterparty_account and self.partner_by_account.get(_normalize_reference(counterparty_account))
+        if partner_id:
+            candidates = [
+                move_id for move_id in self.by_partner_amount.get((partner_id, _amount_key(amount)), [])
+                if self.residual.get(move_id)
+            ]
+            # Only a single open invoice with that exact amount is a safe match.
+            if len(candidates) == 1:
+                return candidates[0], 'amount'
+        return False, False
+
+    def consume(self, move_id, amount):
+        self.residual[move_id] = max(0.0, self.residual.get(move_id, 0.0) - (amount or 0.0))
+
+
+def _amount_key(amount):
+    return round(amount or 0.0, 2)
+
+
+class BankNoti(models.Model):
+    _inherit = 'bank.noti'
+
+    match_state = fields.Selection([
+        ('unmatched', 'Unmatched'),
+        ('no_match', 'No Match'),
+        ('proposed', 'Proposed'),
+        ('matched', 'Matched'),
+    ], string='Match Status', default='unmatched', required=True, index=True, readonly=True)
+    match_method = fields.Selection([
+        ('reference', 'Reference'),
+        ('amount', 'Amount + Payer Account'),
+    ], string='Match Method', readonly=True)
+    counterparty_account = fields.Char(string='Counterparty Account', readonly=True,
+                                       help="Bank account of the payer, when the feed provides it.")
+    move_id = fields.Many2one('account.move', string='Invoice', index='btree_not_null', readonly=True,
+                              ondelete='set null')
+    payment_id = fields.Many2one('account.payment', string='Payment', readonly=True, ondelete='set null')
+
+    @api.model
+    def _prepare_notification_vals(self, item):
+        vals = super()._prepare_notification_vals(item)
+        if vals:
+            counterparty = next((item[key] for key in COUNTERPARTY_KEYS if item.get(key)), False)
+            if counterparty:
+                vals['counterparty_account'] = str(counterparty)
+        return vals
+
+    @api.model
+    def check_unnotified_transactions(self):
+        """
+        Cron: match the unmatched incoming transactions against the open customer invoices.
+        Recent transactions without a match are tried again (bank_noti_reconcile.retry_days,
+        default 3): the invoice is often created or posted after the customer paid.
+        """
+        retry_days = int(self.env['ir.config_parameter'].sudo().get_param('bank_noti_reconcile.retry_days', 3))
+        transactions = self.search([
+            ('amount', '>', 0),
+            '|',
+            ('match_state', '=', 'unmatched'),
+            '&', ('match_state', '=', 'no_match'), ('create_date', '>=', fields.Datetime.now() - timedelta(days=retry_days)),
+        ])
+        if transactions:
+            transactions._reconcile_transactions()
+        return True
+
+    def _reconcile_transactions(self):
+        started = time.perf_counter()
+        index = ReconcileIndex(self.env)
+        # Registering payments is opt-in: the first run also sees every historical transaction.
+        auto_apply = self.env['ir.config_parameter'].sudo().get_param('bank_noti_reconcile.auto_apply', 'False') == 'True'
+
+        rows = []
+        to_apply = []
+        # Only incoming transfers pay an invoice: a debit mentioning an invoice reference must
+        # neither be proposed nor increase the in-memory residual through consume().
+        domain = [('id', 'in', self.ids), ('amount', '>', 0)]
+        for transaction in self.search_fetch(domain, ['content', 'amount', 'counterparty_account'], order='notification_time, id'):
+            move_id, method = index.match(transaction.content, transaction.amount, transaction.counterparty_account)
+            if not move_id:
+                rows.append((transaction.id, 'no_match', None, None))
+                continue
+            # Auto-apply only unambiguous full payments found by reference.
+            full_payment = _amount_key(index.residual.get(move_id)) == _amount_key(transaction.amount)
+            index.consume(move_id, transaction.amount)
+            if auto_apply and method == 'reference' and full_payment:
+                to_apply.append(transaction.id)
+            rows.append((transaction.id, 'proposed', move_id, method))
+
+        self._write_match_rows(rows)
+        matched = 0
+        if to_apply:
+            matched = len(self.browse(to_apply)._apply_matches())
+        _logger.info(
+            "Bank Noti Reconcile: %s transactions, %s proposed, %s applied, %s without match in %.3fs.",
+            len(rows), sum(1 for row in rows if row[1] == 'proposed'), matched,
+            sum(1 for row in rows if row[1] == 'no_match'), time.perf_counter() - started,
+        )
+
+    @api.model
+    def _check_reconcile_access(self):
+        """
+        bank.noti is read-only for every group, so the match fields are always written as
+        superuser (SQL in _write_match_rows, sudo() elsewhere). The buttons check first that
+        the user may write invoices, the only right reconciling actually needs.
+        """
+        self.env['account.move'].check_access('write')
+
+    def _write_match_rows(self, rows):
+        """Store the match results with one UPDATE per chunk instead of one write() per transaction."""
+        self.env['bank.noti'].flush_model(['match_state', 'move_id', 'match_method'])
+        for start in range(0, len(rows), UPDATE_CHUNK_SIZE):
+            values = SQL(', ').join(
+                SQL('(%s, %s, %s::int, %s)', *row) for row in rows[start:start + UPDATE_CHUNK_SIZE]
+            )
+            self.env.cr.execute(SQL(
+                """
+                UPDATE bank_noti
+                   SET match_state = v.state, move_id = v.move_id, match_method = v.method
+                  FROM (VALUES %s) AS v(id, state, move_id, method)
+                 WHERE bank_noti.id = v.id
+                """, values,
+            ))
+        self.env['bank.noti'].invalidate_model(['match_state', 'move_id', 'match_method'])
+
+    def _apply_matches(self):
+        """Register the payments of proposed matches, each in a savepoint so one failure does not block the others."""
+        transactions = self.filtered(lambda t: t.match_state == 'proposed' and t.move_id and not t.payment_id)
+        applied = self.browse()
+        by_company = defaultdict(lambda: self.browse())
+        for transaction in transactions:
+            by_company[transaction.move_id.company_id] |= transaction
+
+        for company, company_transactions in by_company.items():
+            journal = self._get_reconcile_journal(company)
+            if not journal:
+                _logger.warning("Bank Noti Reconcile: No bank journal for company %s, matches stay proposed.", company.name)
+                continue
+            for transaction in company_transactions:
+                try:
+                    with self.env.cr.savepoint():
+                        payment = self.env['account.payment.register'].with_context(
+                            active_model='account.move', active_ids=transaction.move_id.ids,
+                        ).create({
+                            'journal_id': journal.id,
+                            'amount': transaction.amount,
+                            'payment_date': fields.Date.to_date(transaction.notification_time) or fields.Date.context_today(self),
+                            'communication': transaction.content,
+                        })._create_payments()
+                        # In the same savepoint: the payment and the match state are kept or lost together.
+                        transaction.sudo().write({'match_state': 'matched', 'payment_id': payment[:1].id})
+                except Exception as e:
+                    _logger.warning("Bank Noti Reconcile: Could not register payment for transaction %s: %s",
+                                    transaction.transaction_id, e)
+                    continue
+                applied |= transaction
+        return applied
+
+    @api.model
+    def _get_reconcile_journal(self, company):
+        journal_id = int(self.env['ir.config_parameter'].sudo().get_param('bank_noti_reconcile.journal_id', 0))
+        journal = self.env['account.journal'].browse(journal_id).exists() if journal_id else False
+        if journal and journal.company_id == company:
+            return journal
+        return self.env['account.journal'].search([
+            ('type', '=', 'bank'), ('company_id', '=', company.id),
+        ], limit=1)
+
+    def action_apply_match(self):
+        self._check_reconcile_access()
+        self._apply_matches()
+        return True
+
+    def action_reset_match(self):
+        self._check_reconcile_access()
+        self.filtered(lambda t: t.match_state != 'matched').sudo().write({
+            'match_state': 'unmatched', 'match_method': False, 'move_id': False,
+        })
+        return True
+
+    def action_reconcile_now(self):
+        self._check_reconcile_access()
+        self.filtered(lambda t: t.match_state in ('unmatched', 'no_match'))._reconcile_transactions()
+        return True
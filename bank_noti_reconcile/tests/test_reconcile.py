@@ -0,0 +1,162 @@
+from odoo import Command, fields
+from odoo.tests import new_test_user, tagged
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+from odoo.addons.bank_noti_reconcile.models.bank_noti import _candidate_references
+
+
+@tagged('post_install', '-at_install')
+class TestBankNotiReconcile(AccountTestInvoicingCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.BankNoti = cls.env['bank.noti']
+        cls.env['ir.config_parameter'].sudo().set_param(
+            'bank_noti_reconcile.journal_id', cls.company_data['default_journal_bank'].id)
+        cls.payer_bank = cls.env['res.partner.bank'].create({
+            'partner_id': cls.partner_b.id,
+            'acc_number': '0011 2233 4455',
+        })
+
+    def _invoice(self, partner, amount, post=True):
+        # Untaxed, so that the residual equals the (integer) transferred amount.
+        return self.init_invoice('out_invoice', partner=partner, amounts=[amount], taxes=self.env['account.tax'], post=post)
+
+    def _transaction(self, content, amount, counterparty_account=False, bank_account='9999999999'):
+        return self.BankNoti.create({
+            'notification_time': fields.Datetime.now(),
+            'bank_account': bank_account,
+            'amount': amount,
+            'content': content,
+            'transaction_id': 'RECONCILE-TEST-%s' % self.BankNoti.search_count([]),
+            'counterparty_account': counterparty_account,
+        })
+
+    def test_candidate_references(self):
+        self.assertEqual(_candidate_references('tt inv 2025 00012 cam on')[:2], ['INV202500012', 'INV2025'])
+        self.assertEqual(_candidate_references(''), [])
+
+    def test_match_by_reference(self):
+        invoice = self._invoice(self.partner_a, 1000.0)
+        transaction = self._transaction('Thanh toan %s cam on' % invoice.name.replace('/', ' '), 1000)
+
+        transaction._reconcile_transactions()
+
+        self.assertEqual(transaction.match_state, 'proposed')
+        self.assertEqual(transaction.match_method, 'reference')
+        self.assertEqual(transaction.move_id, invoice)
+        # Payments are only registered on opt-in.
+        self.assertFalse(transaction.payment_id)
+        self.assertEqual(invoice.payment_state, 'not_paid')
+
+    def test_auto_apply_by_reference(self):
+        self.env['ir.config_parameter'].sudo().set_param('bank_noti_reconcile.auto_apply', 'True')
+        invoice = self._invoice(self.partner_a, 1000.0)
+        transaction = self._transaction('CK %s' % invoice.name, 1000)
+
+        transaction._reconcile_transactions()
+
+        self.assertEqual(transaction.match_state, 'matched')
+        self.assertTrue(transaction.payment_id)
+        self.assertIn(invoice.payment_state, ('paid', 'in_payment'))
+
+    def test_match_by_amount_and_payer_account(self):
+        invoice = self._invoice(self.partner_b, 1500.0)
+        transaction = self._transaction('chuyen tien', 1500, counterparty_account='001122334455')
+
+        transaction._reconcile_transactions()
+
+        self.assertEqual(transaction.match_state, 'proposed')
+        self.assertEqual(transaction.match_method, 'amount')
+        self.assertEqual(transaction.move_id, invoice)
+
+    def test_receiving_account_is_not_the_payer(self):
+        # The notification's bank_account is our own account: it never identifies the payer.
+        invoice = self._invoice(self.partner_b, 1500.0)
+        transaction = self._transaction('chuyen tien', 1500, bank_account='001122334455')
+
+        transaction._reconcile_transactions()
+
+        self.assertEqual(transaction.match_state, 'no_match')
+        self.assertFalse(transaction.move_id)
+
+    def test_ambiguous_amount_is_not_matched(self):
+        first = self._invoice(self.partner_b, 1500.0)
+        self._invoice(self.partner_b, 1500.0)
+        transaction = self._transaction('chuyen tien', 1500, counterparty_account='001122334455')
+
+        transaction._reconcile_transactions()
+
+        self.assertEqual(transaction.match_state, 'no_match')
+
+    def test_no_match_is_retried(self):
+        invoice = self._invoice(self.partner_b, 2000.0, post=False)
+        transaction = self._transaction('chuyen tien', 2000, counterparty_account='001122334455')
+
+        self.BankNoti.check_unnotified_transactions()
+        self.assertEqual(transaction.match_state, 'no_match')
+
+        # The invoice is posted after the customer paid: the next run finds it.
+        invoice.action_post()
+        self.BankNoti.check_unnotified_transactions()
+
+        self.assertEqual(transaction.match_state, 'proposed')
+        self.assertEqual(transaction.move_id, invoice)
+
+    def test_old_no_match_is_not_retried(self):
+        self.env['ir.config_parameter'].sudo().set_param('bank_noti_reconcile.retry_days', 0)
+        invoice = self._invoice(self.partner_b, 2000.0, post=False)
+        transaction = self._transaction('chuyen tien', 2000, counterparty_account='001122334455')
+        self.BankNoti.check_unnotified_transactions()
+        invoice.action_post()
+
+        self.BankNoti.check_unnotified_transactions()
+
+        self.assertEqual(transaction.match_state, 'no_match')
+
+    def test_debit_is_not_matched(self):
+        # An outgoing transfer mentioning the invoice must not be proposed nor lower its residual.
+        invoice = self._invoice(self.partner_a, 1000.0)
+        debit = self._transaction('Hoan tien %s' % invoice.name, -1000)
+        credit = self._transaction('CK %s' % invoice.name, 1000)
+
+        self.BankNoti.check_unnotified_transactions()
+
+        self.assertEqual(debit.match_state, 'unmatched')
+        self.assertFalse(debit.move_id)
+        self.assertEqual(credit.match_state, 'proposed')
+        self.assertEqual(credit.move_id, invoice)
+
+    def test_buttons_as_accountant(self):
+        # bank.noti is read-only by ACL: the buttons work for the accounting group they are shown to.
+        accountant = new_test_user(
+            self.env, login='reconcile_accountant', groups='base.group_user,account.group_account_invoice',
+            company_id=self.env.company.id, company_ids=[Command.set(self.env.company.ids)],
+        )
+        invoice = self._invoice(self.partner_a, 1000.0)
+        transaction = self._transaction('CK %s' % invoice.name, 1000)
+        as_accountant = transaction.with_user(accountant)
+
+        as_accountant.action_reconcile_now()
+        self.assertEqual(transaction.match_state, 'proposed')
+        as_accountant.action_reset_match()
+        self.assertEqual(transaction.match_state, 'unmatched')
+        self.assertFalse(transaction.move_id)
+
+        as_accountant.action_reconcile_now()
+        as_accountant.action_apply_match()
+        self.assertEqual(transaction.match_state, 'matched')
+        self.assertTrue(transaction.payment_id)
+        self.assertIn(invoice.payment_state, ('paid', 'in_payment'))
+
+    def test_counterparty_from_feed(self):
+        vals = self.BankNoti._prepare_notification_vals({
+            'time': '2025-01-01 10:00:00',
+            'content': 'CK',
+            'bank_account': '9999999999',
+            'amount': 100,
+            'transaction_id': 'T1',
+            'counterparty_account': '001122334455',
+        })
+        self.assertEqual(vals['counterparty_account'], '001122334455')
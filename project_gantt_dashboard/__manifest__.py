@@ -21,6 +21,7 @@
     'depends': [
         'project',
         'web',
+        'bus',
     ],
     'data': [
         'security/ir.model.access.csv',
@@ -35,7 +36,9 @@
             
             # Owl Components, Services & Styles
             'project_gantt_dashboard/static/src/components/gantt_dashboard.scss',
+            'project_gantt_dashboard/static/src/services/gantt_cache.js',
             'project_gantt_dashboard/static/src/services/gantt_data_service.js',
+            'project_gantt_dashboard/static/src/services/gantt_write_queue.js',
             'project_gantt_dashboard/static/src/components/gantt_dashboard.js',
             'project_gantt_dashboard/static/src/components/gantt_dashboard.xml',
             'project_gantt_dashboard/static/src/main.js',
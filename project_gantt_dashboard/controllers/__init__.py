@@ -0,0 +1 @@
+from . import gantt_controller
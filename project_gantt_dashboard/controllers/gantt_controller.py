@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+from odoo import http
+from odoo.http import request
+
+
+class GanttDashboardController(http.Controller):
+
+    @http.route('/project_gantt_dashboard/tasks', type='jsonrpc', auth='user', readonly=True)
+    def gantt_tasks(self, project_id, date_from=None, date_to=None, stage_ids=None, user_ids=None,
+                    cursor=None, limit=None, task_ids=None):
+        """
+        Tasks of a project overlapping the visible window [date_from, date_to], filtered by
+        stage / assignee and paginated with a keyset cursor. The first page (no cursor) also
+        carries the stage and assignee facets used by the dashboard filters. With ``task_ids``
+        only these tasks are returned, to update their bars in place.
+        See ProjectTask.get_gantt_tasks() for the response format.
+        """
+        return request.env['project.task'].get_gantt_tasks(
+            project_id,
+            date_from=date_from,
+            date_to=date_to,
+            stage_ids=stage_ids,
+            user_ids=user_ids,
+            cursor=cursor,
+            limit=limit,
+            with_facets=not cursor and not task_ids,
+            task_ids=task_ids,
+        )
+
+    @http.route('/project_gantt_dashboard/tasks/changes', type='jsonrpc', auth='user', readonly=True)
+    def gantt_task_changes(self, project_id, since, date_from=None, date_to=None, stage_ids=None,
+                           user_ids=None, loaded_until=None):
+        """
+        Tasks changed since the watermark of a client-side cache (stale-while-revalidate).
+        See ProjectTask.get_gantt_task_changes() for the response format.
+        """
+        return request.env['project.task'].get_gantt_task_changes(
+            project_id,
+            since,
+            date_from=date_from,
+            date_to=date_to,
+            stage_ids=stage_ids,
+            user_ids=user_ids,
+            loaded_until=loaded_until,
+        )
+
+    @http.route('/project_gantt_dashboard/tasks/write', type='jsonrpc', auth='user')
+    def gantt_write(self, changes, auto_schedule=False):
+        """
+        Batched date changes of the Gantt write queue, with per-task results and the
+        successors shifted by auto-scheduling. See ProjectTask.write_gantt_dates().
+        """
+        return request.env['project.task'].write_gantt_dates(changes, auto_schedule=bool(auto_schedule))
+
+    @http.route('/project_gantt_dashboard/schedule', type='jsonrpc', auth='user', readonly=True)
+    def gantt_schedule(self, project_id):
+        """Critical path and slack of the project tasks. See ProjectTask.get_gantt_schedule()."""
+        return request.env['project.task'].get_gantt_schedule(project_id)
@@ -1 +1,2 @@
+from . import ir_websocket
 from . import project_task
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+from collections import deque
+
+
+class GanttScheduler:
+    """
+    Critical path method (CPM) over the task dependency graph of a project.
+
+    Plain data only (no records): dates are day ordinals (date.toordinal()) and
+    every pass is a single walk over the graph in topological order, so the whole
+    computation is O(tasks + dependencies).
+
+    Finish-to-start dependencies: a task may start on the day its predecessor ends
+    (a Gantt bar covers [start, end)). The planned start of a task is a
+    "start no earlier than" constraint, so ES = max(start, EF of the predecessors).
+    """
+
+    def __init__(self, starts, ends, edges):
+        """
+        :param dict starts: {task_id: start ordinal}
+        :param dict ends: {task_id: end ordinal}
+        :param edges: iterable of (predecessor_id, successor_id)
+        """
+        self.starts = starts
+        self.durations = {task_id: max(0, ends[task_id] - start) for task_id, start in starts.items()}
+        self.successors = {task_id: [] for task_id in starts}
+        self.predecessors = {task_id: [] for task_id in starts}
+        for predecessor, successor in edges:
+            # Dependencies on tasks outside the graph (other projects, archived) are ignored.
+            if predecessor in starts and successor in starts and predecessor != successor:
+                self.successors[predecessor].append(successor)
+                self.predecessors[successor].append(predecessor)
+        self.order, self.cycles = self._topological_order()
+
+    def _topological_order(self):
+        """Kahn's algorithm. Tasks left over are on (or behind) a dependency cycle."""
+        in_degree = {task_id: len(predecessors) for task_id, predecessors in self.predecessors.items()}
+        queue = deque(task_id for task_id, degree in in_degree.items() if not degree)
+        order = []
+        while queue:
+            task_id = queue.popleft()
+            order.append(task_id)
+            for successor in self.successors[task_id]:
+                in_degree[successor] -= 1
+                if not in_degree[successor]:
+                    queue.append(successor)
+        cycles = [task_id for task_id, degree in in_degree.items() if degree] if len(order) < len(in_degree) else []
+        return order, cycles
+
+    def compute(self):
+        """
+        Forward and backward pass.
+        Returns {'early_start', 'early_finish', 'late_start', 'late_finish', 'slack': {task_id: ordinal/days},
+        'critical': [task_id], 'project_end': ordinal, 'cycles': [task_id]}. Tasks on a cycle are left out.
+        """
+        early_start, early_finish = {}, {}
+        for task_id in self.order:
+            start = self.starts[task_id]
+            for predecessor in self.predecessors[task_id]:
+                if early_finish[predecessor] > start:
+                    start = early_finish[predecessor]
+            early_start[task_id] = start
+            early_finish[task_id] = start + self.durations[task_id]
+
+        project_end = max(early_finish.values(), default=0)
+        late_start, late_finish, slack = {}, {}, {}
+        for task_id in reversed(self.order):
+            finish = project_end
+            for successor in self.successors[task_id]:
+                # A successor on a cycle is not scheduled: it does not constrain its predecessors.
+                if successor in late_start and late_start[successor] < finish:
+                    finish = late_start[successor]
+            late_finish[task_id] = finish
+            late_start[task_id] = finish - self.durations[task_id]
+            slack[task_id] = late_start[task_id] - early_start[task_id]
+
+        return {
+            'early_start': early_start,
+            'early_finish': early_finish,
+            'late_start': late_start,
+            'late_finish': late_finish,
+            'slack': slack,
+            'critical': [task_id for task_id in self.order if slack[task_id] <= 0],
+            'project_end': project_end,
+            'cycles': self.cycles,
+        }
+
+    def cascade(self, moved_ids):
+        """
+        Shift the successors (direct or not) of the moved tasks that now start before
+        one of their predecessors ends, keeping their duration. Unrelated tasks are
+        never touched, even if their dates already violate a dependency.
+        Returns {task_id: (new start ordinal, new end ordinal)} in topological order.
+        """
+        affected = set()
+        stack = [task_id for task_id in moved_ids if task_id in self.successors]
+        while stack:
+            for successor in self.successors[stack.pop()]:
+                if successor not in affected:
+                    affected.add(successor)
+                    stack.append(successor)
+
+        ends = {}
+        shifts = {}
+        for task_id in self.order:
+            if task_id not in affected:
+                continue
+            start = self.starts[task_id]
+            for predecessor in self.predecessors[task_id]:
+                end = ends.get(predecessor, self.starts[predecessor] + self.durations[predecessor])
+                if end > start:
+                    start = end
+            ends[task_id] = start + self.durations[task_id]
+            if start != self.starts[task_id]:
+                shifts[task_id] = (start, ends[task_id])
+        return shifts
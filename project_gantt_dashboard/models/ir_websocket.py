@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+from odoo import models
+
+# Bus channel asked by the Gantt dashboard: "project_gantt_dashboard_project_<id>".
+GANTT_CHANNEL_PREFIX = 'project_gantt_dashboard_project_'
+
+
+class IrWebsocket(models.AbstractModel):
+    _inherit = 'ir.websocket'
+
+    def _build_bus_channel_list(self, channels):
+        """Subscribe to the Gantt channel of the requested projects the user can read."""
+        channels = list(channels)
+        project_ids = {
+            int(channel[len(GANTT_CHANNEL_PREFIX):])
+            for channel in channels
+            if isinstance(channel, str) and channel.startswith(GANTT_CHANNEL_PREFIX)
+            and channel[len(GANTT_CHANNEL_PREFIX):].isdigit()
+        }
+        if project_ids:
+            channels = [
+                channel for channel in channels
+                if not (isinstance(channel, str) and channel.startswith(GANTT_CHANNEL_PREFIX))
+            ]
+            if self.env.uid:
+                # search() applies the record rules: no channel for projects the user cannot read.
+                projects = self.env['project.project'].search([('id', 'in', list(project_ids))])
+                channels.extend((project, 'gantt') for project in projects)
+        return super()._build_bus_channel_list(channels)
@@ -1,6 +1,35 @@
 # -*- coding: utf-8 -*-
+from datetime import date, datetime, time, timedelta
+
+import logging
+from time import perf_counter
+
+import pytz
+
 from odoo import api, fields, models, _
-from odoo.exceptions import ValidationError
+from odoo.exceptions import UserError, ValidationError
+from odoo.fields import Domain
+from odoo.tools import SQL
+
+from .gantt_scheduler import GanttScheduler
+
+_logger = logging.getLogger(__name__)
+
+# Page size of the Gantt task API (keyset pagination on id).
+GANTT_PAGE_SIZE = 500
+GANTT_MAX_PAGE_SIZE = 2000
+# Length (in days) of the virtual bar drawn when a task misses one or both dates.
+GANTT_VIRTUAL_DAYS = 1
+# Writes to these fields are published to the dashboards open on the project.
+GANTT_BUS_FIELDS = ('name', 'x_date_start', 'date_deadline', 'stage_id', 'user_ids')
+GANTT_BUS_NOTIFICATION = 'project_gantt_dashboard/tasks_changed'
+# write_date sent to the client as the version of a task: full precision, since two writes
+# within the same second must not look alike to the conflict check of write_gantt_dates.
+GANTT_VERSION_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+# write_date is the start of the writing transaction, which may commit well after a later
+# write: deltas re-read this much before the client's watermark not to miss such tasks.
+GANTT_WATERMARK_MARGIN = timedelta(minutes=5)
+
 
 class ProjectTask(models.Model):
     _inherit = 'project.task'
@@ -19,10 +48,440 @@ class ProjectTask(models.Model):
         Logic applies only if both dates are set.
         """
         for task in self:
-            if task.x_date_start and task.date_deadline:
-                if task.x_date_start > task.date_deadline:
-                    raise ValidationError(_(
-                        "Error: Start Date (%(start)s) cannot be later than Deadline (%(end)s).",
-                        start=task.x_date_start,
-                        end=task.date_deadline
-                    ))
+            # date_deadline is a Datetime: compare with its day in the user timezone.
+            error = self._get_dates_error(task.x_date_start, self._gantt_deadline_date(task.date_deadline))
+            if error:
+                raise ValidationError(error)
+
+    @api.model
+    def _get_dates_error(self, start, deadline):
+        if start and deadline and start > deadline:
+            return _(
+                "Error: Start Date (%(start)s) cannot be later than Deadline (%(end)s).",
+                start=start,
+                end=deadline
+            )
+        return False
+
+    def write(self, vals):
+        res = super().write(vals)
+        changed = [name for name in GANTT_BUS_FIELDS if name in vals]
+        # Batched Gantt writes publish a single message at the end (see write_gantt_dates).
+        if changed and not self.env.context.get('gantt_notify_deferred'):
+            self._gantt_notify(changed)
+        return res
+
+    # -------------------------------------------------------------------------
+    # LIVE UPDATES (BUS)
+    # -------------------------------------------------------------------------
+
+    def _gantt_notify(self, changed):
+        """
+        Publish the changed Gantt fields of these tasks on the bus channel of their project
+        (one message per project). The diff is compact and timezone-independent: raw dates,
+        stage / assignee names; each dashboard turns it into bars itself.
+        """
+        by_project = {}
+        for task in self:
+            if not task.project_id:
+                continue
+            diff = {'id': task.id, 'write_date': self._gantt_version(task.write_date)}
+            if 'name' in changed:
+                diff['name'] = task.name
+            if 'x_date_start' in changed:
+                diff['x_date_start'] = fields.Date.to_string(task.x_date_start)
+            if 'date_deadline' in changed:
+                diff['date_deadline'] = fields.Datetime.to_string(task.date_deadline)
+            if 'stage_id' in changed:
+                diff['stage_id'] = [task.stage_id.id, task.stage_id.name or '']
+            if 'user_ids' in changed:
+                diff['user_ids'] = [[user.id, user.name] for user in task.user_ids]
+            by_project.setdefault(task.project_id, []).append(diff)
+        for project, diffs in by_project.items():
+            self.env['bus.bus']._sendone((project, 'gantt'), GANTT_BUS_NOTIFICATION, {
+                'project_id': project.id,
+                'author_id': self.env.uid,
+                'tasks': diffs,
+            })
+
+    # -------------------------------------------------------------------------
+    # GANTT DATA API
+    # -------------------------------------------------------------------------
+
+    @api.model
+    def _gantt_version(self, write_date):
+        return write_date.strftime(GANTT_VERSION_FORMAT) if write_date else False
+
+    @api.model
+    def _gantt_user_tz(self):
+        try:
+            return pytz.timezone(self.env.context.get('tz') or self.env.user.tz or 'UTC')
+        except pytz.UnknownTimeZoneError:
+            return pytz.utc
+
+    @api.model
+    def _gantt_day_start_utc(self, day):
+        """Naive UTC datetime of 00:00 (user timezone) on the given day, to compare with date_deadline."""
+        local = self._gantt_user_tz().localize(datetime.combine(day, time.min))
+        return local.astimezone(pytz.utc).replace(tzinfo=None)
+
+    @api.model
+    def _gantt_deadline_date(self, deadline):
+        """date_deadline is a Datetime: the Gantt works with the day as seen by the user."""
+        if not deadline:
+            return False
+        return pytz.utc.localize(deadline).astimezone(self._gantt_user_tz()).date()
+
+    @api.model
+    def _gantt_deadline_value(self, day, current_deadline=False):
+        """Datetime to store in date_deadline for a day picked on the Gantt (keeps the current time of day)."""
+        if not day:
+            return False
+        tz = self._gantt_user_tz()
+        local_time = time.min
+        if current_deadline:
+            local_time = pytz.utc.localize(current_deadline).astimezone(tz).time()
+        local = tz.localize(datetime.combine(day, local_time))
+        return local.astimezone(pytz.utc).replace(tzinfo=None)
+
+    @api.model
+    def _gantt_window_domain(self, date_from, date_to):
+        """
+        Tasks whose bar (real or virtual dates, see _gantt_prepare) overlaps [date_from, date_to].
+        Every branch is a range condition on x_date_start or date_deadline, so PostgreSQL can
+        use the indexes on both columns instead of scanning the whole project.
+        """
+        virtual = timedelta(days=GANTT_VIRTUAL_DAYS)
+        # date_deadline is compared in UTC: [from 00:00, to + 1 day 00:00) in the user timezone.
+        deadline_from = self._gantt_day_start_utc(date_from)
+        deadline_to = self._gantt_day_start_utc(date_to + timedelta(days=1))
+        today = fields.Date.context_today(self)
+        return Domain.OR([
+            # Both dates: start <= to and end >= from.
+            Domain([
+                ('x_date_start', '!=', False), ('x_date_start', '<=', date_to),
+                ('date_deadline', '>=', deadline_from),
+            ]),
+            # Start only: the virtual end is start + 1 day.
+            Domain([
+                ('date_deadline', '=', False),
+                ('x_date_start', '>=', date_from - virtual), ('x_date_start', '<=', date_to),
+            ]),
+            # Deadline only: the virtual start is deadline - 1 day.
+            Domain([
+                ('x_date_start', '=', False),
+                ('date_deadline', '>=', deadline_from), ('date_deadline', '<', deadline_to + virtual),
+            ]),
+            # No date at all: drawn from today, visible only if today is in the window.
+            Domain([('x_date_start', '=', False), ('date_deadline', '=', False)])
+            if date_from - virtual <= today <= date_to else Domain.FALSE,
+        ])
+
+    @api.model
+    def _gantt_search_domain(self, project_id, date_from=None, date_to=None, stage_ids=None, user_ids=None):
+        domain = Domain('project_id', '=', int(project_id))
+        if date_from and date_to:
+            domain &= self._gantt_window_domain(fields.Date.to_date(date_from), fields.Date.to_date(date_to))
+        if stage_ids:
+            domain &= Domain('stage_id', 'in', [int(stage_id) for stage_id in stage_ids])
+        if user_ids:
+            domain &= Domain('user_ids', 'in', [int(user_id) for user_id in user_ids])
+        return domain
+
+    @api.model
+    def _gantt_virtual_dates(self, start, end, today):
+        """(start, end, is_virtual): missing dates are replaced by virtual ones ("Soft Visualization")."""
+        virtual = timedelta(days=GANTT_VIRTUAL_DAYS)
+        if not start and not end:
+            return today, today + virtual, True
+        if not start:
+            return end - virtual, end, True
+        if not end:
+            return start, start + virtual, True
+        return start, end, False
+
+    def _gantt_prepare(self):
+        """Gantt rows of the tasks: names resolved and missing dates replaced by virtual ones."""
+        today = fields.Date.context_today(self)
+        rows = []
+        for task in self:
+            start, end, is_virtual = self._gantt_virtual_dates(
+                task.x_date_start, self._gantt_deadline_date(task.date_deadline), today,
+            )
+            rows.append({
+                'id': task.id,
+                'name': task.name,
+                'start': fields.Date.to_string(start),
+                'end': fields.Date.to_string(end),
+                'is_virtual': is_virtual,
+                'stage_id': task.stage_id.id,
+                'stage_name': task.stage_id.name or '',
+                'user_ids': task.user_ids.ids,
+                'user_names': ', '.join(task.user_ids.mapped('name')),
+                'write_date': self._gantt_version(task.write_date),
+                # Predecessors: the Gantt draws an arrow from each of them (if loaded).
+                'dependencies': task.depend_on_ids.ids,
+            })
+        return rows
+
+    @api.model
+    def _gantt_facets(self, project_id):
+        """Stages and assignees of the project (with task counts) for the dashboard filters."""
+        domain = Domain('project_id', '=', int(project_id))
+        stages = [
+            {'id': stage.id, 'name': stage.name, 'count': count}
+            for stage, count in self._read_group(domain, ['stage_id'], ['__count'], order='stage_id')
+            if stage
+        ]
+        users = [
+            {'id': user.id, 'name': user.name, 'count': count}
+            for user, count in self._read_group(domain, ['user_ids'], ['__count'])
+            if user
+        ]
+        return {'stages': stages, 'users': sorted(users, key=lambda user: user['name'])}
+
+    @api.model
+    def get_gantt_tasks(self, project_id, date_from=None, date_to=None, stage_ids=None, user_ids=None,
+                        cursor=None, limit=None, with_facets=False, task_ids=None):
+        """
+        One page of Gantt rows, ordered by id and paginated with a keyset cursor
+        (the last id of the previous page), so deep pages cost the same as the first one.
+        ``task_ids`` restricts the result to these tasks, to refresh single bars in place
+        (a task missing from the result no longer matches the filters).
+        Returns {'tasks': [...], 'total': int, 'next_cursor': int|False[, 'facets': {...}]}.
+        """
+        limit = max(1, min(int(limit or GANTT_PAGE_SIZE), GANTT_MAX_PAGE_SIZE))
+        domain = self._gantt_search_domain(project_id, date_from, date_to, stage_ids, user_ids)
+        page_domain = domain & Domain('id', '>', int(cursor)) if cursor else domain
+        if task_ids:
+            page_domain &= Domain('id', 'in', [int(task_id) for task_id in task_ids])
+        # One more row than asked tells whether another page exists.
+        tasks = self.search_fetch(
+            page_domain, ['name', 'x_date_start', 'date_deadline', 'stage_id', 'user_ids', 'write_date', 'depend_on_ids'],
+            order='id', limit=limit + 1,
+        )
+        has_more = len(tasks) > limit
+        tasks = tasks[:limit]
+        result = {
+            'tasks': tasks._gantt_prepare(),
+            'total': self.search_count(domain),
+            'next_cursor': tasks[-1].id if has_more else False,
+        }
+        if with_facets:
+            result['facets'] = self._gantt_facets(project_id)
+            result['watermark'] = self._gantt_watermark(project_id)
+        return result
+
+    @api.model
+    def _gantt_watermark(self, project_id):
+        """Last write_date of the project tasks: the version of the data a client has loaded."""
+        [(last_write,)] = self._read_group(Domain('project_id', '=', int(project_id)), [], ['write_date:max'])
+        return fields.Datetime.to_string(last_write) if last_write else False
+
+    @api.model
+    def get_gantt_task_changes(self, project_id, since, date_from=None, date_to=None, stage_ids=None,
+                               user_ids=None, loaded_until=None):
+        """
+        Delta of a task set cached by the client at the ``since`` watermark: the rows written
+        since then, and the ids of every matching task (to drop the tasks deleted or out of
+        the filters). ``loaded_until`` is the next_cursor of the cached pages: tasks beyond it
+        will come with the next pages. Tasks written up to GANTT_WATERMARK_MARGIN before
+        ``since`` are sent again, so late-committing transactions are not missed. When too
+        many tasks changed, {'reset': True} asks the client for a full reload instead.
+        Returns {'tasks', 'ids', 'total', 'watermark', 'facets'} or {'reset': True}.
+        """
+        domain = self._gantt_search_domain(project_id, date_from, date_to, stage_ids, user_ids)
+        loaded_domain = domain & Domain('id', '<=', int(loaded_until)) if loaded_until else domain
+        since = fields.Datetime.to_datetime(since) - GANTT_WATERMARK_MARGIN
+        changed = self.search_fetch(
+            loaded_domain & Domain('write_date', '>', since),
+            ['name', 'x_date_start', 'date_deadline', 'stage_id', 'user_ids', 'write_date', 'depend_on_ids'],
+            order='id', limit=GANTT_MAX_PAGE_SIZE + 1,
+        )
+        if len(changed) > GANTT_MAX_PAGE_SIZE:
+            return {'reset': True}
+        return {
+            'tasks': changed._gantt_prepare(),
+            'ids': self.search(loaded_domain, order='id').ids,
+            'total': self.search_count(domain),
+            'watermark': self._gantt_watermark(project_id),
+            'facets': self._gantt_facets(project_id),
+        }
+
+    @api.model
+    def write_gantt_dates(self, changes, auto_schedule=False):
+        """
+        Apply a batch of date changes from the Gantt write queue in one call.
+        ``changes``: [{'id', 'start', 'end', 'write_date'}], dates as 'YYYY-MM-DD',
+        ``write_date`` being the version the client based its change on.
+        With ``auto_schedule``, the successors of the moved tasks are shifted when they
+        would now start before a predecessor ends (see _gantt_cascade).
+        Returns {'results': [...], 'shifted': [Gantt rows]}, one result per change:
+        {'id', 'status', 'message', 'task'} where status is 'ok', 'conflict' (modified
+        meanwhile by someone else), 'error' or 'missing'; 'task' is the current Gantt row,
+        so the client can roll back or refresh that bar only.
+        """
+        task_ids = [int(change['id']) for change in changes]
+        tasks = self.with_context(gantt_notify_deferred=True).search_fetch(
+            [('id', 'in', task_ids)], ['x_date_start', 'date_deadline', 'write_date'],
+        )
+        tasks_by_id = {task.id: task for task in tasks}
+
+        results = {}
+        to_write = []
+        for change in changes:
+            task_id = int(change['id'])
+            task = tasks_by_id.get(task_id)
+            if not task:
+                results[task_id] = {'id': task_id, 'status': 'missing', 'message': _("This task no longer exists.")}
+                continue
+            if change.get('write_date') and change['write_date'] != self._gantt_version(task.write_date):
+                results[task_id] = {'id': task_id, 'status': 'conflict',
+                                    'message': _("This task was modified by someone else meanwhile.")}
+                continue
+            start = fields.Date.to_date(change.get('start'))
+            end = fields.Date.to_date(change.get('end'))
+            # Same rule as _check_dates, checked for the whole batch before touching the database.
+            error = self._get_dates_error(start, end)
+            if error:
+                results[task_id] = {'id': task_id, 'status': 'error', 'message': error}
+                continue
+            to_write.append((task, {
+                'x_date_start': start,
+                'date_deadline': self._gantt_deadline_value(end, task.date_deadline),
+            }))
+
+        shifted = self.browse()
+        if to_write:
+            try:
+                # Optimistic path: every write, and the cascade they trigger, in one savepoint.
+                with self.env.cr.savepoint():
+                    shifted = tasks._gantt_apply_dates(to_write, auto_schedule)
+                for task, _vals in to_write:
+                    results[task.id] = {'id': task.id, 'status': 'ok', 'message': ''}
+            except UserError:
+                # UserError covers AccessError and ValidationError: find the culprits,
+                # retrying each write with its own cascade on its own.
+                self.env.invalidate_all()
+                shifted = self.browse()
+                for task, vals in to_write:
+                    try:
+                        with self.env.cr.savepoint():
+                            shifted |= tasks._gantt_apply_dates([(task, vals)], auto_schedule)
+                        results[task.id] = {'id': task.id, 'status': 'ok', 'message': ''}
+                    except UserError as e:
+                        self.env.invalidate_all()
+                        results[task.id] = {'id': task.id, 'status': 'error', 'message': str(e)}
+
+        moved = tasks.filtered(lambda task: results[task.id]['status'] == 'ok')
+        (moved | shifted)._gantt_notify(['x_date_start', 'date_deadline'])
+
+        rows = {row['id']: row for row in tasks._gantt_prepare()}
+        for result in results.values():
+            result['task'] = rows.get(result['id'], False)
+        return {
+            'results': [results[task_id] for task_id in dict.fromkeys(task_ids)],
+            'shifted': (shifted - tasks)._gantt_prepare(),
+        }
+
+    def _gantt_apply_dates(self, to_write, auto_schedule):
+        """
+        Write [(task, vals)], then cascade to the successors of the moved tasks when
+        ``auto_schedule`` is set. Called within a savepoint: a failing cascade undoes
+        the writes that triggered it. Returns the shifted tasks.
+        """
+        for task, vals in to_write:
+            task.write(vals)
+        shifted = self.browse()
+        if auto_schedule:
+            moved = self.browse([task.id for task, _vals in to_write])
+            for project in moved.project_id:
+                shifted |= self._gantt_cascade(project.id, moved.filtered(lambda task: task.project_id == project).ids)
+        return shifted
+
+    # -------------------------------------------------------------------------
+    # SCHEDULING (CPM over depend_on_ids)
+    # -------------------------------------------------------------------------
+
+    @api.model
+    def _gantt_scheduler(self, project_id):
+        """
+        GanttScheduler over the tasks of the project, loaded with two queries (dates
+        and dependencies), whatever the number of tasks. Tasks without dates get the
+        same virtual dates as on the Gantt.
+        Returns (scheduler, {task_id: (has_start, has_deadline)}).
+        """
+        started = perf_counter()
+        self.flush_model(['project_id', 'x_date_start', 'date_deadline', 'depend_on_ids'])
+        # _search() applies the record rules of the current user.
+        task_query = self._search(Domain('project_id', '=', int(project_id)))
+        self.env.cr.execute(SQL(
+            """
+            SELECT t.id, t.x_date_start, (timezone(%(tz)s, timezone('UTC', t.date_deadline)))::date
+              FROM project_task t
+             WHERE t.id IN %(tasks)s
+            """,
+            tz=self._gantt_user_tz().zone, tasks=task_query.subselect(),
+        ))
+        today = fields.Date.context_today(self)
+        starts, ends, flags = {}, {}, {}
+        for task_id, start, deadline in self.env.cr.fetchall():
+            flags[task_id] = (bool(start), bool(deadline))
+            start, end, _is_virtual = self._gantt_virtual_dates(start, deadline, today)
+            starts[task_id] = start.toordinal()
+            ends[task_id] = end.toordinal()
+
+        field = self._fields['depend_on_ids']
+        edges = []
+        if starts:
+            self.env.cr.execute(SQL(
+                "SELECT %s, %s FROM %s WHERE %s IN %s",
+                SQL.identifier(field.column2), SQL.identifier(field.column1), SQL.identifier(field.relation),
+                SQL.identifier(field.column1), task_query.subselect(),
+            ))
+            edges = self.env.cr.fetchall()
+        scheduler = GanttScheduler(starts, ends, edges)
+        _logger.debug("Gantt: Loaded %s tasks and %s dependencies of project %s in %.3fs.",
+                      len(starts), len(edges), project_id, perf_counter() - started)
+        return scheduler, flags
+
+    @api.model
+    def get_gantt_schedule(self, project_id):
+        """
+        Critical path of the project: {'critical': [task_id], 'slack': {task_id: days},
+        'project_end': 'YYYY-MM-DD'|False, 'cycles': [task_id]}.
+        """
+        scheduler, _flags = self._gantt_scheduler(project_id)
+        schedule = scheduler.compute()
+        return {
+            'critical': schedule['critical'],
+            'slack': schedule['slack'],
+            'project_end': fields.Date.to_string(date.fromordinal(schedule['project_end']))
+            if schedule['early_finish'] else False,
+            'cycles': schedule['cycles'],
+        }
+
+    @api.model
+    def _gantt_cascade(self, project_id, moved_ids):
+        """
+        Shift (keeping their duration) the successors of the moved tasks that start before
+        one of their predecessors ends. Only the dates a task really has are written.
+        Returns the shifted tasks.
+        """
+        scheduler, flags = self._gantt_scheduler(project_id)
+        shifts = scheduler.cascade(moved_ids)
+        shifted = self.browse()
+        # Topological order: each write keeps the task consistent with its predecessors.
+        for task_id, (start, end) in shifts.items():
+            has_start, has_deadline = flags[task_id]
+            if not has_start and not has_deadline:
+                continue
+            task = self.browse(task_id)
+            vals = {}
+            if has_start:
+                vals['x_date_start'] = date.fromordinal(start)
+            if has_deadline:
+                vals['date_deadline'] = self._gantt_deadline_value(date.fromordinal(end), task.date_deadline)
+            task.write(vals)
+            shifted |= task
+        return shifted
@@ -79,58 +79,74 @@ var Gantt = (function () {
                 popup_trigger: 'click',
                 custom_popup_html: null,
                 language: 'en',
+                // Virtualized mode: only the rows / date columns inside the
+                // scrolled viewport (plus a buffer) are materialized as SVG.
+                virtualize: false,
+                virtual_buffer: 10,
+                // Dragging a bar also moves the bars depending on it
+                drag_dependents: true,
             };
             this.options = Object.assign({}, default_options, options);
         }
 
         setup_tasks(tasks) {
             // prepare tasks
-            this.tasks = tasks.map((task, i) => {
-                // convert to Date objects
-                task._start = date_utils.parse(task.start);
-                task._end = date_utils.parse(task.end);
-
-                // make task invalid if duration too large
-                if (date_utils.diff(task._end, task._start, 'year') > 10) {
-                    task.end = null;
-                }
+            this.tasks = tasks.map((task, i) => this.prepare_task(task, i));
+            this.setup_dependencies();
+        }
 
-                // cache index
-                task._index = i;
+        prepare_task(task, i) {
+            // dependencies: array of task ids (a comma-separated string is accepted too)
+            if (Array.isArray(task.dependencies)) {
+                task.dependencies = task.dependencies.map(String);
+            } else {
+                task.dependencies = (task.dependencies || '')
+                    .split(',')
+                    .map((d) => d.trim())
+                    .filter(Boolean);
+            }
 
-                // invalid dates
-                if (!task.start && !task.end) {
-                    const today = date_utils.today();
-                    task._start = today;
-                    task._end = date_utils.add(today, 2, 'day');
-                }
+            // convert to Date objects
+            task._start = date_utils.parse(task.start);
+            task._end = date_utils.parse(task.end);
 
-                if (!task.start && task.end) {
-                    task._start = date_utils.add(date_utils.parse(task.end), -2, 'day');
-                }
+            // make task invalid if duration too large
+            if (date_utils.diff(task._end, task._start, 'year') > 10) {
+                task.end = null;
+            }
 
-                if (task.start && !task.end) {
-                    task._end = date_utils.add(date_utils.parse(task.start), 2, 'day');
-                }
+            // cache index
+            task._index = i;
 
-                // if dates are not valid, set to today
-                const date_diff = date_utils.diff(task._end, task._start, 'year');
-                if (date_diff < 0) {
-                    task._end = date_utils.add(task._start, 2, 'day');
-                }
+            // invalid dates
+            if (!task.start && !task.end) {
+                const today = date_utils.today();
+                task._start = today;
+                task._end = date_utils.add(today, 2, 'day');
+            }
 
-                return task;
-            });
+            if (!task.start && task.end) {
+                task._start = date_utils.add(date_utils.parse(task.end), -2, 'day');
+            }
 
-            this.setup_dependencies();
+            if (task.start && !task.end) {
+                task._end = date_utils.add(date_utils.parse(task.start), 2, 'day');
+            }
+
+            // if dates are not valid, set to today
+            const date_diff = date_utils.diff(task._end, task._start, 'year');
+            if (date_diff < 0) {
+                task._end = date_utils.add(task._start, 2, 'day');
+            }
+
+            return task;
         }
 
         setup_dependencies() {
             this.dependency_map = {};
             for (let t of this.tasks) {
-                if (t.dependencies) {
-                    t.dependencies.split(',').forEach((d) => {
-                        const dep = d.trim();
+                if (t.dependencies.length) {
+                    t.dependencies.forEach((dep) => {
                         if (!this.dependency_map[dep]) {
                             this.dependency_map[dep] = [];
                         }
@@ -230,11 +246,16 @@ var Gantt = (function () {
         bind_events() {
             this.bind_grid_click();
             this.bind_bar_events();
+            this.bind_virtual_scroll();
         }
 
         render() {
             this.clear();
             this.setup_layers();
+            if (this.options.virtualize) {
+                this.render_virtual();
+                return;
+            }
             this.make_grid();
             this.make_dates();
             this.make_bars();
@@ -244,6 +265,288 @@ var Gantt = (function () {
             this.set_scroll_position();
         }
 
+        // VIRTUALIZED RENDERING
+
+        render_virtual() {
+            // Static frame: sized for every row / column so the scrollbars are
+            // right, but only a few nodes whatever the number of tasks.
+            this.bar_map = new Map();
+            this.bars = [];
+            this.arrows = [];
+            this.viewport = null;
+            this.make_grid_background();
+            this.make_grid_header();
+            this.make_grid_highlights();
+            this.setup_tick_positions();
+            this.virtual_layers = {
+                rows: createSVG('g', { append_to: this.layers.grid }),
+                lines: createSVG('g', { append_to: this.layers.grid }),
+                ticks: createSVG('g', { append_to: this.layers.grid }),
+            };
+            this.svg.setAttribute('width', this.dates.length * this.options.column_width);
+            this.set_scroll_position();
+            this.render_viewport();
+        }
+
+        setup_tick_positions() {
+            // x of every date column (Month columns have the real month length)
+            this.tick_positions = [];
+            let tick_x = 0;
+            for (let date of this.dates) {
+                this.tick_positions.push(tick_x);
+                tick_x += this.view_is(MONTH)
+                    ? (date_utils.get_days_in_month(date) * this.options.column_width) / 30
+                    : this.options.column_width;
+            }
+        }
+
+        get_viewport() {
+            const { bar_height, padding, header_height, column_width, virtual_buffer } = this.options;
+            const row_height = bar_height + padding;
+            const top = this.container.scrollTop - header_height - padding / 2;
+            const height = this.container.clientHeight;
+            const left = this.container.scrollLeft;
+            const width = this.container.clientWidth;
+
+            let first_row = Math.max(0, Math.floor(top / row_height) - virtual_buffer);
+            // Start on an even row so the zebra striping (nth-child) does not flicker
+            first_row -= first_row % 2;
+            return {
+                first_row,
+                last_row: Math.min(
+                    this.tasks.length - 1,
+                    Math.ceil((top + height) / row_height) + virtual_buffer
+                ),
+                first_col: Math.max(0, Math.floor(left / column_width) - virtual_buffer),
+                last_col: Math.min(
+                    this.dates.length - 1,
+                    Math.ceil((left + width) / column_width) + virtual_buffer
+                ),
+            };
+        }
+
+        render_viewport(force = false) {
+            if (!this.virtual_layers) return;
+            const viewport = this.get_viewport();
+            const previous = this.viewport;
+            const rows_changed =
+                force ||
+                !previous ||
+                previous.first_row !== viewport.first_row ||
+                previous.last_row !== viewport.last_row;
+            const cols_changed =
+                force ||
+                !previous ||
+                previous.first_col !== viewport.first_col ||
+                previous.last_col !== viewport.last_col;
+            if (!rows_changed && !cols_changed) return;
+            this.viewport = viewport;
+
+            if (cols_changed) {
+                this.make_virtual_columns(viewport);
+            }
+            if (rows_changed) {
+                this.make_virtual_rows(viewport);
+                this.make_virtual_bars(viewport);
+                this.make_arrows();
+                this.map_arrows_on_bars();
+            }
+            this.trigger_event('viewport_change', [
+                viewport.first_row,
+                viewport.last_row,
+                this.tasks.length,
+            ]);
+        }
+
+        make_virtual_rows({ first_row, last_row }) {
+            const { rows, lines } = this.virtual_layers;
+            rows.innerHTML = '';
+            lines.innerHTML = '';
+            const row_width = this.dates.length * this.options.column_width;
+            const row_height = this.options.bar_height + this.options.padding;
+            for (let i = first_row; i <= last_row; i++) {
+                const row_y = this.options.header_height + this.options.padding / 2 + i * row_height;
+                createSVG('rect', {
+                    x: 0,
+                    y: row_y,
+                    width: row_width,
+                    height: row_height,
+                    class: 'grid-row',
+                    append_to: rows,
+                });
+                createSVG('line', {
+                    x1: 0,
+                    y1: row_y + row_height,
+                    x2: row_width,
+                    y2: row_y + row_height,
+                    class: 'row-line',
+                    append_to: lines,
+                });
+            }
+        }
+
+        make_virtual_columns({ first_col, last_col }) {
+            const ticks = this.virtual_layers.ticks;
+            ticks.innerHTML = '';
+            this.layers.date.innerHTML = '';
+            const tick_y = this.options.header_height + this.options.padding / 2;
+            const tick_height = (this.options.bar_height + this.options.padding) * this.tasks.length;
+            const grid_width = this.dates.length * this.options.column_width;
+
+            for (let i = first_col; i <= last_col; i++) {
+                const date = this.dates[i];
+                let tick_class = 'tick';
+                if (this.view_is(DAY) && date.getDate() === 1) {
+                    tick_class += ' thick';
+                }
+                if (this.view_is(WEEK) && date.getDate() >= 1 && date.getDate() < 8) {
+                    tick_class += ' thick';
+                }
+                if (this.view_is(MONTH) && date.getMonth() % 3 === 0) {
+                    tick_class += ' thick';
+                }
+                createSVG('path', {
+                    d: `M ${this.tick_positions[i]} ${tick_y} v ${tick_height}`,
+                    class: tick_class,
+                    append_to: ticks,
+                });
+
+                const info = this.get_date_info(date, i ? this.dates[i - 1] : null, i);
+                createSVG('text', {
+                    x: info.lower_x,
+                    y: info.lower_y,
+                    innerHTML: info.lower_text,
+                    class: 'lower-text',
+                    append_to: this.layers.date,
+                });
+                if (info.upper_text && info.upper_x < grid_width) {
+                    createSVG('text', {
+                        x: info.upper_x,
+                        y: info.upper_y,
+                        innerHTML: info.upper_text,
+                        class: 'upper-text',
+                        append_to: this.layers.date,
+                    });
+                }
+            }
+        }
+
+        make_virtual_bars({ first_row, last_row }) {
+            const visible = new Set();
+            for (let i = first_row; i <= last_row; i++) {
+                visible.add(String(this.tasks[i].id));
+            }
+            // Drop the bars scrolled out (except the one being dragged)
+            for (const [id, bar] of this.bar_map) {
+                if (!visible.has(id) && id !== String(this.bar_being_dragged)) {
+                    bar.group.remove();
+                    this.bar_map.delete(id);
+                }
+            }
+            for (let i = first_row; i <= last_row; i++) {
+                const task = this.tasks[i];
+                if (!this.bar_map.has(String(task.id))) {
+                    const bar = new Bar(this, task);
+                    this.layers.bar.appendChild(bar.group);
+                    this.bar_map.set(String(task.id), bar);
+                }
+            }
+            this.bars = [...this.bar_map.values()];
+        }
+
+        bind_virtual_scroll() {
+            let frame = null;
+            $.on(this.container, 'scroll', () => {
+                if (!this.options.virtualize || frame) return;
+                frame = requestAnimationFrame(() => {
+                    frame = null;
+                    // Keep the dragged bars stable until the drop
+                    if (!this.bar_being_dragged) {
+                        this.render_viewport();
+                    }
+                });
+            });
+        }
+
+        // IN-PLACE UPDATES
+
+        update_task(task_id, values) {
+            const task = this.get_task(task_id);
+            if (!task) return;
+            Object.assign(task, values);
+            this.prepare_task(task, task._index);
+            this.setup_dependencies();
+            if (task._start < this.gantt_start || task._end > this.gantt_end) {
+                // Out of the drawn date range: the frame must grow
+                this.rerender();
+                return;
+            }
+            const old_bar = this.get_bar(task.id);
+            if (!old_bar) return; // not materialized (virtualized, off-screen)
+            const bar = new Bar(this, task);
+            old_bar.group.replaceWith(bar.group);
+            if (this.options.virtualize) {
+                this.bar_map.set(String(task.id), bar);
+                this.bars = [...this.bar_map.values()];
+            } else {
+                this.bars[this.bars.indexOf(old_bar)] = bar;
+            }
+            this.refresh_arrows();
+        }
+
+        append_tasks(tasks) {
+            const offset = this.tasks.length;
+            tasks.forEach((task, i) => this.tasks.push(this.prepare_task(task, offset + i)));
+            this.setup_dependencies();
+            this.rerender();
+        }
+
+        remove_task(task_id) {
+            this.remove_tasks([task_id]);
+        }
+
+        remove_tasks(task_ids) {
+            const ids = new Set(task_ids.map(String));
+            const count = this.tasks.length;
+            this.tasks = this.tasks.filter((t) => !ids.has(String(t.id)));
+            if (this.tasks.length === count) return;
+            this.tasks.forEach((t, i) => (t._index = i));
+            this.setup_dependencies();
+            this.rerender();
+        }
+
+        rerender() {
+            // Full redraw keeping the scroll position; cheap when virtualized
+            const { scrollTop, scrollLeft } = this.container;
+            this.setup_dates();
+            this.render();
+            this.container.scrollTop = scrollTop;
+            this.container.scrollLeft = scrollLeft;
+            if (this.options.virtualize) {
+                this.render_viewport(true);
+            }
+        }
+
+        refresh_arrows() {
+            this.layers.arrow.innerHTML = '';
+            this.make_arrows();
+            this.map_arrows_on_bars();
+        }
+
+        // HIGHLIGHTING (e.g. critical path)
+
+        highlight_tasks(task_ids, class_name = 'highlight') {
+            this.highlight = { ids: new Set(task_ids.map(String)), class_name };
+            for (let bar of this.bars) {
+                bar.update_highlight();
+            }
+            this.refresh_arrows();
+        }
+
+        is_highlighted(task) {
+            return Boolean(this.highlight && this.highlight.ids.has(String(task.id)));
+        }
+
         setup_layers() {
             this.layers = {};
             const layers = ['grid', 'date', 'arrow', 'progress', 'bar', 'details'];
@@ -487,18 +790,20 @@ var Gantt = (function () {
 
         make_arrows() {
             this.arrows = [];
-            for (let task of this.tasks) {
+            const tasks = this.options.virtualize ? this.bars.map((bar) => bar.task) : this.tasks;
+            for (let task of tasks) {
                 let arrows = [];
-                if (task.dependencies) {
+                if (task.dependencies.length) {
                     arrows = task.dependencies
-                        .split(',')
                         .map((task_id) => {
-                            const dependency = this.get_task(task_id);
-                            if (!dependency) return;
+                            const from_bar = this.get_bar(task_id);
+                            const to_bar = this.get_bar(task.id);
+                            // Both ends must be materialized (virtualized mode)
+                            if (!from_bar || !to_bar) return;
                             const arrow = new Arrow(
                                 this,
-                                this.bars[dependency._index], // from_task
-                                this.bars[task._index] // to_task
+                                from_bar, // from_task
+                                to_bar // to_task
                             );
                             this.layers.arrow.appendChild(arrow.element);
                             return arrow;
@@ -594,9 +899,11 @@ var Gantt = (function () {
                 parent_bar_id = bar_wrapper.getAttribute('data-id');
                 const ids = [
                     parent_bar_id,
-                    ...this.get_all_dependent_tasks(parent_bar_id),
+                    ...(this.options.drag_dependents
+                        ? this.get_all_dependent_tasks(parent_bar_id)
+                        : []),
                 ];
-                bars = ids.map((id) => this.get_bar(id));
+                bars = ids.map((id) => this.get_bar(id)).filter(Boolean);
 
                 this.bar_being_dragged = parent_bar_id;
 
@@ -604,23 +911,33 @@ var Gantt = (function () {
                     const $bar = bar.group;
                     $bar.classList.add('active');
                     $bar.style.cursor = 'move';
+                    // remember the original geometry, moves are relative to it
+                    const rect = bar.bar_group.querySelector('.bar');
+                    bar.ox = +rect.getAttribute('x');
+                    bar.owidth = +rect.getAttribute('width');
                 });
             });
 
             $.on(this.svg, 'mousemove', (e) => {
                 if (!action_in_progress()) return;
-                const dx = e.offsetX - x_on_start;
+                const dx = this.get_snap_position(e.offsetX - x_on_start);
                 // const dy = e.offsetY - y_on_start; // unused
 
                 bars.forEach((bar) => {
                     const $bar = bar.group;
                     $bar.style.cursor = 'move';
                     if (is_resizing_left) {
-                        bar.update_bar_position({ x: dx, width: -dx });
+                        if (bar.task.id == parent_bar_id) {
+                            bar.update_bar_position({ x: bar.ox + dx, width: bar.owidth - dx });
+                        } else {
+                            bar.update_bar_position({ x: bar.ox + dx });
+                        }
                     } else if (is_resizing_right) {
-                        bar.update_bar_position({ width: dx });
+                        if (bar.task.id == parent_bar_id) {
+                            bar.update_bar_position({ width: bar.owidth + dx });
+                        }
                     } else if (is_dragging) {
-                        bar.update_bar_position({ x: dx });
+                        bar.update_bar_position({ x: bar.ox + dx });
                     }
                 });
             });
@@ -634,12 +951,21 @@ var Gantt = (function () {
                     if (this.bar_being_dragged) {
                         this.bar_being_dragged = null;
                         bars.forEach((bar) => {
-                            // save action
-                             const { task } = bar;
+                            // save action (only the bars that really moved)
+                            const { task } = bar;
+                            const { new_start_date, new_end_date } = bar.compute_start_end_date();
+                            if (
+                                +new_start_date === +task._start &&
+                                +new_end_date === +task._end
+                            ) {
+                                return;
+                            }
+                            task._start = new_start_date;
+                            task._end = new_end_date;
                             this.trigger_event('date_change', [
                                 task,
-                                task._start,
-                                task._end,
+                                new_start_date,
+                                new_end_date,
                             ]);
                         });
                     }
@@ -726,6 +1052,9 @@ var Gantt = (function () {
         }
 
         get_bar(id) {
+            if (this.options.virtualize && this.bar_map) {
+                return this.bar_map.get(String(id));
+            }
             return this.bars.find((bar) => {
                 return bar.task.id == id;
             });
@@ -768,6 +1097,7 @@ var Gantt = (function () {
 
         clear() {
             this.svg.innerHTML = '';
+            this.virtual_layers = null;
         }
     }
 
@@ -808,6 +1138,7 @@ var Gantt = (function () {
                 class: 'bar-wrapper ' + (this.task.custom_class || ''),
                 'data-id': this.task.id,
             });
+            this.update_highlight();
             this.bar_group = createSVG('g', {
                 class: 'bar-group',
                 append_to: this.group,
@@ -891,6 +1222,13 @@ var Gantt = (function () {
             });
         }
 
+        update_highlight() {
+            const { highlight } = this.gantt;
+            if (highlight) {
+                this.group.classList.toggle(highlight.class_name, this.gantt.is_highlighted(this.task));
+            }
+        }
+
         bind() {
             this.group.addEventListener('click', (e) => {
                  this.gantt.trigger_event('click', [this.task]);
@@ -899,18 +1237,13 @@ var Gantt = (function () {
         }
 
         update_bar_position({ x = null, width = null }) {
+            // x / width are absolute values (see ox / owidth set on mousedown)
             const bar = this.bar_group.querySelector('.bar');
-            if (x) {
-                // get all x values of parent task
-                const xs = this.task.dependencies.map((dep) => {
-                    return this.gantt.get_bar(dep).x;
-                });
-                // constraint
-                // todo
-                this.update_attr(bar, 'x', x);
+            if (x !== null) {
+                bar.setAttribute('x', x);
             }
-            if (width && width >= this.gantt.options.column_width) {
-                this.update_attr(bar, 'width', width);
+            if (width !== null && width >= this.gantt.options.column_width) {
+                bar.setAttribute('width', width);
             }
             this.update_label_position();
             this.update_handle_position();
@@ -918,6 +1251,22 @@ var Gantt = (function () {
             this.update_arrow_position();
         }
 
+        compute_start_end_date() {
+            const bar = this.bar_group.querySelector('.bar');
+            const { column_width, step } = this.gantt.options;
+            const new_start_date = date_utils.add(
+                this.gantt.gantt_start,
+                (+bar.getAttribute('x') / column_width) * step,
+                'hour'
+            );
+            const new_end_date = date_utils.add(
+                new_start_date,
+                (+bar.getAttribute('width') / column_width) * step,
+                'hour'
+            );
+            return { new_start_date, new_end_date };
+        }
+
         update_label_position_on_horizontal_scroll() {
              // implement logic to keep label visible
         }
@@ -987,12 +1336,13 @@ var Gantt = (function () {
         }
 
         calculate_path() {
+            // attributes are strings: convert before adding
             let start_x =
-                this.from_task.group.querySelector('.bar').getAttribute('x') +
+                +this.from_task.group.querySelector('.bar').getAttribute('x') +
                 this.from_task.group.querySelector('.bar').getAttribute('width') / 2;
 
             const condition = () =>
-                this.to_task.group.querySelector('.bar').getAttribute('x') +
+                +this.to_task.group.querySelector('.bar').getAttribute('x') +
                 this.to_task.group.querySelector('.bar').getAttribute('width') / 2;
 
             let start_y =
@@ -1026,20 +1376,29 @@ var Gantt = (function () {
                 l -5 5`;
 
             if (
-                this.to_task.group.querySelector('.bar').getAttribute('x') <
-                this.from_task.group.querySelector('.bar').getAttribute('x') +
-                    this.from_task.group.querySelector('.bar').getAttribute('width')
+                +this.to_task.group.querySelector('.bar').getAttribute('x') <
+                +this.from_task.group.querySelector('.bar').getAttribute('x') +
+                    +this.from_task.group.querySelector('.bar').getAttribute('width')
             ) {
                  // handle backward arrows
             }
         }
 
         draw() {
+            const { highlight } = this.gantt;
             this.element = createSVG('path', {
                 d: this.path,
                 'data-from': this.from_task.task.id,
                 'data-to': this.to_task.task.id,
             });
+            // arrow between two highlighted tasks (e.g. on the critical path)
+            if (
+                highlight &&
+                this.gantt.is_highlighted(this.from_task.task) &&
+                this.gantt.is_highlighted(this.to_task.task)
+            ) {
+                this.element.classList.add(highlight.class_name);
+            }
         }
 
         update() {
@@ -3,11 +3,23 @@
 import { Component, onMounted, useState, useRef, onWillUnmount } from "@odoo/owl";
 import { standardActionServiceProps } from "@web/webclient/actions/action_service";
 import { useService } from "@web/core/utils/hooks";
+import { debounce } from "@web/core/utils/timing";
 import { ganttService } from "../services/gantt_data_service";
+import { GanttWriteQueue } from "../services/gantt_write_queue";
 const { DateTime } = luxon;
 // Frappe Gantt is loaded globally via assets_backend, so we access it via window or directly if exposed.
 // Since we manually included the file, it assigns to 'Gantt' variable.
 
+// Above this many tasks, only the rows / columns in the viewport are drawn.
+const VIRTUALIZE_THRESHOLD = 200;
+// Fetch the next page when the viewport gets this close to the last loaded row.
+const LOAD_AHEAD_ROWS = 50;
+// Above this many changes, a revalidated cache is redrawn instead of patched.
+const MAX_IN_PLACE_CHANGES = 200;
+// Bus: task diffs published by the server for the project (see ProjectTask._gantt_notify).
+const BUS_CHANNEL_PREFIX = "project_gantt_dashboard_project_";
+const BUS_NOTIFICATION = "project_gantt_dashboard/tasks_changed";
+
 export class GanttDashboard extends Component {
     static template = "project_gantt_dashboard.GanttDashboard";
     static props = { ...standardActionServiceProps };
@@ -15,24 +27,67 @@ export class GanttDashboard extends Component {
     setup() {
         this.actionService = useService("action");
         this.notification = useService("notification");
+        this.busService = useService("bus_service");
 
         this.state = useState({
             projectId: null,
             projects: [],
             loading: false,
             viewMode: 'Week', // Default view mode
+            // Visible window & filters, applied server-side
+            dateFrom: DateTime.now().minus({ months: 1 }).startOf('month').toISODate(),
+            dateTo: DateTime.now().plus({ months: 3 }).endOf('month').toISODate(),
+            stageId: "",
+            userId: "",
+            stages: [],
+            users: [],
+            // Pagination
+            loadedCount: 0,
+            total: 0,
+            nextCursor: false,
+            // Date changes waiting in the write queue
+            pendingWrites: 0,
+            // Cached task set shown while fetching the changes
+            revalidating: false,
+            // Scheduling: shift successors on save, highlight the critical path
+            autoSchedule: true,
+            showCritical: true,
+            criticalCount: 0,
         });
+        this.schedule = null;
+        this.refreshToken = 0;
+        this.tasks = [];
         
         this.ganttContainer = useRef("gantt-container");
         this.ganttInstance = null;
-        this.isUpdating = false; // Flag to prevent rapid-fire updates
+        // Drag & drop changes are merged per task and saved in batches
+        this.writeQueue = new GanttWriteQueue(
+            (results, shifted) => this.onWriteResults(results, shifted),
+            { getWriteOptions: () => ({ autoSchedule: this.state.autoSchedule }) }
+        );
+
+        // Live updates: bars changed by anyone are patched in place
+        this.busChannel = null;
+        this.staleTaskIds = new Set();
+        this.reloadStaleTasks = debounce(() => {
+            const taskIds = [...this.staleTaskIds];
+            this.staleTaskIds.clear();
+            if (taskIds.length) {
+                this.reloadTasks(taskIds);
+            }
+        }, 300);
+        this.onBusTasksChanged = this.onBusTasksChanged.bind(this);
+        this.busService.subscribe(BUS_NOTIFICATION, this.onBusTasksChanged);
 
         onMounted(async () => {
             await this.loadProjects();
         });
 
         onWillUnmount(() => {
-            // Cleanup if necessary
+            // Do not lose the changes still waiting for the debounce
+            this.writeQueue.flush();
+            this.busService.unsubscribe(BUS_NOTIFICATION, this.onBusTasksChanged);
+            this._listenProject(null);
             this.ganttInstance = null;
         });
     }
@@ -51,6 +106,17 @@ export class GanttDashboard extends Component {
 
     async onProjectChange(ev) {
         this.state.projectId = ev.target.value;
+        // Stages & assignees differ per project
+        this.state.stageId = "";
+        this.state.userId = "";
+        await this.refreshGantt();
+    }
+
+    async onFilterChange() {
+        if (this.state.dateFrom && this.state.dateTo && this.state.dateFrom > this.state.dateTo) {
+            this.notification.add("The window start must be before its end.", { type: "warning" });
+            return;
+        }
         await this.refreshGantt();
     }
 
@@ -61,29 +127,319 @@ export class GanttDashboard extends Component {
         }
     }
 
+    _getFetchOptions(cursor = false) {
+        return {
+            dateFrom: this.state.dateFrom,
+            dateTo: this.state.dateTo,
+            stageIds: this.state.stageId ? [parseInt(this.state.stageId)] : [],
+            userIds: this.state.userId ? [parseInt(this.state.userId)] : [],
+            cursor,
+        };
+    }
+
+    _listenProject(projectId) {
+        const channel = projectId ? `${BUS_CHANNEL_PREFIX}${projectId}` : null;
+        if (channel === this.busChannel) return;
+        if (this.busChannel) {
+            this.busService.deleteChannel(this.busChannel);
+        }
+        if (channel) {
+            this.busService.addChannel(channel);
+        }
+        this.busChannel = channel;
+    }
+
+    /**
+     * Task diffs of the current project published over the bus.
+     * Names / stages / assignees are patched directly from the diff; date changes
+     * (virtual dates, timezone, window) and filtered fields re-read only these rows.
+     */
+    onBusTasksChanged(payload) {
+        if (String(payload.project_id) !== String(this.state.projectId)) return;
+        if (!this.ganttInstance) {
+            // Empty chart: a task may have entered the window
+            payload.tasks.forEach(diff => this.staleTaskIds.add(String(diff.id)));
+            this.reloadStaleTasks();
+            return;
+        }
+        for (const diff of payload.tasks) {
+            const taskId = String(diff.id);
+            const loaded = this.tasks.find(task => task.id === taskId);
+            // Our own write, already applied
+            if (loaded && loaded.write_date === diff.write_date) continue;
+
+            const datesChanged = 'x_date_start' in diff || 'date_deadline' in diff;
+            const filtered = ('stage_id' in diff && this.state.stageId)
+                || ('user_ids' in diff && this.state.userId);
+            if (!loaded || datesChanged || filtered) {
+                this.staleTaskIds.add(taskId);
+                continue;
+            }
+            const values = { write_date: diff.write_date };
+            if ('name' in diff) {
+                values.name = diff.name;
+            }
+            if ('stage_id' in diff) {
+                values.stage_id = diff.stage_id[0];
+                values.stage_name = diff.stage_id[1];
+            }
+            if ('user_ids' in diff) {
+                values.user_ids = diff.user_ids.map(user => user[0]);
+                values.user_names = diff.user_ids.map(user => user[1]).join(", ");
+            }
+            this.ganttInstance.update_task(taskId, values);
+        }
+        if (this.staleTaskIds.size) {
+            this.reloadStaleTasks();
+        }
+    }
+
     async refreshGantt() {
         if (!this.state.projectId) return;
+        this._listenProject(this.state.projectId);
+        // A newer refresh (project / filter change) makes this one obsolete
+        const token = ++this.refreshToken;
+        const projectId = this.state.projectId;
+        const options = this._getFetchOptions();
+
+        // Stale-while-revalidate: show the cached task set at once, then merge the changes
+        const cached = await ganttService.getCachedTasks(projectId, options);
+        if (token !== this.refreshToken) return;
+        if (cached) {
+            this._applyTaskSet(cached);
+            this.renderGantt(this.tasks);
+            this.state.revalidating = true;
+            const fresh = await ganttService.revalidateTasks(projectId, options);
+            if (token !== this.refreshToken) return;
+            this.state.revalidating = false;
+            if (fresh.reset) {
+                this._applyTaskSet(fresh);
+                this.renderGantt(this.tasks);
+            } else {
+                this._mergeTaskChanges(fresh);
+            }
+            await this.loadSchedule();
+            return;
+        }
+
+        this.state.loading = true;
+        const result = await ganttService.fetchTasks(projectId, options);
+        if (token !== this.refreshToken) return;
+        this.state.loading = false;
+
+        this._applyTaskSet(result);
+        this.renderGantt(this.tasks);
+        await this.loadSchedule();
+    }
+
+    _applyTaskSet(result) {
+        // Facets only come with the first page
+        if (result.facets) {
+            this.state.stages = result.facets.stages;
+            this.state.users = result.facets.users;
+        }
+        this.tasks = result.tasks;
+        this.state.loadedCount = this.tasks.length;
+        this.state.total = result.total;
+        this.state.nextCursor = result.nextCursor;
+    }
+
+    /**
+     * Merge the delta of a revalidated cache into the drawn chart (bars patched in place).
+     */
+    _mergeTaskChanges(fresh) {
+        if (fresh.facets) {
+            this.state.stages = fresh.facets.stages;
+            this.state.users = fresh.facets.users;
+        }
+        this.state.total = fresh.total;
+        if (!fresh.changed.length && !fresh.removedIds.length) return;
+        if (!this.ganttInstance || fresh.changed.length + fresh.removedIds.length > MAX_IN_PLACE_CHANGES) {
+            this._applyTaskSet(fresh);
+            this.renderGantt(this.tasks);
+            return;
+        }
+        const removed = new Set(fresh.removedIds);
+        this.tasks = this.tasks.filter(task => !removed.has(task.id));
+        if (!this.tasks.length) {
+            this._applyTaskSet(fresh);
+            this.renderGantt(this.tasks);
+            return;
+        }
+        this.ganttInstance.remove_tasks(fresh.removedIds);
+        const added = [];
+        for (const task of fresh.changed) {
+            if (this.tasks.some(loaded => loaded.id === task.id)) {
+                this.ganttInstance.update_task(task.id, task);
+            } else {
+                added.push(task);
+            }
+        }
+        if (added.length) {
+            this.tasks = this.tasks.concat(added);
+            this.ganttInstance.append_tasks(added);
+        }
+        this.state.loadedCount = this.tasks.length;
+    }
+
+    /**
+     * Critical path of the whole project (not only the loaded page).
+     */
+    async loadSchedule() {
+        if (!this.state.projectId) return;
+        this.schedule = await ganttService.fetchSchedule(this.state.projectId);
+        this.state.criticalCount = this.schedule.critical.length;
+        if (this.schedule.cycles.length) {
+            this.notification.add(
+                `${this.schedule.cycles.length} task(s) are part of a dependency cycle and cannot be scheduled.`,
+                { type: "warning" }
+            );
+        }
+        this.applyCriticalPath();
+    }
+
+    applyCriticalPath() {
+        if (!this.ganttInstance || !this.schedule) return;
+        this.ganttInstance.highlight_tasks(
+            this.state.showCritical ? this.schedule.critical : [],
+            'critical'
+        );
+    }
+
+    onToggleCritical() {
+        this.state.showCritical = !this.state.showCritical;
+        this.applyCriticalPath();
+    }
+
+    onToggleAutoSchedule() {
+        this.state.autoSchedule = !this.state.autoSchedule;
+    }
+
+    async loadMore() {
+        if (!this.state.nextCursor || this.state.loading) return;
 
         this.state.loading = true;
-        const tasks = await ganttService.fetchTasks(this.state.projectId);
+        const result = await ganttService.fetchTasks(
+            this.state.projectId, this._getFetchOptions(this.state.nextCursor)
+        );
         this.state.loading = false;
 
-        this.renderGantt(tasks);
+        this.tasks = this.tasks.concat(result.tasks);
+        this.state.loadedCount = this.tasks.length;
+        this.state.total = result.total;
+        this.state.nextCursor = result.nextCursor;
+
+        if (this.ganttInstance) {
+            // Only the new rows are added, the drawn bars are kept
+            this.ganttInstance.append_tasks(result.tasks);
+        } else {
+            this.renderGantt(this.tasks);
+        }
+    }
+
+    /**
+     * Refresh some bars in place (after an edit) instead of rebuilding the chart.
+     * Tasks that no longer match the window / filters are removed.
+     */
+    async reloadTasks(taskIds) {
+        if (!this.ganttInstance) {
+            await this.refreshGantt();
+            return;
+        }
+        const result = await ganttService.fetchTasks(this.state.projectId, {
+            ...this._getFetchOptions(),
+            taskIds,
+        });
+        const rows = new Map(result.tasks.map(task => [task.id, task]));
+        for (const taskId of taskIds.map(String)) {
+            const row = rows.get(taskId);
+            const loaded = this.tasks.find(task => task.id === taskId);
+            if (row && loaded) {
+                this.ganttInstance.update_task(taskId, row);
+            } else if (row && !loaded) {
+                // Entered the window / filters: add it unless a later page will bring it
+                if (!this.state.nextCursor || parseInt(taskId) <= this.state.nextCursor) {
+                    this.tasks.push(row);
+                    this.ganttInstance.append_tasks([row]);
+                }
+            } else if (!row && loaded) {
+                this.tasks = this.tasks.filter(task => task !== loaded);
+                if (!this.tasks.length) {
+                    this.renderGantt(this.tasks);
+                    break;
+                }
+                this.ganttInstance.remove_task(taskId);
+            }
+        }
+        this.state.loadedCount = this.tasks.length;
+        this.state.total = result.total;
+    }
+
+    /**
+     * Per-task outcome of a write queue flush: only the bars that failed are rolled back.
+     */
+    onWriteResults(results, shifted = []) {
+        this.state.pendingWrites = this.writeQueue.size;
+        // Successors moved by auto-scheduling
+        for (const task of shifted) {
+            if (this.ganttInstance && this.tasks.some(loaded => loaded.id === task.id)) {
+                this.ganttInstance.update_task(task.id, task);
+            }
+        }
+        if (shifted.length) {
+            this.notification.add(`${shifted.length} dependent task(s) rescheduled`, { type: "info" });
+        }
+        let saved = 0;
+        const failed = [];
+        for (const result of results) {
+            if (result.status === 'ok') {
+                saved++;
+                // Fresh write_date (and virtual flag) from the server
+                if (this.ganttInstance && result.task) {
+                    this.ganttInstance.update_task(result.id, result.task);
+                }
+                continue;
+            }
+            failed.push(result);
+            if (result.status === 'missing') {
+                this.tasks = this.tasks.filter(task => task.id !== result.id);
+                if (this.ganttInstance && this.tasks.length) {
+                    this.ganttInstance.remove_task(result.id);
+                }
+            } else if (this.ganttInstance && result.task) {
+                // Roll back to the stored dates (conflict: those of the other user)
+                this.ganttInstance.update_task(result.id, result.task);
+            }
+        }
+        if (saved) {
+            this.notification.add(`${saved} task(s) updated successfully`, { type: "success" });
+            // Moved tasks may change the critical path
+            this.loadSchedule();
+        }
+        for (const result of failed) {
+            const task = this.tasks.find(task => task.id === result.id);
+            this.notification.add(result.message || "Update failed! Check permissions or date constraints.", {
+                title: task ? task.name : undefined,
+                type: result.status === 'conflict' ? "warning" : "danger",
+                sticky: result.status !== 'conflict',
+            });
+        }
+        // Failures without a server row (network error...): reload those bars
+        const toReload = failed.filter(result => !result.task && result.status !== 'missing').map(result => result.id);
+        if (toReload.length) {
+            this.reloadTasks(toReload);
+        }
     }
 
     async openTaskForm(taskId) {
         try {
+            // No reload on close: the changes come back over the bus (onBusTasksChanged)
             await this.actionService.doAction({
                 type: 'ir.actions.act_window',
                 res_model: 'project.task',
                 res_id: parseInt(taskId),
                 views: [[false, 'form']],
                 target: 'new', // Open in Dialog/Popup
-            }, {
-                onClose: async () => {
-                    // Reload Gantt data when popup closes to reflect changes
-                    await this.refreshGantt();
-                }
             });
         } catch (error) {
             this.notification.add("Unable to open task. You might not have access.", {
@@ -106,7 +462,8 @@ export class GanttDashboard extends Component {
         container.innerHTML = "";
 
         if (tasks.length === 0) {
-            container.innerHTML = `<div class="text-center text-muted mt-5"><h4>No tasks found for this project.</h4></div>`;
+            container.innerHTML = `<div class="text-center text-muted mt-5"><h4>No tasks found in this window.</h4></div>`;
+            this.ganttInstance = null;
             return;
         }
 
@@ -125,35 +482,24 @@ export class GanttDashboard extends Component {
                 date_format: 'YYYY-MM-DD',
                 popup_trigger: 'click',
                 language: 'en',
-                
+                virtualize: this.state.total > VIRTUALIZE_THRESHOLD,
+                // Successors are shifted server-side (auto-schedule) only when needed
+                drag_dependents: false,
+
                 // Event Handlers
                 on_click: (task) => {
                     this.openTaskForm(task.id);
                 },
                 
-                on_date_change: async (task, start, end) => {
-                    if (this.isUpdating) return;
-                    this.isUpdating = true;
-
+                on_date_change: (task, start, end) => {
                     // Normalize dates to YYYY-MM-DD for Odoo backend
                     const startDate = DateTime.fromJSDate(start).toISODate();
                     const endDate = DateTime.fromJSDate(end).toISODate();
 
-                    const success = await ganttService.updateTaskDates(task.id, startDate, endDate);
-
-                    if (success) {
-                        this.notification.add("Task updated successfully", { type: "success" });
-                        // Optimistic UI: Do not refresh, keep the bar where user dropped it
-                    } else {
-                        this.notification.add("Update failed! Check permissions or date constraints.", { 
-                            type: "danger", 
-                            sticky: true 
-                        });
-                        // Revert: Refresh to snap bar back to original position
-                        await this.refreshGantt();
-                    }
-                    
-                    this.isUpdating = false;
+                    // Optimistic UI: keep the bar where the user dropped it, the queue
+                    // saves it (merged with further moves of the same task) shortly after
+                    this.writeQueue.push(task.id, startDate, endDate, task.write_date);
+                    this.state.pendingWrites = this.writeQueue.size;
                 },
                 
                 on_progress_change: (task, progress) => {
@@ -161,6 +507,12 @@ export class GanttDashboard extends Component {
                 },
                 on_view_change: (mode) => {
                     // View mode changed
+                },
+                on_viewport_change: (firstRow, lastRow, rowCount) => {
+                    // Infinite scroll: load the next page before reaching the end
+                    if (this.state.nextCursor && lastRow >= rowCount - LOAD_AHEAD_ROWS) {
+                        this.loadMore();
+                    }
                 }
             });
         } catch (error) {
@@ -0,0 +1,131 @@
+/** @odoo-module **/
+
+import { session } from "@web/session";
+import { user } from "@web/core/user";
+
+const DB_VERSION = 1;
+const STORE = "task_sets";
+
+/**
+ * Size-bounded LRU cache of Gantt task sets, in memory and persisted in IndexedDB
+ * (so a reload of the page still starts from cached data).
+ *
+ * Entries are plain server rows (never the objects mutated by the Gantt library):
+ * {key, projectId, rows, total, nextCursor, facets, watermark, day, accessed}.
+ * The least recently used entries are evicted beyond `maxEntries` entries or
+ * `maxTasks` rows in total. IndexedDB is optional: when it is unavailable
+ * (private browsing, quota...) the cache simply stays in memory.
+ */
+export class GanttCache {
+    constructor({ maxEntries = 10, maxTasks = 20000 } = {}) {
+        this.maxEntries = maxEntries;
+        this.maxTasks = maxTasks;
+        this.memory = new Map(); // key -> entry, in LRU order (oldest first)
+        this._db = null;
+    }
+
+    /**
+     * One database per Odoo database and user: cached rows respect the access rights.
+     */
+    get dbName() {
+        return `project_gantt_dashboard_${session.db || ""}_${user.userId}`;
+    }
+
+    _openDb() {
+        if (!this._db) {
+            this._db = new Promise((resolve) => {
+                if (!window.indexedDB) {
+                    resolve(null);
+                    return;
+                }
+                const request = window.indexedDB.open(this.dbName, DB_VERSION);
+                request.onupgradeneeded = () => {
+                    const store = request.result.createObjectStore(STORE, { keyPath: "key" });
+                    store.createIndex("accessed", "accessed");
+                };
+                request.onsuccess = () => resolve(request.result);
+                request.onerror = () => resolve(null);
+                request.onblocked = () => resolve(null);
+            });
+        }
+        return this._db;
+    }
+
+    async _transaction(mode, callback) {
+        const db = await this._openDb();
+        if (!db) return undefined;
+        return new Promise((resolve) => {
+            try {
+                const tx = db.transaction(STORE, mode);
+                const result = callback(tx.objectStore(STORE));
+                tx.oncomplete = () => resolve(result && "result" in result ? result.result : undefined);
+                tx.onerror = () => resolve(undefined);
+                tx.onabort = () => resolve(undefined);
+            } catch (error) {
+                console.warn("GanttCache: IndexedDB unavailable", error);
+                resolve(undefined);
+            }
+        });
+    }
+
+    /**
+     * @param {string} key
+     * @returns {Promise<Object|null>} The entry (most recently used from now on)
+     */
+    async get(key) {
+        let entry = this.memory.get(key);
+        if (!entry) {
+            entry = await this._transaction("readonly", (store) => store.get(key));
+            if (!entry) return null;
+        }
+        this._touch(entry);
+        return entry;
+    }
+
+    /**
+     * Store (or replace) an entry, then evict the least recently used ones.
+     * @param {Object} entry Must have a `key`
+     */
+    async set(entry) {
+        this._touch(entry);
+        const evicted = this._evict();
+        await this._transaction("readwrite", (store) => {
+            store.put(entry);
+            for (const key of evicted) {
+                store.delete(key);
+            }
+        });
+        await this._evictPersisted();
+    }
+
+    _touch(entry) {
+        entry.accessed = Date.now();
+        this.memory.delete(entry.key);
+        this.memory.set(entry.key, entry);
+    }
+
+    _evict() {
+        const evicted = [];
+        let tasks = 0;
+        for (const entry of this.memory.values()) {
+            tasks += entry.rows.length;
+        }
+        for (const [key, entry] of this.memory) {
+            // Never evict the entry just used (last one), even if alone over the limit
+            if (this.memory.size <= 1) break;
+            if (this.memory.size <= this.maxEntries && tasks <= this.maxTasks) break;
+            this.memory.delete(key);
+            tasks -= entry.rows.length;
+            evicted.push(key);
+        }
+        return evicted;
+    }
+
+    async _evictPersisted() {
+        // IndexedDB keeps entries the memory never loaded: bound it the same way (by entries)
+        const keys = await this._transaction("readonly", (store) => store.index("accessed").getAllKeys());
+        if (!keys || keys.length <= this.maxEntries) return;
+        const evicted = keys.slice(0, keys.length - this.maxEntries);
+        await this._transaction("readwrite", (store) => evicted.forEach(key => store.delete(key)));
+    }
+}
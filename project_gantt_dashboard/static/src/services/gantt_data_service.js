@@ -1,14 +1,31 @@
 /** @odoo-module **/
 
 import { rpc } from "@web/core/network/rpc";
+import { GanttCache } from "./gantt_cache";
 const { DateTime } = luxon;
 
 export class GanttDataService {
+    constructor() {
+        // Task sets per project & filters, shown instantly when switching back (stale-while-revalidate)
+        this.cache = new GanttCache();
+        this.projects = null;
+    }
+
     /**
      * Fetch all active projects for the dropdown selector.
+     * The list is kept in memory: later calls return it at once and refresh it
+     * in the background for the next one.
      * @returns {Promise<Array>} List of projects [{id, name}]
      */
     async fetchProjects() {
+        if (this.projects) {
+            this._loadProjects();
+            return this.projects;
+        }
+        return this._loadProjects();
+    }
+
+    async _loadProjects() {
         const domain = []; // Can be extended to filter by user access
         const fields = ['id', 'name'];
         
@@ -19,119 +36,278 @@ export class GanttDataService {
                 args: [domain, fields],
                 kwargs: {},
             });
+            this.projects = projects;
             return projects;
         } catch (error) {
             console.error("GanttDataService: Error fetching projects", error);
-            return [];
+            return this.projects || [];
         }
     }
 
     /**
-     * Fetch tasks for a specific project and prepare them for Gantt visualization.
-     * @param {number} projectId 
-     * @returns {Promise<Array>} List of processed task objects
+     * Fetch one page of tasks overlapping the visible window, already filtered,
+     * resolved and dated by the server (see /project_gantt_dashboard/tasks).
+     * @param {number} projectId
+     * @param {Object} [options]
+     * @param {string} [options.dateFrom] ISO Date string (YYYY-MM-DD), start of the window
+     * @param {string} [options.dateTo] ISO Date string (YYYY-MM-DD), end of the window
+     * @param {number[]} [options.stageIds] Only tasks in these stages
+     * @param {number[]} [options.userIds] Only tasks assigned to these users
+     * @param {number|false} [options.cursor] next_cursor of the previous page
+     * @param {number} [options.limit] Page size (capped server-side)
+     * @param {Array} [options.taskIds] Only these tasks (in-place refresh of single bars)
+     * @returns {Promise<Object>} {tasks, total, nextCursor, facets}
+     * The rows are also kept in the client-side cache (see revalidateTasks).
      */
-    async fetchTasks(projectId) {
-        const domain = [['project_id', '=', parseInt(projectId)]];
-        const fields = ['id', 'name', 'x_date_start', 'date_deadline', 'stage_id', 'user_ids'];
-        
+    async fetchTasks(projectId, options = {}) {
+        const { cursor, limit, taskIds } = options;
         try {
-            const tasks = await rpc("/web/dataset/call_kw/project.task/search_read", {
-                model: 'project.task',
-                method: 'search_read',
-                args: [domain, fields],
-                kwargs: {},
+            const result = await rpc("/project_gantt_dashboard/tasks", {
+                ...this._filterParams(projectId, options),
+                cursor: cursor || null,
+                limit: limit || null,
+                task_ids: taskIds && taskIds.length ? taskIds.map(id => parseInt(id)) : null,
             });
-            
-            // Validate response type
-            if (!Array.isArray(tasks)) {
-                console.warn("GanttDataService: RPC returned non-array", tasks);
-                return [];
-            }
-            
-            return this._processTasks(tasks);
+            await this._cacheTasks(projectId, options, result);
+            return {
+                tasks: this._processTasks(result.tasks || []),
+                total: result.total || 0,
+                nextCursor: result.next_cursor || false,
+                facets: result.facets || null,
+            };
         } catch (error) {
             console.error("GanttDataService: Error fetching tasks", error);
-            return [];
+            return { tasks: [], total: 0, nextCursor: false, facets: null };
         }
     }
 
     /**
-     * Update task start and end dates in the backend.
-     * @param {number|string} taskId 
-     * @param {string} start ISO Date string (YYYY-MM-DD)
-     * @param {string} end ISO Date string (YYYY-MM-DD)
-     * @returns {Promise<boolean>} True if successful, False otherwise.
+     * Task set cached for these project & filters, to display before any RPC.
+     * @returns {Promise<Object|null>} {tasks, total, nextCursor, facets} or null
+     */
+    async getCachedTasks(projectId, options = {}) {
+        const entry = await this.cache.get(this._cacheKey(projectId, options));
+        if (!entry) return null;
+        return {
+            tasks: this._processTasks(entry.rows),
+            total: entry.total,
+            nextCursor: entry.nextCursor,
+            facets: entry.facets,
+        };
+    }
+
+    /**
+     * Bring a cached task set up to date: only the tasks written since its watermark are
+     * fetched and merged. Falls back to a full fetch of the first page (reset: true)
+     * when there is no usable cache or too much changed.
+     * @returns {Promise<Object>} {tasks, changed, removedIds, total, nextCursor, facets, reset}
      */
-    async updateTaskDates(taskId, start, end) {
+    async revalidateTasks(projectId, options = {}) {
+        const key = this._cacheKey(projectId, options);
+        const entry = await this.cache.get(key);
+        // Virtual dates (tasks without dates) depend on the day: a cache of yesterday is reloaded
+        if (!entry || !entry.watermark || entry.day !== DateTime.now().toISODate()) {
+            return { ...(await this.fetchTasks(projectId, options)), reset: true };
+        }
+        let delta;
         try {
-            await rpc("/web/dataset/call_kw/project.task/write", {
-                model: 'project.task',
-                method: 'write',
-                args: [[parseInt(taskId)], {
-                    'x_date_start': start,
-                    'date_deadline': end,
-                }],
-                kwargs: {},
+            delta = await rpc("/project_gantt_dashboard/tasks/changes", {
+                ...this._filterParams(projectId, options),
+                since: entry.watermark,
+                loaded_until: entry.nextCursor || null,
             });
-            return true;
         } catch (error) {
-            // Error handling: Logic constraints or Access Rights will be caught here
-            console.error("GanttDataService: Error updating task", error);
-            return false;
+            console.error("GanttDataService: Error revalidating tasks", error);
+            delta = { reset: true };
         }
+        if (delta.reset) {
+            return { ...(await this.fetchTasks(projectId, options)), reset: true };
+        }
+
+        const cachedRows = new Map(entry.rows.map(row => [row.id, row]));
+        const changedRows = new Map(delta.tasks.map(row => [row.id, row]));
+        const ids = new Set(delta.ids);
+        entry.rows = delta.ids.map(id => changedRows.get(id) || cachedRows.get(id)).filter(Boolean);
+        entry.total = delta.total;
+        entry.facets = delta.facets;
+        entry.watermark = delta.watermark;
+        await this.cache.set(entry);
+
+        return {
+            tasks: this._processTasks(entry.rows),
+            changed: this._processTasks(delta.tasks),
+            removedIds: [...cachedRows.keys()].filter(id => !ids.has(id)).map(String),
+            total: entry.total,
+            nextCursor: entry.nextCursor,
+            facets: entry.facets,
+            reset: false,
+        };
+    }
+
+    _filterParams(projectId, { dateFrom, dateTo, stageIds, userIds } = {}) {
+        return {
+            project_id: parseInt(projectId),
+            date_from: dateFrom || null,
+            date_to: dateTo || null,
+            stage_ids: stageIds && stageIds.length ? stageIds : null,
+            user_ids: userIds && userIds.length ? userIds : null,
+        };
+    }
+
+    _cacheKey(projectId, options) {
+        const params = this._filterParams(projectId, options);
+        return JSON.stringify([
+            params.project_id,
+            params.date_from,
+            params.date_to,
+            [...(params.stage_ids || [])].sort(),
+            [...(params.user_ids || [])].sort(),
+        ]);
     }
 
     /**
-     * INTERNAL: Process raw Odoo data into Gantt-friendly format.
-     * Handles missing dates logic (Soft Visualization).
+     * Keep the cache in line with what was just fetched (raw server rows).
      */
-    _processTasks(tasks) {
-        const today = DateTime.now();
-
-        return tasks.map(task => {
-            let startObj = task.x_date_start ? DateTime.fromISO(task.x_date_start) : null;
-            let endObj = task.date_deadline ? DateTime.fromISO(task.date_deadline) : null;
-            let isVirtual = false;
-
-            // Handle invalid/null inputs explicitly
-            if (startObj && !startObj.isValid) startObj = null;
-            if (endObj && !endObj.isValid) endObj = null;
-
-            // LOGIC: Handle missing dates
-            if (!startObj && !endObj) {
-                // Case 3: Missing both -> Assume Today + 1 day
-                startObj = today;
-                endObj = today.plus({ days: 1 });
-                isVirtual = true;
-            } else if (!startObj && endObj) {
-                // Case 1: Missing Start -> Assume End - 1 day
-                startObj = endObj.minus({ days: 1 });
-                isVirtual = true;
-            } else if (startObj && !endObj) {
-                // Case 2: Missing End -> Assume Start + 1 day
-                endObj = startObj.plus({ days: 1 });
-                isVirtual = true;
+    async _cacheTasks(projectId, options, result) {
+        const key = this._cacheKey(projectId, options);
+        const rows = result.tasks || [];
+        if (options.taskIds && options.taskIds.length) {
+            // Single rows re-read: patch them, drop the ones no longer matching
+            const entry = await this.cache.get(key);
+            if (!entry) return;
+            const returned = new Map(rows.map(row => [row.id, row]));
+            const requested = new Set(options.taskIds.map(id => parseInt(id)));
+            entry.rows = entry.rows
+                .filter(row => !requested.has(row.id) || returned.has(row.id))
+                .map(row => returned.get(row.id) || row);
+            const known = new Set(entry.rows.map(row => row.id));
+            entry.rows.push(...rows.filter(row => !known.has(row.id)
+                && (!entry.nextCursor || row.id <= entry.nextCursor)));
+            entry.total = result.total;
+            await this.cache.set(entry);
+        } else if (!options.cursor) {
+            await this.cache.set({
+                key,
+                projectId: parseInt(projectId),
+                rows,
+                total: result.total || 0,
+                nextCursor: result.next_cursor || false,
+                facets: result.facets || null,
+                watermark: result.watermark || false,
+                day: DateTime.now().toISODate(),
+            });
+        } else {
+            // Next page: extend the cached pages if they end right before it
+            const entry = await this.cache.get(key);
+            if (!entry || entry.nextCursor !== options.cursor) return;
+            entry.rows = entry.rows.concat(rows);
+            entry.nextCursor = result.next_cursor || false;
+            entry.total = result.total;
+            await this.cache.set(entry);
+        }
+    }
+
+    /**
+     * Replace cached rows of tasks written by this client (write queue results).
+     */
+    async _patchCachedRows(rows) {
+        if (!rows.length) return;
+        const byId = new Map(rows.map(row => [row.id, row]));
+        // Snapshot: cache.set() moves the entry to the end of the LRU map
+        for (const entry of [...this.cache.memory.values()]) {
+            if (entry.rows.some(row => byId.has(row.id))) {
+                entry.rows = entry.rows.map(row => byId.get(row.id) || row);
+                await this.cache.set(entry);
             }
+        }
+    }
 
-            // Final safeguard: Ensure we have valid strings
-            // If something went wrong, default to today
-            const startStr = startObj ? startObj.toISODate() : today.toISODate();
-            const endStr = endObj ? endObj.toISODate() : today.plus({ days: 1 }).toISODate();
+    /**
+     * Write a batch of task date changes in one call (see GanttWriteQueue).
+     * @param {Array} changes [{id, start, end, write_date}], dates as YYYY-MM-DD
+     * @param {Object} [options]
+     * @param {boolean} [options.autoSchedule] Shift the successors of the moved tasks if needed
+     * @returns {Promise<Object>} {results, shifted}
+     *   results: one per task {id, status, message, task},
+     *     status: 'ok' | 'conflict' | 'error' | 'missing'; task: current Gantt task (or false)
+     *   shifted: Gantt tasks moved by auto-scheduling
+     */
+    async writeTaskDates(changes, { autoSchedule = false } = {}) {
+        try {
+            const response = await rpc("/project_gantt_dashboard/tasks/write", {
+                changes,
+                auto_schedule: autoSchedule,
+            });
+            await this._patchCachedRows([
+                ...response.results.filter(result => result.task).map(result => result.task),
+                ...(response.shifted || []),
+            ]);
+            return {
+                results: response.results.map(result => ({
+                    ...result,
+                    id: String(result.id),
+                    task: result.task ? this._processTasks([result.task])[0] : false,
+                })),
+                shifted: this._processTasks(response.shifted || []),
+            };
+        } catch (error) {
+            // Error handling: network / server errors fail the whole batch
+            console.error("GanttDataService: Error updating tasks", error);
+            const message = (error.data && error.data.message) || error.message || "";
+            return {
+                results: changes.map(change => ({
+                    id: String(change.id),
+                    status: 'error',
+                    message,
+                    task: false,
+                })),
+                shifted: [],
+            };
+        }
+    }
 
+    /**
+     * Critical path of a project, computed server-side over the task dependencies.
+     * @param {number} projectId
+     * @returns {Promise<Object>} {critical: [id], slack: {id: days}, projectEnd, cycles: [id]}
+     */
+    async fetchSchedule(projectId) {
+        try {
+            const schedule = await rpc("/project_gantt_dashboard/schedule", {
+                project_id: parseInt(projectId),
+            });
             return {
-                id: task.id,
-                name: task.name,
-                start: startStr,
-                end: endStr,
-                progress: 0,
-                dependencies: "", 
-                custom_class: isVirtual ? 'gantt-task-virtual' : '',
-                stage_id: task.stage_id,
-                user_names: task.user_ids && task.user_ids.length ? task.user_ids.map(u => u.name).join(", ") : "",
-                is_virtual: isVirtual
+                critical: schedule.critical.map(String),
+                slack: schedule.slack,
+                projectEnd: schedule.project_end,
+                cycles: schedule.cycles.map(String),
             };
-        });
+        } catch (error) {
+            console.error("GanttDataService: Error fetching schedule", error);
+            return { critical: [], slack: {}, projectEnd: false, cycles: [] };
+        }
+    }
+
+    /**
+     * INTERNAL: Map the server rows into Frappe Gantt tasks.
+     * Missing dates ("Soft Visualization") are already replaced by virtual ones server-side.
+     */
+    _processTasks(tasks) {
+        return tasks.map(task => ({
+            id: String(task.id),
+            name: task.name,
+            start: task.start,
+            end: task.end,
+            progress: 0,
+            dependencies: (task.dependencies || []).map(String),
+            custom_class: task.is_virtual ? 'gantt-task-virtual' : '',
+            stage_id: task.stage_id,
+            stage_name: task.stage_name,
+            user_ids: task.user_ids,
+            user_names: task.user_names,
+            write_date: task.write_date,
+            is_virtual: task.is_virtual,
+        }));
     }
 }
 
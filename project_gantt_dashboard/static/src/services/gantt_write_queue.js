@@ -0,0 +1,106 @@
+/** @odoo-module **/
+
+import { ganttService } from "./gantt_data_service";
+
+/**
+ * Client-side queue of task date changes (Gantt drag & drop).
+ *
+ * - Changes of the same task are merged: only the last dates are sent, based on
+ *   the write_date the client knew before the first change (conflict detection).
+ * - Writes are debounced and flushed in a single batched call.
+ * - One flush at a time: changes made during a flush wait for the next one, and
+ *   pick up the write_date returned for their task by the running flush.
+ */
+export class GanttWriteQueue {
+    /**
+     * @param {Function} onResults Called with the per-task results of each flush
+     * @param {Object} [options]
+     * @param {number} [options.delay] Debounce delay in ms
+     * @param {Function} [options.getWriteOptions] Options of each batched write (e.g. autoSchedule)
+     */
+    constructor(onResults, { delay = 600, getWriteOptions = () => ({}) } = {}) {
+        this.onResults = onResults;
+        this.delay = delay;
+        this.getWriteOptions = getWriteOptions;
+        this.pending = new Map(); // taskId -> {id, start, end, write_date}
+        this.timer = null;
+        this.flushing = null; // Promise of the running flush
+        this.inflight = 0; // Number of changes sent by the running flush
+    }
+
+    /**
+     * Queue new dates for a task.
+     * @param {number|string} taskId
+     * @param {string} start ISO Date string (YYYY-MM-DD)
+     * @param {string} end ISO Date string (YYYY-MM-DD)
+     * @param {string} writeDate write_date of the task as loaded by the client
+     */
+    push(taskId, start, end, writeDate) {
+        const key = String(taskId);
+        const previous = this.pending.get(key);
+        this.pending.set(key, {
+            id: parseInt(taskId),
+            start,
+            end,
+            // Keep the version of the first change: the merged change is based on it
+            write_date: previous ? previous.write_date : writeDate,
+        });
+        this._schedule();
+    }
+
+    /** Changes not saved yet (queued or being sent). */
+    get size() {
+        return this.pending.size + this.inflight;
+    }
+
+    _schedule() {
+        clearTimeout(this.timer);
+        this.timer = setTimeout(() => this.flush(), this.delay);
+    }
+
+    /**
+     * Send every pending change in one call.
+     * @returns {Promise<void>}
+     */
+    async flush() {
+        clearTimeout(this.timer);
+        this.timer = null;
+        if (this.flushing) {
+            // Next batch once the running one is done
+            await this.flushing;
+            if (this.pending.size && !this.timer) {
+                return this.flush();
+            }
+            return;
+        }
+        if (!this.pending.size) return;
+
+        const changes = [...this.pending.values()];
+        this.pending.clear();
+        this.inflight = changes.length;
+        this.flushing = ganttService.writeTaskDates(changes, this.getWriteOptions());
+        let results, shifted;
+        try {
+            ({ results, shifted } = await this.flushing);
+        } finally {
+            this.flushing = null;
+            this.inflight = 0;
+        }
+
+        for (const result of results) {
+            // Changes queued meanwhile are now based on the version we just wrote
+            const queued = this.pending.get(String(result.id));
+            if (queued && result.status === 'ok' && result.task) {
+                queued.write_date = result.task.write_date;
+            }
+        }
+        for (const task of shifted) {
+            // Same for the successors moved by auto-scheduling
+            const queued = this.pending.get(task.id);
+            if (queued) {
+                queued.write_date = task.write_date;
+            }
+        }
+        this.onResults(results, shifted, changes);
+    }
+}
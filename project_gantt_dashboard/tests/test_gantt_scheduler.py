@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+import random
+from time import perf_counter
+
+from odoo.tests.common import TransactionCase, tagged
+
+from odoo.addons.project_gantt_dashboard.models.gantt_scheduler import GanttScheduler
+
+
+def _scheduler(tasks, edges):
+    """tasks: {task_id: (start, end)} as day numbers."""
+    return GanttScheduler(
+        {task_id: start for task_id, (start, _end) in tasks.items()},
+        {task_id: end for task_id, (_start, end) in tasks.items()},
+        edges,
+    )
+
+
+@tagged('post_install', '-at_install')
+class TestGanttScheduler(TransactionCase):
+
+    def test_chain(self):
+        # 1 -> 2 -> 4 is the longest path; 3 runs in parallel with 2 and has 2 days of slack.
+        schedule = _scheduler(
+            {1: (0, 2), 2: (2, 6), 3: (2, 4), 4: (6, 7)},
+            [(1, 2), (1, 3), (2, 4), (3, 4)],
+        ).compute()
+        self.assertEqual(schedule['early_start'], {1: 0, 2: 2, 3: 2, 4: 6})
+        self.assertEqual(schedule['late_start'], {1: 0, 2: 2, 3: 4, 4: 6})
+        self.assertEqual(schedule['slack'], {1: 0, 2: 0, 3: 2, 4: 0})
+        self.assertEqual(schedule['critical'], [1, 2, 4])
+        self.assertEqual(schedule['project_end'], 7)
+        self.assertEqual(schedule['cycles'], [])
+
+    def test_planned_start_and_late_predecessor(self):
+        # 2 is planned after 1 ends (start no earlier than 5); 3 is planned before 1 ends.
+        schedule = _scheduler({1: (0, 3), 2: (5, 6), 3: (1, 3)}, [(1, 2), (1, 3)]).compute()
+        self.assertEqual(schedule['early_start'][2], 5)
+        self.assertEqual(schedule['early_start'][3], 3)
+        self.assertEqual(schedule['early_finish'][3], 5)
+        self.assertEqual(schedule['project_end'], 6)
+
+    def test_ignored_edges(self):
+        # Self-dependencies and dependencies on tasks outside the project are ignored.
+        scheduler = _scheduler({1: (0, 1), 2: (0, 1)}, [(1, 1), (1, 99), (99, 2)])
+        self.assertEqual(scheduler.successors, {1: [], 2: []})
+        self.assertEqual(scheduler.compute()['critical'], [1, 2])
+
+    def test_cycle(self):
+        # 2 and 3 depend on each other: they are reported, the rest is still scheduled.
+        schedule = _scheduler({1: (0, 1), 2: (1, 2), 3: (2, 3)}, [(1, 2), (2, 3), (3, 2)]).compute()
+        self.assertEqual(sorted(schedule['cycles']), [2, 3])
+        self.assertEqual(schedule['early_start'], {1: 0})
+        self.assertEqual(schedule['slack'], {1: 0})
+        self.assertEqual(schedule['project_end'], 1)
+
+    def test_behind_cycle(self):
+        # 4 follows a cycle and 5 is independent: 4 cannot be scheduled, 5 can.
+        schedule = _scheduler(
+            {1: (0, 1), 2: (1, 2), 3: (2, 3), 4: (3, 4), 5: (0, 4)},
+            [(1, 2), (2, 3), (3, 2), (3, 4)],
+        ).compute()
+        self.assertEqual(sorted(schedule['cycles']), [2, 3, 4])
+        self.assertEqual(set(schedule['slack']), {1, 5})
+        self.assertEqual(schedule['slack'][1], 3)
+
+    def test_cascade(self):
+        # 1 now ends on day 5: 2 and 3 (after 2) are shifted, keeping their duration.
+        # 4 already violates its dependency on 5, but 5 did not move: it is left alone.
+        scheduler = _scheduler(
+            {1: (0, 5), 2: (3, 5), 3: (5, 6), 4: (0, 1), 5: (0, 2)},
+            [(1, 2), (2, 3), (5, 4)],
+        )
+        self.assertEqual(scheduler.cascade([1]), {2: (5, 7), 3: (7, 8)})
+        self.assertEqual(scheduler.cascade([2]), {})
+
+    def test_cascade_cycle(self):
+        scheduler = _scheduler({1: (0, 5), 2: (1, 2), 3: (2, 3)}, [(1, 2), (2, 3), (3, 2)])
+        self.assertEqual(scheduler.cascade([1]), {})
+
+    def test_large_project(self):
+        """10k tasks and about 30k dependencies: linear passes, well under a second."""
+        rng = random.Random(42)
+        count = 10000
+        tasks = {}
+        for task_id in range(1, count + 1):
+            start = rng.randrange(0, 365)
+            tasks[task_id] = (start, start + rng.randrange(1, 15))
+        # Only forward edges (lower id -> higher id): a DAG with long chains.
+        edges = [(task_id, task_id + 1) for task_id in range(1, count, 3)]
+        for _i in range(2 * count):
+            predecessor = rng.randrange(1, count)
+            edges.append((predecessor, rng.randrange(predecessor + 1, min(predecessor + 200, count) + 1)))
+        # A cycle somewhere in the middle must not break the other tasks.
+        edges += [(count // 2, count // 2 + 1), (count // 2 + 1, count // 2)]
+
+        started = perf_counter()
+        scheduler = _scheduler(tasks, edges)
+        schedule = scheduler.compute()
+        shifts = scheduler.cascade([1, 2, 3])
+        elapsed = perf_counter() - started
+
+        self.assertTrue(schedule['cycles'])
+        self.assertEqual(len(schedule['slack']) + len(schedule['cycles']), count)
+        self.assertTrue(all(slack >= 0 for slack in schedule['slack'].values()))
+        for task_id, (start, _end) in shifts.items():
+            for predecessor in scheduler.predecessors[task_id]:
+                predecessor_end = shifts.get(predecessor, tasks[predecessor])[1]
+                self.assertGreaterEqual(start, predecessor_end)
+        self.assertLess(elapsed, 1.0, "Scheduling 10k tasks took %.3fs" % elapsed)
@@ -1,13 +1,23 @@
 {
     'name': 'Sale UI New',
-    'version': '19.0.1.0.0',
+    'version': '19.0.1.1.0',
     'category': 'Sales',
     'summary': 'Custom quotation list UI for Sales Orders',
     'author': 'Diego Nguyen',
     'depends': ['sale'],
     'data': [
+        'security/ir.model.access.csv',
         'views/sale_order_views.xml',
+        'data/sale_ui_cache_data.xml',
+        'views/quotation_list_action.xml',
     ],
+    'assets': {
+        'web.assets_backend': [
+            'sale_ui_new/static/src/quotation_list/quotation_list.scss',
+            'sale_ui_new/static/src/quotation_list/quotation_list.js',
+            'sale_ui_new/static/src/quotation_list/quotation_list.xml',
+        ],
+    },
     'installable': True,
     'application': True,
     'auto_install': False,
@@ -1,21 +1,28 @@
-# from odoo import http
+# -*- coding: utf-8 -*-
+from odoo import http
+from odoo.fields import Domain
+from odoo.http import request
 
+from odoo.addons.sale_ui_new.models.sale_order_ui_cache import UI_QUOTATION_DOMAIN
 
-# class SaleUiNew(http.Controller):
-#     @http.route('/sale_ui_new/sale_ui_new', auth='public')
-#     def index(self, **kw):
-#         return "Hello, world"
+# Số dòng tối đa của 1 trang, tránh client yêu cầu quá lớn.
+MAX_PAGE_SIZE = 200
 
-#     @http.route('/sale_ui_new/sale_ui_new/objects', auth='public')
-#     def list(self, **kw):
-#         return http.request.render('sale_ui_new.listing', {
-#             'root': '/sale_ui_new/sale_ui_new',
-#             'objects': http.request.env['sale_ui_new.sale_ui_new'].search([]),
-#         })
 
-#     @http.route('/sale_ui_new/sale_ui_new/objects/<model("sale_ui_new.sale_ui_new"):obj>', auth='public')
-#     def object(self, obj, **kw):
-#         return http.request.render('sale_ui_new.object', {
-#             'object': obj
-#         })
+class SaleUiNew(http.Controller):
 
+    @http.route('/sale_ui_new/quotations', type='jsonrpc', auth='user', readonly=True)
+    def quotations(self, domain=None, limit=80, offset=0, order=None):
+        """
+        Danh sách báo giá dạng JSON gọn cho client OWL (sale_ui_new.QuotationList):
+        {'length': tổng số đơn, 'records': [...]} - xem SaleOrder._get_ui_json_rows().
+        Chỉ gồm báo giá (UI_QUOTATION_DOMAIN), domain của client được thêm vào (AND).
+        """
+        SaleOrder = request.env['sale.order']
+        domain = Domain(UI_QUOTATION_DOMAIN) & Domain(domain or [])
+        limit = max(1, min(int(limit or 80), MAX_PAGE_SIZE))
+        orders = SaleOrder.search(domain, limit=limit, offset=int(offset or 0), order=order or None)
+        return {
+            'length': SaleOrder.search_count(domain),
+            'records': orders._get_ui_json_rows(),
+        }
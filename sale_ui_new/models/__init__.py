@@ -1 +1,6 @@
-from . import sale_order
\ No newline at end of file
+from . import sale_order
+from . import sale_order_line
+from . import sale_order_ui_cache
+from . import res_partner
+from . import product
+from . import crm_tag
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+from odoo import models
+
+
+class CrmTag(models.Model):
+    _inherit = 'crm.tag'
+
+    def write(self, vals):
+        res = super().write(vals)
+        # Nhãn đầu tiên của đơn được hiển thị làm danh mục ở cột Order ID.
+        if 'name' in vals:
+            self.env['sale.order.ui.cache'].sudo()._invalidate_tags(self.ids)
+        return res
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from odoo import models
+
+# Tên hiển thị và danh mục sản phẩm xuất hiện trong cột Sản phẩm / Order ID của list view.
+UI_CACHE_PRODUCT_DEPENDS = {'name', 'default_code', 'categ_id', 'product_template_attribute_value_ids'}
+
+
+class ProductProduct(models.Model):
+    _inherit = 'product.product'
+
+    def write(self, vals):
+        res = super().write(vals)
+        if UI_CACHE_PRODUCT_DEPENDS & set(vals):
+            self.env['sale.order.ui.cache'].sudo()._invalidate_products(self.ids)
+        return res
+
+
+class ProductTemplate(models.Model):
+    _inherit = 'product.template'
+
+    def write(self, vals):
+        res = super().write(vals)
+        if UI_CACHE_PRODUCT_DEPENDS & set(vals):
+            products = self.with_context(active_test=False).product_variant_ids
+            self.env['sale.order.ui.cache'].sudo()._invalidate_products(products.ids)
+        return res
+
+
+class ProductCategory(models.Model):
+    _inherit = 'product.category'
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'name' in vals:
+            products = self.env['product.product'].with_context(active_test=False).search([('categ_id', 'in', self.ids)])
+            self.env['sale.order.ui.cache'].sudo()._invalidate_products(products.ids)
+        return res
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from odoo import models
+
+# Các field của khách hàng hiển thị trong cột Khách hàng của list view.
+UI_CACHE_PARTNER_DEPENDS = {
+    'name', 'parent_id', 'is_company', 'phone', 'mobile', 'type',
+    'street', 'street2', 'city', 'state_id', 'zip', 'country_id',
+}
+
+
+class ResPartner(models.Model):
+    _inherit = 'res.partner'
+
+    def write(self, vals):
+        res = super().write(vals)
+        if UI_CACHE_PARTNER_DEPENDS & set(vals):
+            self.env['sale.order.ui.cache'].sudo()._invalidate_partners(self.ids)
+        return res
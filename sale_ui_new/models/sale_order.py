@@ -1,10 +1,34 @@
 ﻿# -*- coding: utf-8 -*-
+import json
+import logging
+import time
 from datetime import datetime, date
 
 from markupsafe import escape
 
 from odoo import api, fields, models
 
+from .sale_order_ui_cache import UI_CACHE_FIELDS
+
+_logger = logging.getLogger(__name__)
+
+# Các field của sale.order mà HTML được cache phụ thuộc vào (xem _prepare_ui_render_data).
+# Ngày giao không được cache (xem _finish_ui_customer_html) nên không có trong danh sách này.
+UI_CACHE_DEPENDS = {
+    'name', 'state', 'partner_id', 'client_order_ref', 'tag_ids', 'order_line',
+}
+
+# Nhãn và màu (chữ, nền) của badge trạng thái.
+UI_STATE_MAP = {
+    'draft': ('Vừa mới tạo', '#1e40af', '#dbeafe'),
+    'sent': ('Vừa mới tạo', '#1e40af', '#dbeafe'),
+    'sale': ('Sales Order', '#047857', '#d1fae5'),
+    'done': ('Đã giao hàng', '#c2410c', '#ffedd5'),
+    'cancel': ('Đã hủy', '#b91c1c', '#fee2e2'),
+}
+# Số dòng sản phẩm chính tối đa hiển thị trong cột Sản phẩm.
+UI_PRODUCT_LIMIT = 4
+
 
 class SaleOrder(models.Model):
     _inherit = 'sale.order'
@@ -34,18 +58,292 @@ class SaleOrder(models.Model):
         sanitize=False,
     )
 
+    # Các cột tóm tắt được lưu (stored) + index để list view sort/filter/group được bằng SQL.
+    x_ui_primary_category = fields.Char(
+        string='Danh mục chính',
+        compute='_compute_ui_summary_fields',
+        store=True,
+        index=True,
+    )
+    x_ui_product_count = fields.Integer(
+        string='Số sản phẩm',
+        compute='_compute_ui_summary_fields',
+        store=True,
+    )
+    # Tên các sản phẩm của đơn, index trigram để tìm kiếm ilike không phải join order line.
+    x_ui_product_names = fields.Text(
+        string='Tên sản phẩm',
+        compute='_compute_ui_summary_fields',
+        store=True,
+        index='trigram',
+        help="Tên gốc (en_US, không dịch) của các sản phẩm trong đơn.",
+    )
+    # Ngày giao cam kết được lưu + index để lọc/nhóm. Ngày giao dự kiến (expected_date) phụ thuộc
+    # thời điểm hiện tại nên không được lưu: x_ui_delivery_date chỉ tính lúc hiển thị.
+    commitment_date = fields.Datetime(index=True)
+    x_ui_delivery_date = fields.Datetime(
+        string='Ngày giao',
+        compute='_compute_ui_delivery_date',
+        store=False,
+    )
+
+    @api.model
+    def _get_ui_summary_depends(self):
+        depends = [
+            'tag_ids.name',
+            'order_line.display_type',
+            'order_line.name',
+            'order_line.product_id.name',
+            'order_line.product_id.default_code',
+            'order_line.product_id.categ_id.name',
+        ]
+        # Cấu trúc combo (module ups_custom_sales, nếu được cài): dòng con không được đếm.
+        line_fields = self.env['sale.order.line']._fields
+        depends += ['order_line.%s' % name for name in ('is_combo_child', 'parent_line_id') if name in line_fields]
+        return depends
+
+    @api.depends(lambda self: self._get_ui_summary_depends())
+    def _compute_ui_summary_fields(self):
+        # Giá trị lưu không phụ thuộc ngôn ngữ của người sửa đơn: luôn tính theo tên gốc (en_US).
+        data = self.with_context(lang='en_US')._prepare_ui_line_data()
+        for order in self:
+            values = data[order.id]
+            lines = [l for l in values['lines'] if not l['display_type']]
+            main_lines = [l for l in lines if not l['is_combo_child']]
+            names = list(dict.fromkeys(l['name'] for l in lines if l['name']))
+            order.x_ui_primary_category = self._get_category_label_from_values(values)
+            order.x_ui_product_count = len(main_lines)
+            order.x_ui_product_names = '\n'.join(names) or False
+
+    @api.depends('commitment_date', 'expected_date')
+    def _compute_ui_delivery_date(self):
+        for order in self:
+            order.x_ui_delivery_date = order.commitment_date or order.expected_date
+
     @api.depends('name', 'state', 'partner_id', 'client_order_ref', 'order_line')
     def _compute_ui_html_fields(self):
+        # Lấy HTML đã render từ bảng cache (1 query cho cả trang), chỉ render lại các đơn chưa có.
+        Cache = self.env['sale.order.ui.cache'].sudo()
+        fragments = Cache._get_fragments([order_id for order_id in self.ids if isinstance(order_id, int)])
+        missing = self.filtered(lambda order: order.id not in fragments)
+        if missing:
+            rendered = missing._render_ui_cacheable_fragments()
+            # Bản ghi chưa lưu (NewId, vd trong onchange) không được đưa vào cache.
+            Cache._store_fragments({
+                order_id: html for order_id, html in rendered.items() if isinstance(order_id, int)
+            })
+            fragments.update(rendered)
+
+        for order in self:
+            html = fragments[order.id]
+            order.x_ui_order_id_html = html['order_id_html']
+            # Ngày giao dự kiến phụ thuộc thời điểm hiện tại: luôn tính lúc hiển thị.
+            order.x_ui_customer_html = self._finish_ui_customer_html(html['customer_html'], order._get_delivery_date())
+            order.x_ui_products_html = html['products_html']
+            order.x_ui_state_badge_html = html['state_badge_html']
+
+    def _render_ui_fragments(self):
+        """Render 4 cột HTML cho cả recordset: {order.id: {field: html}}."""
+        # Đọc trước dữ liệu của cả trang (vd 80 đơn) bằng vài query gộp, rồi render từ dict.
+        data = self._prepare_ui_render_data()
+        fragments = self._render_ui_cacheable_fragments(data)
+        for order_id, html in fragments.items():
+            html['customer_html'] = self._finish_ui_customer_html(html['customer_html'], data[order_id]['delivery_date'])
+        return fragments
+
+    def _render_ui_cacheable_fragments(self, data=None):
+        """
+        Phần HTML được lưu vào sale.order.ui.cache: như _render_ui_fragments nhưng cột Khách hàng
+        chưa có dòng ngày giao (ghép bằng _finish_ui_customer_html lúc hiển thị).
+        """
+        if data is None:
+            data = self._prepare_ui_render_data()
+        return {
+            order_id: {
+                'order_id_html': self._render_ui_order_id_html(values),
+                'customer_html': self._render_ui_customer_body(values),
+                'products_html': self._render_ui_products_html(values),
+                'state_badge_html': self._render_ui_state_badge_html(values),
+            }
+            for order_id, values in data.items()
+        }
+
+    def _get_ui_json_rows(self):
+        """
+        Dữ liệu thuần (JSON) của list view cho client OWL (xem controllers/controllers.py).
+        Cùng nguồn dữ liệu với các cột HTML nhưng không kèm markup/style, nên mỗi dòng
+        chỉ vài trăm bytes thay vì vài KB.
+        """
+        data = self._prepare_ui_render_data()
+        rows = []
         for order in self:
-            order.x_ui_order_id_html = order._get_ui_order_id_html()
-            order.x_ui_customer_html = order._get_ui_customer_html()
-            order.x_ui_products_html = order._get_ui_products_html()
-            order.x_ui_state_badge_html = order._get_ui_state_badge_html()
+            values = data[order.id]
+            partner = values['partner']
+            customer = False
+            if partner:
+                contact_name = partner['name'] if partner['name'] != partner['company_name'] else ''
+                customer = {
+                    'company': partner['company_name'],
+                    'contact': contact_name,
+                    'phone': partner['phone'],
+                    'address': partner['address'],
+                    'ref': values['client_order_ref'],
+                    'delivery': values['delivery_date'],
+                }
+            lines = [l for l in values['lines'] if not l['display_type'] and not l['is_combo_child']]
+            rows.append({
+                'id': order.id,
+                'name': values['name'] or '-',
+                'category': self._get_category_label_from_values(values),
+                'customer': customer,
+                'products': [{
+                    'name': line['name'],
+                    'qty': '%g' % (line['qty'] or 0.0),
+                    'children': [
+                        {'name': child['name'], 'qty': '%g' % (child['qty'] or 0.0)}
+                        for child in line['children']
+                    ],
+                } for line in lines[:UI_PRODUCT_LIMIT]],
+                'more': max(0, len(lines) - UI_PRODUCT_LIMIT),
+                'state': values['state'],
+                'state_label': UI_STATE_MAP.get(values['state'], (values['state'] or '',))[0],
+                'amount_total': order.amount_total,
+                'currency_id': order.currency_id.id,
+                'user': order.user_id.name or '',
+            })
+        return rows
+
+    @api.model
+    def _benchmark_ui_list(self, domain=None, limit=80):
+        """
+        So sánh chi phí 1 trang list view: 4 cột HTML (render lại, không dùng cache)
+        với endpoint JSON. Gọi từ odoo shell: env['sale.order']._benchmark_ui_list()
+        Trả về dict {mode: {'bytes', 'ms', 'queries'}}.
+        """
+        orders = self.search(domain or [], limit=limit)
+        html_fields = ['x_ui_order_id_html', 'x_ui_customer_html', 'x_ui_products_html', 'x_ui_state_badge_html']
+
+        def measure(render):
+            self.env.invalidate_all()
+            queries = self.env.cr.sql_log_count
+            started = time.perf_counter()
+            payload = json.dumps(render(), default=str)
+            return {
+                'bytes': len(payload.encode()),
+                'ms': round((time.perf_counter() - started) * 1000, 2),
+                'queries': self.env.cr.sql_log_count - queries,
+            }
+
+        def render_html():
+            fragments = orders._render_ui_fragments()
+            return [
+                dict(zip(html_fields, (fragments[order.id][name] for name in UI_CACHE_FIELDS)), id=order.id)
+                for order in orders
+            ]
+
+        result = {
+            'orders': len(orders),
+            'html': measure(render_html),
+            'json': measure(orders._get_ui_json_rows),
+        }
+        _logger.info("Sale UI benchmark (%s orders): html=%s json=%s", len(orders), result['html'], result['json'])
+        return result
+
+    def write(self, vals):
+        res = super().write(vals)
+        if UI_CACHE_DEPENDS & set(vals):
+            self.env['sale.order.ui.cache'].sudo()._invalidate_orders(self.ids)
+        return res
+
+    def _prepare_ui_line_data(self):
+        """
+        Đọc (bulk) nhãn, dòng đơn, sản phẩm, danh mục và dòng combo con của cả recordset:
+        {order.id: {'tag', 'lines'}}. Đủ cho các cột tóm tắt (_compute_ui_summary_fields).
+        """
+        lines = self.order_line
+        # Sử dụng kiểm tra _fields để an toàn nếu module combo chưa cài
+        has_combo = 'child_line_ids' in lines._fields
+        children = lines.child_line_ids if has_combo else lines.browse()
+        all_lines = lines | children
+        products = all_lines.product_id
+
+        product_names = {product.id: product.display_name for product in products}
+        # None = sản phẩm không có danh mục (khác với danh mục có tên rỗng).
+        product_categs = {
+            product.id: product.categ_id.name if product.categ_id else None
+            for product in products
+        }
+
+        line_values = {}
+        for line in all_lines:
+            line_values[line.id] = {
+                'display_type': line.display_type,
+                'is_combo_child': bool(has_combo and line.is_combo_child),
+                'name': product_names.get(line.product_id.id) or line.name or '',
+                'qty': line.product_uom_qty,
+                'categ': product_categs.get(line.product_id.id),
+                'child_ids': line.child_line_ids.ids if has_combo else [],
+            }
+        for values in line_values.values():
+            values['children'] = [line_values[child_id] for child_id in values.pop('child_ids')]
+
+        has_tags = 'tag_ids' in self._fields
+        return {
+            order.id: {
+                'tag': order.tag_ids[:1].name if has_tags else False,
+                'lines': [line_values[line_id] for line_id in order.order_line.ids],
+            }
+            for order in self
+        }
+
+    def _prepare_ui_render_data(self):
+        """
+        Đọc (bulk) toàn bộ dữ liệu cần để render 4 cột HTML cho cả recordset:
+        dòng đơn, sản phẩm, danh mục, khách hàng và dòng combo con.
+        Mỗi field chỉ tốn 1 query cho cả recordset (prefetch), không phụ thuộc số đơn.
+        Trả về dict {order.id: values} chỉ gồm dữ liệu thuần (str/float/list/dict).
+        """
+        data = self._prepare_ui_line_data()
+        partners = self.partner_id
+        partner_values = {}
+        for partner in partners:
+            partner_values[partner.id] = {
+                'name': partner.name or '',
+                'company_name': partner.commercial_company_name or partner.name or '',
+                'phone': partner.phone or getattr(partner, 'mobile', '') or '',
+                'address': partner.contact_address or self._format_partner_address(partner),
+            }
+
+        for order in self:
+            data[order.id].update({
+                'name': order.name,
+                'state': order.state,
+                'partner': partner_values.get(order.partner_id.id),
+                'client_order_ref': order.client_order_ref or '',
+                'delivery_date': order._get_delivery_date(),
+            })
+        return data
 
     def _get_ui_order_id_html(self):
         self.ensure_one()
-        category = self._get_order_category_label()
-        order_name = escape(self.name or '-')
+        return self._render_ui_order_id_html(self._prepare_ui_render_data()[self.id])
+
+    def _get_ui_customer_html(self):
+        self.ensure_one()
+        return self._render_ui_customer_html(self._prepare_ui_render_data()[self.id])
+
+    def _get_ui_products_html(self):
+        self.ensure_one()
+        return self._render_ui_products_html(self._prepare_ui_render_data()[self.id])
+
+    def _get_ui_state_badge_html(self):
+        self.ensure_one()
+        return self._render_ui_state_badge_html(self._prepare_ui_render_data()[self.id])
+
+    @api.model
+    def _render_ui_order_id_html(self, values):
+        category = self._get_category_label_from_values(values)
+        order_name = escape(values['name'] or '-')
 
         return (
             "<div style='display:flex; gap:8px; align-items:flex-start;'>"
@@ -58,22 +356,26 @@ class SaleOrder(models.Model):
             "</div>"
         ) % (escape(category), order_name)
 
-    def _get_ui_customer_html(self):
-        self.ensure_one()
-        partner = self.partner_id
+    @api.model
+    def _render_ui_customer_html(self, values):
+        return self._finish_ui_customer_html(self._render_ui_customer_body(values), values['delivery_date'])
+
+    @api.model
+    def _render_ui_customer_body(self, values):
+        """Nội dung cột Khách hàng, trừ dòng ngày giao. Chuỗi rỗng nếu đơn chưa có khách hàng."""
+        partner = values['partner']
         if not partner:
             return ''
 
-        company_name = partner.commercial_company_name or partner.name or ''
-        contact_name = partner.name or ''
+        company_name = partner['company_name']
+        contact_name = partner['name']
         if company_name == contact_name:
             contact_name = ''
 
-        phone = partner.phone or getattr(partner, 'mobile', '') or ''
-        address = partner.contact_address or self._format_partner_address(partner)
+        phone = partner['phone']
+        address = partner['address']
 
-        ref = self.client_order_ref or ''
-        delivery_date = self._get_delivery_date()
+        ref = values['client_order_ref']
 
         contact_line = ''
         if contact_name or phone:
@@ -83,40 +385,50 @@ class SaleOrder(models.Model):
             )
 
         return (
-            "<div style='line-height:1.25; width:220px; max-width:250px; white-space:normal;'>"
             "<div style='font-weight:600;'>%s</div>"
             "%s"
             "%s"
             "%s"
-            "%s"
-            "</div>"
         ) % (
             escape(company_name),
             ("<div style='color:#374151; font-size:12px;'>%s</div>" % contact_line) if contact_line else '',
             ("<div style='color:#6b7280; font-size:12px;'>%s</div>" % escape(address)) if address else '',
             ("<div style='color:#7c3aed; font-size:12px;'>PO: %s</div>" % escape(ref)) if ref else '',
+        )
+
+    @api.model
+    def _finish_ui_customer_html(self, body, delivery_date):
+        """Ghép nội dung cột Khách hàng (_render_ui_customer_body) với dòng ngày giao."""
+        if not body:
+            return ''
+        return (
+            "<div style='line-height:1.25; width:220px; max-width:250px; white-space:normal;'>"
+            "%s"
+            "%s"
+            "</div>"
+        ) % (
+            body,
             ("<div style='color:#dc2626; font-size:12px;'>Giao: %s</div>" % escape(delivery_date)) if delivery_date else '',
         )
 
-    def _get_ui_products_html(self):
-        self.ensure_one()
+    @api.model
+    def _render_ui_products_html(self, values):
         # Chỉ lấy dòng thường và dòng cha (bỏ qua dòng con đứng lẻ vì nó sẽ được render kèm cha)
-        # Sử dụng getattr để an toàn nếu module combo chưa cài
-        lines = self.order_line.filtered(lambda l: not l.display_type and not getattr(l, 'is_combo_child', False))
-        
+        lines = [l for l in values['lines'] if not l['display_type'] and not l['is_combo_child']]
+
         if not lines:
             return ''
 
         items = []
         total_lines = len(lines)
-        
+
         # Chỉ hiển thị tối đa 4 dòng sản phẩm chính
-        for line in lines[:4]:
-            name = line.product_id.display_name or line.name or ''
-            qty_str = '%g' % (line.product_uom_qty or 0.0)
-            
+        for line in lines[:UI_PRODUCT_LIMIT]:
+            name = line['name']
+            qty_str = '%g' % (line['qty'] or 0.0)
+
             # Kiểm tra xem có phải combo cha không
-            child_lines = getattr(line, 'child_line_ids', None)
+            child_lines = line['children']
             is_combo = bool(child_lines)
 
             if is_combo:
@@ -128,8 +440,8 @@ class SaleOrder(models.Model):
                 )
                 # Dòng Combo Con
                 for child in child_lines:
-                    child_name = child.product_id.display_name or child.name or ''
-                    child_qty = '%g' % (child.product_uom_qty or 0.0)
+                    child_name = child['name']
+                    child_qty = '%g' % (child['qty'] or 0.0)
                     items.append(
                         "<div style='padding-left:12px; font-size:12px; color:#6b7280; display:flex; gap:4px; line-height:1.2; margin-top:1px;'>"
                         "<span style='user-select:none;'>↳</span>"
@@ -146,8 +458,8 @@ class SaleOrder(models.Model):
                     % (escape(name), escape(qty_str))
                 )
 
-        if total_lines > 4:
-            more_count = total_lines - 4
+        if total_lines > UI_PRODUCT_LIMIT:
+            more_count = total_lines - UI_PRODUCT_LIMIT
             items.append(
                 "<li style='color:#6b7280; font-style:italic; margin-top:2px;'>+ %s sản phẩm khác...</li>" % escape(str(more_count))
             )
@@ -156,16 +468,10 @@ class SaleOrder(models.Model):
             "<ul style='margin:0; padding-left:8px; list-style:none;'>%s</ul>" % ''.join(items)
         )
 
-    def _get_ui_state_badge_html(self):
-        self.ensure_one()
-        state_map = {
-            'draft': ('Vừa mới tạo', '#1e40af', '#dbeafe'),
-            'sent': ('Vừa mới tạo', '#1e40af', '#dbeafe'),
-            'sale': ('Sales Order', '#047857', '#d1fae5'),
-            'done': ('Đã giao hàng', '#c2410c', '#ffedd5'),
-            'cancel': ('Đã hủy', '#b91c1c', '#fee2e2'),
-        }
-        label, text_color, bg_color = state_map.get(self.state, (self.state or '', '#111827', '#e5e7eb'))
+    @api.model
+    def _render_ui_state_badge_html(self, values):
+        state = values['state']
+        label, text_color, bg_color = UI_STATE_MAP.get(state, (state or '', '#111827', '#e5e7eb'))
         return (
             "<span style='display:inline-block; padding:2px 8px; border-radius:999px; "
             "font-size:12px; font-weight:600; color:%s; background:%s;'>%s</span>"
@@ -173,15 +479,16 @@ class SaleOrder(models.Model):
 
     def _get_order_category_label(self):
         self.ensure_one()
-        label = ''
-        if 'tag_ids' in self._fields and self.tag_ids:
-            label = self.tag_ids[0].name
+        return self._get_category_label_from_values(self._prepare_ui_render_data()[self.id])
+
+    @api.model
+    def _get_category_label_from_values(self, values):
+        label = values['tag'] or ''
 
         if not label:
-            for line in self.order_line.filtered(lambda l: not l.display_type):
-                categ = line.product_id.categ_id
-                if categ:
-                    label = categ.name
+            for line in values['lines']:
+                if not line['display_type'] and line['categ'] is not None:
+                    label = line['categ']
                     break
 
         return label or 'Chưa phân loại'
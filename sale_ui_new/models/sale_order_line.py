@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+from odoo import api, models
+
+# Các field của dòng đơn được hiển thị trong cột Sản phẩm / Order ID của list view.
+UI_CACHE_LINE_DEPENDS = {
+    'order_id', 'product_id', 'name', 'product_uom_qty', 'display_type', 'sequence',
+    'parent_line_id', 'is_combo_child',
+}
+
+
+class SaleOrderLine(models.Model):
+    _inherit = 'sale.order.line'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        self.env['sale.order.ui.cache'].sudo()._invalidate_orders(lines.order_id.ids)
+        return lines
+
+    def write(self, vals):
+        if not UI_CACHE_LINE_DEPENDS & set(vals):
+            return super().write(vals)
+        order_ids = set(self.order_id.ids)
+        res = super().write(vals)
+        order_ids.update(self.order_id.ids)
+        self.env['sale.order.ui.cache'].sudo()._invalidate_orders(list(order_ids))
+        return res
+
+    def unlink(self):
+        order_ids = self.order_id.ids
+        res = super().unlink()
+        self.env['sale.order.ui.cache'].sudo()._invalidate_orders(order_ids)
+        return res
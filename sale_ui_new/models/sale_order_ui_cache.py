@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+
+from odoo import api, fields, models
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+# Tăng số này khi đổi markup của các hàm _render_ui_*_html: toàn bộ cache cũ tự hết hiệu lực.
+UI_CACHE_VERSION = 2
+UI_CACHE_FIELDS = ('order_id_html', 'customer_html', 'products_html', 'state_badge_html')
+# Các đơn của danh sách báo giá (client action sale_ui_new.quotation_list), cũng là các đơn
+# được cron render sẵn cache.
+UI_QUOTATION_DOMAIN = [('state', 'in', ('draft', 'sent'))]
+# Số đơn tối đa được cron render sẵn cho mỗi ngôn ngữ trong một lần chạy.
+UI_CACHE_WARM_UP_LIMIT = 2000
+
+# Bộ đếm hit/miss của worker hiện tại.
+_stats = {'hits': 0, 'misses': 0, 'stores': 0, 'skipped_readonly': 0, 'invalidated': 0}
+_stats_lock = threading.Lock()
+
+
+def _count(**increments):
+    with _stats_lock:
+        for name, value in increments.items():
+            _stats[name] += value
+
+
+def _input_date(order):
+    """
+    Thời điểm sửa cuối của dữ liệu đầu vào của đơn (đơn và các dòng đơn), theo bảng sale_order
+    có alias là order. Lưu kèm mỗi bản cache và so sánh khi đọc: bản render từ snapshot cũ (vd
+    cron đang chạy trong khi người dùng sửa đơn chưa có cache, lệnh DELETE không xóa được gì)
+    không bao giờ được dùng.
+    """
+    return SQL(
+        "GREATEST(%(order)s.write_date, (SELECT MAX(l.write_date) FROM sale_order_line l WHERE l.order_id = %(order)s.id))",
+        order=SQL.identifier(order),
+    )
+
+
+class SaleOrderUiCache(models.Model):
+    _name = 'sale.order.ui.cache'
+    _description = 'Quotation List HTML Cache'
+    _log_access = False
+
+    # HTML phụ thuộc ngôn ngữ (tên sản phẩm) của người xem. Ngày giao (phụ thuộc múi giờ và
+    # thời điểm hiện tại) không được cache, xem SaleOrder._finish_ui_customer_html.
+    order_id = fields.Many2one('sale.order', required=True, ondelete='cascade', index=True)
+    lang = fields.Char(required=True)
+    version = fields.Integer(required=True)
+    # Xem _input_date(): bản cache chỉ hợp lệ khi đơn và dòng đơn chưa bị sửa sau lúc render.
+    input_date = fields.Datetime(required=True)
+    order_id_html = fields.Text()
+    customer_html = fields.Text()
+    products_html = fields.Text()
+    state_badge_html = fields.Text()
+
+    # Khóa của câu UPSERT trong _store_fragments (ON CONFLICT (order_id, lang)).
+    _order_lang_unique = models.Constraint(
+        'UNIQUE(order_id, lang)', 'Mỗi đơn chỉ có một bản cache cho mỗi ngôn ngữ!',
+    )
+
+    @api.model
+    def _get_lang(self):
+        return self.env.lang or 'en_US'
+
+    @api.model
+    def _get_fragments(self, order_ids):
+        """Trả về {order_id: {field: html}} của các đơn đã có cache hợp lệ (1 query)."""
+        if not order_ids:
+            return {}
+        self._flush_inputs()
+        self.env.cr.execute(SQL(
+            """
+            SELECT c.order_id, c.order_id_html, c.customer_html, c.products_html, c.state_badge_html
+              FROM sale_order_ui_cache c
+              JOIN sale_order o ON o.id = c.order_id
+             WHERE c.order_id IN %s AND c.lang = %s AND c.version = %s AND c.input_date = %s
+            """,
+            tuple(order_ids), self._get_lang(), UI_CACHE_VERSION, _input_date('o'),
+        ))
+        result = {row[0]: dict(zip(UI_CACHE_FIELDS, row[1:])) for row in self.env.cr.fetchall()}
+        _count(hits=len(result), misses=len(order_ids) - len(result))
+        return result
+
+    @api.model
+    def _flush_inputs(self):
+        self.env['sale.order'].flush_model(['write_date'])
+        self.env['sale.order.line'].flush_model(['order_id', 'write_date'])
+
+    @api.model
+    def _store_fragments(self, fragments):
+        """
+        Lưu {order_id: {field: html}} bằng 1 câu UPSERT.
+        Cursor chỉ đọc (readonly: mọi lần load list view) thì bỏ qua: cache được tạo bởi
+        cron _cron_warm_up_ui_cache() (cursor ghi được), hoặc gọi tay warm_up_ui_cache().
+        """
+        if not fragments:
+            return
+        if self.env.cr.readonly:
+            _count(skipped_readonly=len(fragments))
+            return
+        lang = self._get_lang()
+        # input_date được đọc trong cùng transaction (cùng snapshot) với dữ liệu vừa render.
+        self._flush_inputs()
+        values = SQL(', ').join(
+            SQL('(%s::int, %s, %s::int, %s, %s, %s, %s)', order_id, lang, UI_CACHE_VERSION,
+                *(html[name] for name in UI_CACHE_FIELDS))
+            for order_id, html in fragments.items()
+        )
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO sale_order_ui_cache (order_id, lang, version, input_date,
+                                             order_id_html, customer_html, products_html, state_badge_html)
+            SELECT v.order_id, v.lang, v.version, %s,
+                   v.order_id_html, v.customer_html, v.products_html, v.state_badge_html
+              FROM (VALUES %s) AS v(order_id, lang, version,
+                                    order_id_html, customer_html, products_html, state_badge_html)
+              JOIN sale_order o ON o.id = v.order_id
+            ON CONFLICT (order_id, lang) DO UPDATE SET
+                version = EXCLUDED.version,
+                input_date = EXCLUDED.input_date,
+                order_id_html = EXCLUDED.order_id_html,
+                customer_html = EXCLUDED.customer_html,
+                products_html = EXCLUDED.products_html,
+                state_badge_html = EXCLUDED.state_badge_html
+            """,
+            _input_date('o'), values,
+        ))
+        _count(stores=len(fragments))
+
+    # -------------------------------------------------------------------------
+    # INVALIDATION
+    # -------------------------------------------------------------------------
+
+    @api.model
+    def _invalidate_orders(self, order_ids):
+        if not order_ids:
+            return
+        self.env.cr.execute(SQL("DELETE FROM sale_order_ui_cache WHERE order_id IN %s", tuple(order_ids)))
+        _count(invalidated=self.env.cr.rowcount)
+
+    @api.model
+    def _invalidate_partners(self, partner_ids):
+        """Khách hàng (và các liên hệ con, vì tên công ty hiển thị theo công ty cha) thay đổi."""
+        if not partner_ids:
+            return
+        self.env['sale.order'].flush_model(['partner_id'])
+        self.env['res.partner'].flush_model(['commercial_partner_id'])
+        self.env.cr.execute(SQL(
+            """
+            DELETE FROM sale_order_ui_cache c
+             USING sale_order o, res_partner p
+             WHERE c.order_id = o.id AND o.partner_id = p.id
+               AND (p.id IN %(ids)s OR p.commercial_partner_id IN %(ids)s)
+            """,
+            ids=tuple(partner_ids),
+        ))
+        _count(invalidated=self.env.cr.rowcount)
+
+    @api.model
+    def _invalidate_products(self, product_ids):
+        """Tên / danh mục sản phẩm thay đổi: xóa cache của các đơn có dòng chứa sản phẩm đó."""
+        if not product_ids:
+            return
+        self.env['sale.order.line'].flush_model(['order_id', 'product_id'])
+        self.env.cr.execute(SQL(
+            """
+            DELETE FROM sale_order_ui_cache c
+             USING sale_order_line l
+             WHERE c.order_id = l.order_id AND l.product_id IN %s
+            """,
+            tuple(product_ids),
+        ))
+        _count(invalidated=self.env.cr.rowcount)
+
+    @api.model
+    def _invalidate_tags(self, tag_ids):
+        """Tên nhãn (hiển thị làm danh mục ở cột Order ID) thay đổi: xóa cache của các đơn mang nhãn đó."""
+        if not tag_ids:
+            return
+        field = self.env['sale.order']._fields['tag_ids']
+        self.env['sale.order'].flush_model(['tag_ids'])
+        self.env.cr.execute(SQL(
+            """
+            DELETE FROM sale_order_ui_cache c
+             USING %(relation)s r
+             WHERE c.order_id = r.%(order)s AND r.%(tag)s IN %(ids)s
+            """,
+            relation=SQL.identifier(field.relation),
+            order=SQL.identifier(field.column1),
+            tag=SQL.identifier(field.column2),
+            ids=tuple(tag_ids),
+        ))
+        _count(invalidated=self.env.cr.rowcount)
+
+    # -------------------------------------------------------------------------
+    # WARM-UP / STATS
+    # -------------------------------------------------------------------------
+
+    @api.model
+    def warm_up_ui_cache(self, domain=None, batch_size=500, limit=None):
+        """
+        Render sẵn cache cho các đơn chưa có hoặc đã cũ (theo ngôn ngữ của user hiện tại), mới nhất trước.
+        Có thể gọi từ odoo shell, vd:
+        env['sale.order.ui.cache'].with_context(lang='vi_VN').warm_up_ui_cache()
+        """
+        lang = self._get_lang()
+        self._flush_inputs()
+        self.env.cr.execute(SQL(
+            """
+            SELECT c.order_id
+              FROM sale_order_ui_cache c
+              JOIN sale_order o ON o.id = c.order_id
+             WHERE c.lang = %s AND c.version = %s AND c.input_date = %s
+            """,
+            lang, UI_CACHE_VERSION, _input_date('o'),
+        ))
+        cached_ids = {row[0] for row in self.env.cr.fetchall()}
+        order_ids = [
+            order_id for order_id in self.env['sale.order'].search(domain or [], order='id desc').ids
+            if order_id not in cached_ids
+        ][:limit]
+        SaleOrder = self.env['sale.order']
+        for start in range(0, len(order_ids), batch_size):
+            orders = SaleOrder.browse(order_ids[start:start + batch_size])
+            self._store_fragments(orders._render_ui_cacheable_fragments())
+            # Giải phóng cache ORM giữa các lô để bộ nhớ không tăng theo số đơn.
+            self.env.invalidate_all()
+        _logger.info("Sale UI: Warmed up HTML cache of %s orders (lang=%s).", len(order_ids), lang)
+        return len(order_ids)
+
+    @api.model
+    def _cron_warm_up_ui_cache(self):
+        """
+        Cron: list view chạy trên cursor chỉ đọc nên không tự lưu cache được. Render sẵn các
+        báo giá chưa có cache cho từng ngôn ngữ của người dùng nội bộ.
+        """
+        users = self.env['res.users'].search([('share', '=', False)])
+        for lang in set(users.mapped('lang')) or {'en_US'}:
+            self.with_context(lang=lang or 'en_US').warm_up_ui_cache(
+                UI_QUOTATION_DOMAIN, limit=UI_CACHE_WARM_UP_LIMIT,
+            )
+
+    @api.model
+    def get_ui_cache_stats(self):
+        """Bộ đếm hit/miss của worker hiện tại (kèm tỉ lệ hit)."""
+        with _stats_lock:
+            stats = dict(_stats)
+        total = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = stats['hits'] / total if total else 0.0
+        return stats
@@ -0,0 +1,70 @@
+/** @odoo-module **/
+
+import { Component, onWillStart, useState } from "@odoo/owl";
+import { registry } from "@web/core/registry";
+import { rpc } from "@web/core/network/rpc";
+import { useService } from "@web/core/utils/hooks";
+import { formatMonetary } from "@web/views/fields/formatters";
+import { Pager } from "@web/core/pager/pager";
+import { standardActionServiceProps } from "@web/webclient/actions/action_service";
+
+// Client action: same look as view_quotation_tree_ui_custom, but rendered from
+// compact JSON rows (/sale_ui_new/quotations) with CSS classes instead of inline HTML.
+export class QuotationList extends Component {
+    static template = "sale_ui_new.QuotationList";
+    static components = { Pager };
+    static props = { ...standardActionServiceProps };
+
+    setup() {
+        this.actionService = useService("action");
+        this.state = useState({
+            records: [],
+            length: 0,
+            offset: 0,
+            limit: 80,
+            loading: false,
+        });
+        onWillStart(() => this.load());
+    }
+
+    get domain() {
+        return this.props.action.domain || [];
+    }
+
+    async load() {
+        this.state.loading = true;
+        try {
+            const result = await rpc("/sale_ui_new/quotations", {
+                domain: this.domain,
+                limit: this.state.limit,
+                offset: this.state.offset,
+            });
+            this.state.records = result.records;
+            this.state.length = result.length;
+        } finally {
+            this.state.loading = false;
+        }
+    }
+
+    async onPagerUpdate({ offset, limit }) {
+        this.state.offset = offset;
+        this.state.limit = limit;
+        await this.load();
+    }
+
+    formatAmount(record) {
+        return formatMonetary(record.amount_total, { currencyId: record.currency_id });
+    }
+
+    openOrder(record) {
+        this.actionService.doAction({
+            type: "ir.actions.act_window",
+            res_model: "sale.order",
+            res_id: record.id,
+            views: [[false, "form"]],
+            target: "current",
+        });
+    }
+}
+
+registry.category("actions").add("sale_ui_new.quotation_list", QuotationList);
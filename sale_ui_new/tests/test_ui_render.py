@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, date
+
+from markupsafe import escape
+
+from odoo import fields
+from odoo.tests.common import TransactionCase, tagged
+
+from odoo.addons.sale_ui_new.models.sale_order_ui_cache import UI_CACHE_FIELDS
+
+
+# -------------------------------------------------------------------------
+# Cách render cũ (từng đơn, đọc trực tiếp từ record), giữ lại làm chuẩn so sánh.
+# -------------------------------------------------------------------------
+
+def _legacy_category(order):
+    label = ''
+    if order.tag_ids:
+        label = order.tag_ids[0].name
+    if not label:
+        for line in order.order_line.filtered(lambda l: not l.display_type):
+            if line.product_id.categ_id:
+                label = line.product_id.categ_id.name
+                break
+    return label or 'Chưa phân loại'
+
+
+def _legacy_order_id_html(order):
+    return (
+        "<div style='display:flex; gap:8px; align-items:flex-start;'>"
+        "<span style='display:inline-block; width:8px; height:8px; margin-top:6px; "
+        "border-radius:50%%; background:#2e86de;'></span>"
+        "<div style='line-height:1.2;'>"
+        "<div style='font-size:11px; color:#6b7280;'>%s</div>"
+        "<div style='font-size:13px; color:#1a5fb4; font-weight:600;'>%s</div>"
+        "</div>"
+        "</div>"
+    ) % (escape(_legacy_category(order)), escape(order.name or '-'))
+
+
+def _legacy_delivery_date(order):
+    value = order.commitment_date or order.expected_date
+    if not value:
+        return ''
+    if isinstance(value, datetime):
+        return fields.Datetime.context_timestamp(order, value).strftime('%d/%m/%Y')
+    if isinstance(value, date):
+        return value.strftime('%d/%m/%Y')
+    return str(value)
+
+
+def _legacy_customer_html(order):
+    partner = order.partner_id
+    if not partner:
+        return ''
+    company_name = partner.commercial_company_name or partner.name or ''
+    contact_name = partner.name or ''
+    if company_name == contact_name:
+        contact_name = ''
+    phone = partner.phone or getattr(partner, 'mobile', '') or ''
+    address = partner.contact_address or order._format_partner_address(partner)
+    ref = order.client_order_ref or ''
+    delivery_date = _legacy_delivery_date(order)
+    contact_line = ''
+    if contact_name or phone:
+        contact_line = '%s%s' % (
+            escape(contact_name) if contact_name else '',
+            (' - ' + escape(phone)) if phone else '',
+        )
+    return (
+        "<div style='line-height:1.25; width:220px; max-width:250px; white-space:normal;'>"
+        "<div style='font-weight:600;'>%s</div>"
+        "%s"
+        "%s"
+        "%s"
+        "%s"
+        "</div>"
+    ) % (
+        escape(company_name),
+        ("<div style='color:#374151; font-size:12px;'>%s</div>" % contact_line) if contact_line else '',
+        ("<div style='color:#6b7280; font-size:12px;'>%s</div>" % escape(address)) if address else '',
+        ("<div style='color:#7c3aed; font-size:12px;'>PO: %s</div>" % escape(ref)) if ref else '',
+        ("<div style='color:#dc2626; font-size:12px;'>Giao: %s</div>" % escape(delivery_date)) if delivery_date else '',
+    )
+
+
+def _legacy_products_html(order):
+    lines = order.order_line.filtered(lambda l: not l.display_type and not getattr(l, 'is_combo_child', False))
+    if not lines:
+        return ''
+    items = []
+    for line in lines[:4]:
+        name = line.product_id.display_name or line.name or ''
+        qty_str = '%g' % (line.product_uom_qty or 0.0)
+        child_lines = getattr(line, 'child_line_ids', None)
+        if child_lines:
+            items.append(
+                "<li style='margin:0 0 4px 0;'>"
+                "<div style='font-weight:700; color:#1f2937;'>%s <span style='color:#d64541;'>x%s</span> <span style='font-size:10px; background:#e5e7eb; color:#374151; padding:1px 4px; border-radius:4px;'>COMBO</span></div>"
+                % (escape(name), escape(qty_str))
+            )
+            for child in child_lines:
+                items.append(
+                    "<div style='padding-left:12px; font-size:12px; color:#6b7280; display:flex; gap:4px; line-height:1.2; margin-top:1px;'>"
+                    "<span style='user-select:none;'>↳</span>"
+                    "<span>%s</span>"
+                    "<span style='color:#9ca3af;'>x%s</span>"
+                    "</div>"
+                    % (escape(child.product_id.display_name or child.name or ''), escape('%g' % (child.product_uom_qty or 0.0)))
+                )
+            items.append("</li>")
+        else:
+            items.append(
+                "<li style='margin:0 0 2px 0;'>%s <span style='color:#d64541; font-weight:600;'>x%s</span></li>"
+                % (escape(name), escape(qty_str))
+            )
+    if len(lines) > 4:
+        items.append(
+            "<li style='color:#6b7280; font-style:italic; margin-top:2px;'>+ %s sản phẩm khác...</li>" % escape(str(len(lines) - 4))
+        )
+    return "<ul style='margin:0; padding-left:8px; list-style:none;'>%s</ul>" % ''.join(items)
+
+
+def _legacy_state_badge_html(order):
+    state_map = {
+        'draft': ('Vừa mới tạo', '#1e40af', '#dbeafe'),
+        'sent': ('Vừa mới tạo', '#1e40af', '#dbeafe'),
+        'sale': ('Sales Order', '#047857', '#d1fae5'),
+        'done': ('Đã giao hàng', '#c2410c', '#ffedd5'),
+        'cancel': ('Đã hủy', '#b91c1c', '#fee2e2'),
+    }
+    label, text_color, bg_color = state_map.get(order.state, (order.state or '', '#111827', '#e5e7eb'))
+    return (
+        "<span style='display:inline-block; padding:2px 8px; border-radius:999px; "
+        "font-size:12px; font-weight:600; color:%s; background:%s;'>%s</span>"
+    ) % (escape(text_color), escape(bg_color), escape(label))
+
+
+@tagged('post_install', '-at_install')
+class TestUiRender(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, tz='Asia/Ho_Chi_Minh'))
+        country = cls.env.ref('base.vn')
+        company = cls.env['res.partner'].create({
+            'name': 'Công ty <ABC>', 'is_company': True, 'phone': '0901 234 567',
+            'street': '1 Lê Lợi', 'city': 'Hồ Chí Minh', 'country_id': country.id,
+        })
+        cls.partners = company | cls.env['res.partner'].create([
+            {'name': 'Nguyễn Văn A', 'parent_id': company.id, 'type': 'contact'},
+            {'name': 'Khách lẻ'},
+        ])
+        categories = cls.env['product.category'].create([{'name': 'Điện tử'}, {'name': 'Gia dụng & Bếp'}])
+        cls.products = cls.env['product.product'].create([
+            {'name': 'Sản phẩm %s' % i, 'default_code': 'SP%s' % i, 'categ_id': categories[i % 2].id}
+            for i in range(6)
+        ])
+        cls.tag = cls.env['crm.tag'].create({'name': 'VIP'})
+        cls.orders = cls._create_orders(20)
+
+    @classmethod
+    def _create_orders(cls, count):
+        vals_list = []
+        for i in range(count):
+            lines = [(0, 0, {'display_type': 'line_section', 'name': 'Phần %s' % i})]
+            # Từ 1 đến 6 dòng sản phẩm: có đơn vượt quá giới hạn hiển thị 4 dòng.
+            lines += [
+                (0, 0, {'product_id': product.id, 'product_uom_qty': i + 0.5})
+                for product in cls.products[:i % 6 + 1]
+            ]
+            vals_list.append({
+                'partner_id': cls.partners[i % 3].id,
+                'client_order_ref': 'PO-%s' % i if i % 2 else False,
+                'commitment_date': datetime(2025, 5, 1, 20, 0) if i % 4 == 0 else False,
+                'tag_ids': [(6, 0, cls.tag.ids)] if i % 5 == 0 else [],
+                'order_line': lines,
+            })
+        orders = cls.env['sale.order'].create(vals_list)
+        orders[1::4].action_confirm()
+        orders[2::4]._action_cancel()
+        return orders
+
+    def _legacy_fragments(self, order):
+        return {
+            'order_id_html': _legacy_order_id_html(order),
+            'customer_html': _legacy_customer_html(order),
+            'products_html': _legacy_products_html(order),
+            'state_badge_html': _legacy_state_badge_html(order),
+        }
+
+    def test_render_matches_legacy(self):
+        fragments = self.orders._render_ui_fragments()
+        for order in self.orders:
+            for name in UI_CACHE_FIELDS:
+                self.assertEqual(
+                    str(fragments[order.id][name]), str(self._legacy_fragments(order)[name]),
+                    "%s of %s differs from the per-record rendering" % (name, order.name),
+                )
+
+    def test_render_query_count(self):
+        """Số query để render không phụ thuộc số đơn của trang."""
+        def render_count(orders):
+            self.env.invalidate_all()
+            queries = self.env.cr.sql_log_count
+            orders._render_ui_fragments()
+            return self.env.cr.sql_log_count - queries
+
+        # Lần đầu: nạp các cache dùng chung (ngôn ngữ, định dạng địa chỉ...).
+        render_count(self.orders[:5])
+        expected = render_count(self.orders[:5])
+        self.env.invalidate_all()
+        with self.assertQueryCount(expected):
+            self.orders._render_ui_fragments()
+
+    def test_cache(self):
+        Cache = self.env['sale.order.ui.cache']
+        quotations = self.orders.filtered(lambda order: order.state in ('draft', 'sent'))
+        Cache._cron_warm_up_ui_cache()
+        self.assertEqual(set(Cache._get_fragments(quotations.ids)), set(quotations.ids))
+
+        # Cột hiển thị từ cache giống hệt bản render đầy đủ, kể cả ngày giao (không được cache).
+        self.env.invalidate_all()
+        fragments = quotations._render_ui_fragments()
+        for order in quotations:
+            self.assertEqual(str(order.x_ui_customer_html), str(fragments[order.id]['customer_html']))
+        self.assertNotIn('Giao:', ''.join(html['customer_html'] for html in Cache._get_fragments(quotations.ids).values()))
+
+        # Đơn bị sửa sau lúc render (vd người dùng sửa trong khi cron đang render, lệnh DELETE
+        # chưa thấy dòng cache nào): bản cache cũ không được dùng và được cron render lại.
+        order = quotations[0]
+        self.env.cr.execute("UPDATE sale_order SET write_date = write_date + interval '1 second' WHERE id = %s", [order.id])
+        self.assertNotIn(order.id, Cache._get_fragments(quotations.ids))
+        Cache._cron_warm_up_ui_cache()
+        self.assertIn(order.id, Cache._get_fragments(quotations.ids))
+
+        # Đổi tên nhãn: cache của các đơn mang nhãn bị xóa.
+        tagged_orders = quotations.filtered('tag_ids')
+        self.assertTrue(tagged_orders)
+        self.tag.name = 'Khách VIP'
+        self.assertFalse(Cache._get_fragments(tagged_orders.ids))
+        self.env.invalidate_all()
+        self.assertIn('Khách VIP', str(tagged_orders[0].x_ui_order_id_html))
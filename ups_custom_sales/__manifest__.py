@@ -8,6 +8,7 @@
     'data': [
         'security/ir.model.access.csv',
         'views/sale_order_views.xml',
+        'views/sale_combo_template_views.xml',
         'wizard/sale_combo_wizard_views.xml',
     ],
     'installable': True,
@@ -1,3 +1,4 @@
+from . import sale_combo_template
 from . import sale_order
 from . import sale_order_line
 from . import sale_virtual_line
@@ -0,0 +1,131 @@
+import math
+
+from odoo import models, fields, api
+from odoo.tools import SQL, float_round
+
+# -------------------------------------------------------------------------
+# MODEL: SALE.COMBO.TEMPLATE
+# -------------------------------------------------------------------------
+# Định mức (BOM) của một sản phẩm Combo: danh sách thành phần và số lượng cho MỘT đơn vị combo.
+# Khi bán sản phẩm này, các dòng con được tạo tự động (xem SaleOrderLine._expand_combo_templates)
+# thay vì chọn tay qua Wizard.
+class SaleComboTemplate(models.Model):
+    _name = 'sale.combo.template'
+    _description = 'Combo Components Template'
+    _order = 'name'
+
+    name = fields.Char(string='Name', required=True)
+    active = fields.Boolean(default=True)
+    company_id = fields.Many2one('res.company', string='Company', default=lambda self: self.env.company)
+
+    # Sản phẩm Combo (dòng cha) áp dụng định mức này.
+    product_tmpl_id = fields.Many2one(
+        'product.template',
+        string='Combo Product',
+        required=True,
+        ondelete='cascade',
+        index=True
+    )
+    # Đơn vị tính của sản phẩm combo: số lượng thành phần được tính cho 1 đơn vị này.
+    uom_id = fields.Many2one(related='product_tmpl_id.uom_id', string='Unit of Measure')
+
+    line_ids = fields.One2many('sale.combo.template.line', 'template_id', string='Components', copy=True)
+
+    _product_tmpl_unique = models.Constraint(
+        'UNIQUE(product_tmpl_id)', 'Mỗi sản phẩm chỉ có một định mức combo!',
+    )
+
+    @api.model
+    def _get_by_product_templates(self, product_templates, companies=None):
+        """
+        Định mức combo của các sản phẩm, đọc bằng một truy vấn: {product.template id: sale.combo.template}.
+        :param companies: chỉ lấy định mức dùng chung (không có công ty) hoặc của các công ty này.
+            Mỗi sản phẩm chỉ có một định mức: người gọi vẫn phải so công ty của định mức với từng dòng.
+        """
+        if not product_templates:
+            return {}
+        domain = [('product_tmpl_id', 'in', product_templates.ids)]
+        if companies is not None:
+            domain.append(('company_id', 'in', companies.ids + [False]))
+        templates = self.search(domain)
+        return {template.product_tmpl_id.id: template for template in templates}
+
+    def _get_availability(self, warehouses):
+        """Số combo tối đa giao được của các định mức: {template id: {warehouse id: số combo}}."""
+        requirements = {}
+        for template in self:
+            requirement = {}
+            for component in template.line_ids:
+                if component.product_id.is_storable:
+                    quantity = component.uom_id._compute_quantity(component.quantity, component.product_id.uom_id, round=False)
+                    requirement[component.product_id.id] = requirement.get(component.product_id.id, 0.0) + quantity
+            requirements[template.id] = requirement
+        return self._get_combo_availability(requirements, warehouses)
+
+    @api.model
+    def _get_combo_availability(self, requirements, warehouses):
+        """
+        Số combo tối đa giao được theo từng kho = min(tồn khả dụng / số lượng cần cho 1 combo)
+        trên các thành phần. Tồn khả dụng = tồn thực tế (stock.quant, vị trí nội bộ) - phần đã giữ chỗ.
+
+        Một truy vấn tổng hợp duy nhất cho mọi sản phẩm thành phần của mọi combo.
+
+        :param dict requirements: {key: {product id: số lượng cho 1 combo (theo ĐVT của sản phẩm)}}
+            key: id dòng đơn hàng, id định mức...
+        :param warehouses: stock.warehouse
+        :returns: {key: {warehouse id: số combo}}. Combo không có thành phần tồn kho không có
+            trong kết quả: số combo giao được không bị giới hạn (không phải 0).
+        """
+        product_ids = {product_id for requirement in requirements.values() for product_id in requirement}
+        available = {}
+        if product_ids and warehouses:
+            self.env['stock.quant'].flush_model(['product_id', 'location_id', 'quantity', 'reserved_quantity'])
+            self.env['stock.location'].flush_model(['usage', 'warehouse_id'])
+            self.env.cr.execute(SQL(
+                """
+                SELECT q.product_id, l.warehouse_id, SUM(q.quantity - q.reserved_quantity)
+                  FROM stock_quant q
+                  JOIN stock_location l ON l.id = q.location_id
+                 WHERE q.product_id IN %s
+                   AND l.warehouse_id IN %s
+                   AND l.usage = 'internal'
+                 GROUP BY q.product_id, l.warehouse_id
+                """,
+                tuple(product_ids), tuple(warehouses.ids),
+            ))
+            available = {(product_id, warehouse_id): quantity for product_id, warehouse_id, quantity in self.env.cr.fetchall()}
+
+        precision = self.env['decimal.precision'].precision_get('Product Unit of Measure')
+        result = {}
+        for key, requirement in requirements.items():
+            requirement = {product_id: quantity for product_id, quantity in requirement.items() if quantity > 0}
+            if not requirement:
+                continue
+            result[key] = {
+                warehouse.id: max(0, math.floor(float_round(min(
+                    available.get((product_id, warehouse.id), 0.0) / quantity
+                    for product_id, quantity in requirement.items()
+                ), precision_digits=precision)))
+                for warehouse in warehouses
+            }
+        return result
+
+
+class SaleComboTemplateLine(models.Model):
+    _name = 'sale.combo.template.line'
+    _description = 'Combo Template Component'
+    _order = 'template_id, sequence, id'
+
+    template_id = fields.Many2one('sale.combo.template', string='Template', required=True, ondelete='cascade', index=True)
+    sequence = fields.Integer(default=10)
+    product_id = fields.Many2one('product.product', string='Product', required=True)
+    # Số lượng thành phần cho 1 đơn vị sản phẩm combo.
+    quantity = fields.Float(string='Quantity per Unit', default=1.0, required=True, digits='Product Unit of Measure')
+    uom_id = fields.Many2one('uom.uom', string='Unit of Measure', compute='_compute_uom_id', store=True, readonly=False)
+
+    @api.depends('product_id')
+    def _compute_uom_id(self):
+        """Tự động lấy đơn vị tính mặc định của sản phẩm khi chọn sản phẩm."""
+        for line in self:
+            if line.product_id:
+                line.uom_id = line.product_id.uom_id
@@ -1,4 +1,4 @@
-from odoo import models, fields, api, _
+from odoo import models, fields, api, _, Command
 from odoo.exceptions import UserError
 
 # -------------------------------------------------------------------------
@@ -47,10 +47,12 @@ class SaleOrder(models.Model):
     @api.depends('virtual_line_ids.price_subtotal', 'virtual_line_ids.price_tax', 'virtual_line_ids.price_total')
     def _compute_virtual_amounts(self):
         for order in self:
-            # Tính tổng bằng Python sum() dựa trên các dòng con (recordset).
-            amount_untaxed = sum(line.price_subtotal for line in order.virtual_line_ids)
-            amount_tax = sum(line.price_tax for line in order.virtual_line_ids)
-            amount_total = sum(line.price_total for line in order.virtual_line_ids)
+            # Tính tổng trong một lần duyệt các dòng con (recordset).
+            amount_untaxed = amount_tax = amount_total = 0.0
+            for line in order.virtual_line_ids:
+                amount_untaxed += line.price_subtotal
+                amount_tax += line.price_tax
+                amount_total += line.price_total
             
             # Cập nhật giá trị vào record hiện tại.
             order.update({
@@ -64,43 +66,79 @@ class SaleOrder(models.Model):
     # -------------------------------------------------------------------------
 
     def action_copy_to_virtual(self):
-        """Sao chép các dòng bán hàng thật sang danh sách dòng ảo (Virtual Lines)."""
-        self.ensure_one()  # Đảm bảo hàm chỉ chạy trên 1 bản ghi (tránh lỗi singleton).
-        
-        virtual_vals = []
-        # Duyệt qua từng dòng bán hàng thật (order_line)
-        for line in self.order_line:
-            # display_type dùng để phân biệt dòng Ghi chú (Note) hoặc Tiêu đề (Section).
-            # Chúng ta bỏ qua các dòng này.
-            if line.display_type:
-                continue
-            
-            # Chuẩn bị dữ liệu (dictionary) để tạo dòng mới.
-            # (0, 0, {values}) là cú pháp đặc biệt của Odoo One2many để tạo mới record con.
-            virtual_vals.append((0, 0, {
-                'source_line_id': line.id,
-                'product_id': line.product_id.id,
-                'name': line.name,
-                'product_uom_qty': line.product_uom_qty,
-                'product_uom_id': line.product_uom_id.id,
-                'price_unit': line.price_unit,
-                'tax_ids': [(6, 0, line.tax_ids.ids)],  # (6, 0, [ids]) là cú pháp gán danh sách Many2many.
-            }))
-        
-        # self.virtual_line_ids.unlink(): Xóa sạch các dòng ảo cũ trước khi tạo mới.
-        self.virtual_line_ids.unlink()
+        """
+        Đồng bộ các dòng bán hàng thật sang danh sách dòng ảo (Virtual Lines).
+
+        Đồng bộ vi sai (chỉ ghi phần thay đổi), chạy được trên nhiều đơn hàng cùng lúc:
+        - Dòng thật chưa có dòng ảo -> tạo mới (một lệnh create cho tất cả đơn hàng).
+        - Dòng ảo đã có -> chỉ cập nhật các trường đã thay đổi; giá ảo do người dùng sửa
+          (price_overridden) được giữ nguyên.
+        - Dòng ảo không còn dòng thật tương ứng -> xóa.
+        """
+        # Context 'virtual_line_sync': giá ghi bởi đồng bộ không bị coi là giá người dùng sửa.
+        VirtualLine = self.env['sale.order.virtual.line'].with_context(virtual_line_sync=True)
+        create_vals = []
+        orphans = VirtualLine
         
-        # Ghi dữ liệu mới vào database.
-        self.write({'virtual_line_ids': virtual_vals})
+        for order in self:
+            # Ghép dòng ảo với dòng thật qua source_line_id.
+            virtual_by_source = {}
+            for v_line in order.virtual_line_ids:
+                if v_line.source_line_id and v_line.source_line_id.id not in virtual_by_source:
+                    virtual_by_source[v_line.source_line_id.id] = v_line
+                else:
+                    orphans |= v_line  # Dòng thật đã bị xóa (hoặc dòng ảo bị trùng).
+
+            # Duyệt qua từng dòng bán hàng thật (order_line)
+            for line in order.order_line:
+                # display_type dùng để phân biệt dòng Ghi chú (Note) hoặc Tiêu đề (Section).
+                # Chúng ta bỏ qua các dòng này.
+                if line.display_type:
+                    continue
+                v_line = virtual_by_source.pop(line.id, None)
+                if not v_line:
+                    create_vals.append({'order_id': order.id, **line._prepare_virtual_line_vals()})
+                    continue
+                vals = v_line._get_sync_vals(line)
+                if vals:
+                    v_line.with_context(virtual_line_sync=True).write(vals)
+
+            # Dòng thật đã thành dòng Ghi chú/Tiêu đề.
+            for v_line in virtual_by_source.values():
+                orphans |= v_line
+
+        orphans.unlink()
+        if create_vals:
+            VirtualLine.create(create_vals)
 
     # -------------------------------------------------------------------------
     # OVERRIDES (GHI ĐÈ HÀM GỐC)
     # -------------------------------------------------------------------------
 
+    def action_confirm(self):
+        # Thêm thành phần theo định mức combo còn thiếu (hoặc cập nhật số lượng)
+        # cho tất cả đơn hàng trước khi tạo phiếu kho.
+        self.order_line._expand_combo_templates()
+        return super().action_confirm()
+
+    def copy_data(self, default=None):
+        """
+        Nhân bản đơn hàng: dòng con của Combo được tạo lồng trong dòng cha (xem
+        SaleOrderLine.copy_data), nên bỏ bản sao ở cấp đơn hàng (vẫn trỏ tới dòng cha của đơn gốc).
+        """
+        vals_list = super().copy_data(default=default)
+        for vals in vals_list:
+            if vals.get('order_line'):
+                vals['order_line'] = [
+                    command for command in vals['order_line']
+                    if not (command[0] == Command.CREATE and command[2].get('parent_line_id'))
+                ]
+        return vals_list
+
     def _create_invoices(self, grouped=False, final=False, date=None):
         """
         Ghi đè hàm tạo hóa đơn gốc của Odoo.
-        Mục đích: Nếu bật 'apply_virtual_vat', ta sẽ thay thế dòng hóa đơn thật bằng dòng ảo.
+        Mục đích: Nếu bật 'apply_virtual_vat', hóa đơn được lập từ các dòng ảo thay vì dòng thật.
         """
         # self.filtered: Lọc recordset. Tách đơn hàng thường và đơn hàng Virtual VAT.
         virtual_orders = self.filtered('apply_virtual_vat')
@@ -112,47 +150,99 @@ class SaleOrder(models.Model):
         if standard_orders:
             moves += super(SaleOrder, standard_orders)._create_invoices(grouped=grouped, final=final, date=date)
 
-        # 2. Xử lý đơn hàng Virtual VAT
-        for order in virtual_orders:
-            # Kiểm tra logic nghiệp vụ: Không cho phép tạo nhiều hóa đơn nếu dùng tính năng này.
-            if order.invoice_ids.filtered(lambda m: m.state != 'cancel'):
-                 raise UserError(_("Virtual VAT Feature Error: Only one invoice per order is allowed. Existing invoices found for order %s.") % order.name)
+        # 2. Xử lý đơn hàng Virtual VAT: lập hóa đơn hàng loạt (không gọi super cho từng đơn).
+        if virtual_orders:
+            moves += virtual_orders._create_virtual_invoices(grouped=grouped, final=final, date=date)
 
-            # Gọi super để Odoo tạo hóa đơn "nháp" với các thông tin cơ bản (Khách hàng, ngày tháng...).
-            invoice = super(SaleOrder, order)._create_invoices(grouped=grouped, final=final, date=date)
-            
-            if not invoice:
+        return moves
+
+    def _create_virtual_invoices(self, grouped=False, final=False, date=None):
+        """
+        Lập hóa đơn cho nhiều đơn hàng Virtual VAT cùng lúc.
+
+        Dòng hóa đơn được dựng trực tiếp từ các dòng ảo (không tạo rồi xóa dòng gốc),
+        tài khoản doanh thu được xác định một lần cho mỗi sản phẩm, và tất cả hóa đơn
+        được tạo bằng một lệnh account.move.create(vals_list) duy nhất.
+
+        :param bool grouped: True = mỗi đơn hàng một hóa đơn.
+            False = gộp các đơn theo _get_invoice_grouping_keys() (như logic gốc của Odoo).
+        """
+        # Kiểm tra logic nghiệp vụ: Không cho phép tạo nhiều hóa đơn nếu dùng tính năng này.
+        invoiced_orders = self.filtered(lambda order: order.invoice_ids.filtered(lambda m: m.state != 'cancel'))
+        if invoiced_orders:
+            raise UserError(_("Virtual VAT Feature Error: Only one invoice per order is allowed. Existing invoices found for order %s.") % ', '.join(invoiced_orders.mapped('name')))
+
+        # Tìm tài khoản kế toán (Account Income) cho tất cả sản phẩm một lần.
+        accounts = self._get_virtual_income_accounts()
+
+        invoice_vals_list = []
+        for order in self:
+            if not order.virtual_line_ids:
                 continue
-                
-            # QUAN TRỌNG: Xóa các dòng hóa đơn gốc mà Odoo vừa tự tạo.
-            # with_context(check_move_validity=False): Tắt kiểm tra tính hợp lệ tạm thời để xóa nhanh.
-            invoice.invoice_line_ids.with_context(check_move_validity=False).unlink()
+            # _prepare_invoice(): thông tin đầu hóa đơn (Khách hàng, tiền tệ, điều khoản...) như logic gốc.
+            invoice_vals = order._prepare_invoice()
+            if date:
+                invoice_vals['invoice_date'] = date
+            invoice_vals['invoice_line_ids'] = [
+                (0, 0, v_line._prepare_invoice_line(accounts)) for v_line in order.virtual_line_ids
+            ]
+            invoice_vals_list.append(invoice_vals)
+
+        if not invoice_vals_list:
+            raise UserError(self._nothing_to_invoice_error_message())
+
+        if not grouped:
+            invoice_vals_list = self._group_virtual_invoice_vals(invoice_vals_list)
+
+        # Tạo tất cả hóa đơn trong một lệnh (sudo: nhân viên bán hàng được phép lập hóa đơn từ đơn hàng).
+        moves = self.env['account.move'].sudo().with_context(default_move_type='out_invoice').create(invoice_vals_list)
+
+        # Hóa đơn có tổng âm (sau khi trừ tạm ứng) được chuyển thành Credit Note.
+        if final:
+            moves.filtered(lambda m: m.currency_id.round(m.amount_total) < 0).action_switch_move_type()
+
+        for move in moves:
+            move.message_post_with_source(
+                'mail.message_origin_link',
+                render_values={'self': move, 'origin': move.line_ids.sale_line_ids.order_id},
+                subtype_xmlid='mail.mt_note',
+            )
+        return moves
 
-            # Tạo lại các dòng hóa đơn từ dữ liệu Virtual Lines.
-            new_lines_vals = []
-            for v_line in order.virtual_line_ids:
-                # Tìm tài khoản kế toán (Account Income) cho sản phẩm.
-                product = v_line.product_id
+    def _get_virtual_income_accounts(self):
+        """
+        Tài khoản doanh thu của mọi sản phẩm trên các dòng ảo: {(company_id, product_id): account}.
+        Đọc theo từng công ty trên cả recordset sản phẩm (prefetch một lần) thay vì từng dòng.
+        """
+        accounts = {}
+        for company, orders in self.grouped('company_id').items():
+            for product in orders.virtual_line_ids.product_id.with_company(company):
                 account = product.property_account_income_id or product.categ_id.property_account_income_categ_id
                 if not account:
                     raise UserError(_('Please define an income account for product: %s') % product.name)
-
-                vals = {
-                    'name': v_line.name,
-                    'quantity': v_line.product_uom_qty,
-                    'price_unit': v_line.price_unit,
-                    'product_id': v_line.product_id.id,
-                    'product_uom_id': v_line.product_uom_id.id,
-                    'tax_ids': [(6, 0, v_line.tax_ids.ids)],
-                    'account_id': account.id,
-                    # Liên kết ngược lại dòng Sale Line gốc để Odoo cập nhật trạng thái "Đã xuất hóa đơn".
-                    'sale_line_ids': [(6, 0, [v_line.source_line_id.id])] if v_line.source_line_id else [],
-                }
-                new_lines_vals.append((0, 0, vals))
-
-            # Ghi dòng mới vào hóa đơn.
-            invoice.write({'invoice_line_ids': new_lines_vals})
-            
-            moves += invoice
-
-        return moves
+                accounts[company.id, product.id] = account
+        return accounts
+
+    def _group_virtual_invoice_vals(self, invoice_vals_list):
+        """Gộp các hóa đơn có cùng khóa gộp (Công ty, Khách hàng, Tiền tệ...) như logic gốc của Odoo."""
+        grouping_keys = self._get_invoice_grouping_keys()
+        groups = {}
+        for invoice_vals in invoice_vals_list:
+            key = tuple(invoice_vals.get(grouping_key) for grouping_key in grouping_keys)
+            groups.setdefault(key, []).append(invoice_vals)
+
+        new_invoice_vals_list = []
+        for group in groups.values():
+            ref_invoice_vals = group[0]
+            for invoice_vals in group[1:]:
+                ref_invoice_vals['invoice_line_ids'] += invoice_vals['invoice_line_ids']
+            origins = dict.fromkeys(vals['invoice_origin'] for vals in group if vals.get('invoice_origin'))
+            refs = dict.fromkeys(vals['ref'] for vals in group if vals.get('ref'))
+            payment_refs = {vals.get('payment_reference') for vals in group}
+            ref_invoice_vals.update({
+                'ref': ', '.join(refs)[:2000],
+                'invoice_origin': ', '.join(origins),
+                'payment_reference': len(payment_refs) == 1 and payment_refs.pop() or False,
+            })
+            new_invoice_vals_list.append(ref_invoice_vals)
+        return new_invoice_vals_list
@@ -1,5 +1,6 @@
-from odoo import models, fields, api, _
+from odoo import models, fields, api, _, Command
 from odoo.exceptions import UserError
+from odoo.tools import float_compare
 
 # -------------------------------------------------------------------------
 # MODEL: SALE.ORDER.LINE
@@ -36,6 +37,15 @@ class SaleOrderLine(models.Model):
         index=True
     )
     
+    # Thành phần định mức (sale.combo.template.line) đã sinh ra dòng con này.
+    # Dùng để cập nhật số lượng dòng con khi số lượng combo thay đổi.
+    combo_template_line_id = fields.Many2one(
+        'sale.combo.template.line',
+        string='Combo Template Component',
+        ondelete='set null',
+        copy=False
+    )
+    
     # Cờ đánh dấu dòng này là dòng cha (để tô đậm UI).
     # compute: Trường này được tính toán, không lưu cứng (trừ khi có store=True).
     is_combo_parent = fields.Boolean(
@@ -44,6 +54,21 @@ class SaleOrderLine(models.Model):
         help="Technical flag for UI styling to identify parent lines with components."
     )
 
+    # Số combo tối đa giao được từ kho của đơn hàng (tồn thực tế - phần đã giữ chỗ).
+    # Không lưu (store=False): tính lại ở mỗi request, một truy vấn cho cả recordset.
+    combo_available_qty = fields.Float(
+        string='Combo Available',
+        compute='_compute_combo_available_qty',
+        digits='Product Unit of Measure',
+        help="Maximum number of combos deliverable from the order warehouse, based on the stock of the components."
+    )
+    # Combo có ít nhất một thành phần quản lý tồn kho. Nếu không (toàn dịch vụ / hàng tiêu dùng),
+    # số combo giao được không bị giới hạn: cột combo_available_qty được ẩn.
+    combo_stock_tracked = fields.Boolean(
+        string='Combo Stock Tracked',
+        compute='_compute_combo_available_qty',
+    )
+
     # -------------------------------------------------------------------------
     # COMPUTE METHODS
     # -------------------------------------------------------------------------
@@ -54,6 +79,164 @@ class SaleOrderLine(models.Model):
             # Nếu dòng có chứa dòng con (child_line_ids không rỗng) -> Là Parent.
             line.is_combo_parent = bool(line.child_line_ids)
 
+    @api.depends('product_uom_qty', 'order_id.warehouse_id',
+                 'child_line_ids.product_id', 'child_line_ids.product_uom_qty', 'child_line_ids.product_uom_id')
+    def _compute_combo_available_qty(self):
+        availability = self._get_combo_availability()
+        for line in self:
+            line.combo_stock_tracked = line.id in availability
+            line.combo_available_qty = availability.get(line.id, {}).get(line.order_id.warehouse_id.id, 0.0)
+
+    def _get_combo_availability(self):
+        """
+        Số combo tối đa giao được của các dòng Combo (dòng cha), theo kho của đơn hàng:
+        {line id: {warehouse id: số combo}}. Số lượng thành phần cho 1 combo lấy từ các dòng con.
+        Dòng không có thành phần quản lý tồn kho không có trong kết quả (không giới hạn).
+        """
+        requirements = {}
+        for parent in self:
+            if not parent.child_line_ids or not parent.product_uom_qty:
+                continue
+            requirement = {}
+            for child in parent.child_line_ids:
+                product = child.product_id
+                if not product.is_storable:
+                    continue
+                quantity = child.product_uom_id._compute_quantity(child.product_uom_qty, product.uom_id, round=False)
+                requirement[product.id] = requirement.get(product.id, 0.0) + quantity / parent.product_uom_qty
+            requirements[parent.id] = requirement
+        return self.env['sale.combo.template']._get_combo_availability(requirements, self.order_id.warehouse_id)
+
+    # -------------------------------------------------------------------------
+    # CRUD
+    # -------------------------------------------------------------------------
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        # Dòng con tạo lồng trong dòng cha (child_line_ids, vd khi nhân bản đơn hàng, xem copy_data)
+        # không có order_id: lấy theo đơn hàng của dòng cha.
+        for vals in vals_list:
+            if vals.get('parent_line_id') and not vals.get('order_id'):
+                vals['order_id'] = self.browse(vals['parent_line_id']).order_id.id
+        lines = super().create(vals_list)
+        # Tự động thêm thành phần cho các dòng Combo có định mức (một lệnh create cho tất cả),
+        # trừ các dòng được tạo kèm sẵn thành phần.
+        if not self.env.context.get('skip_combo_expansion'):
+            lines.browse([
+                line.id for line, vals in zip(lines, vals_list) if not vals.get('child_line_ids')
+            ])._expand_combo_templates()
+        return lines
+
+    def copy_data(self, default=None):
+        """
+        Dòng Combo được nhân bản cùng các thành phần của nó (lồng trong child_line_ids),
+        để dòng con trỏ tới dòng cha MỚI thay vì dòng cha của đơn gốc.
+        Các dòng con ở cấp đơn hàng bị bỏ qua khi nhân bản đơn (xem SaleOrder.copy_data).
+        """
+        default = dict(default or {})
+        vals_list = super().copy_data(default=default)
+        if 'child_line_ids' in default:
+            return vals_list
+        for line, vals in zip(self, vals_list):
+            if not line.child_line_ids:
+                continue
+            children_vals = line.child_line_ids.copy_data()
+            for child, child_vals in zip(line.child_line_ids, children_vals):
+                # Đơn hàng và dòng cha được gán khi tạo (xem create()); giữ liên kết định mức.
+                child_vals.pop('order_id', None)
+                child_vals.pop('parent_line_id', None)
+                child_vals['combo_template_line_id'] = child.combo_template_line_id.id
+            vals['child_line_ids'] = [Command.create(child_vals) for child_vals in children_vals]
+        return vals_list
+
+    def write(self, vals):
+        res = super().write(vals)
+        # Đổi số lượng combo -> cập nhật số lượng các dòng con theo định mức.
+        if 'product_uom_qty' in vals and not self.env.context.get('skip_combo_expansion'):
+            self._expand_combo_templates()
+        return res
+
+    # -------------------------------------------------------------------------
+    # COMBO TEMPLATES (ĐỊNH MỨC COMBO)
+    # -------------------------------------------------------------------------
+
+    def _get_combo_templates(self):
+        """
+        Định mức combo của các dòng (không tính dòng con): {sale.order.line id: sale.combo.template}.
+        Định mức của một công ty chỉ áp dụng cho các dòng của công ty đó.
+        """
+        parents = self.filtered(lambda line: not line.is_combo_child and not line.display_type and line.product_id)
+        templates = self.env['sale.combo.template']._get_by_product_templates(
+            parents.product_id.product_tmpl_id, parents.company_id,
+        )
+        result = {}
+        for line in parents:
+            template = templates.get(line.product_id.product_tmpl_id.id)
+            if template and (not template.company_id or template.company_id == line.company_id):
+                result[line.id] = template
+        return result
+
+    def _get_combo_quantity(self):
+        """Số lượng combo của dòng, quy về đơn vị tính của sản phẩm combo (đơn vị của định mức)."""
+        self.ensure_one()
+        return self.product_uom_id._compute_quantity(self.product_uom_qty, self.product_id.uom_id, round=False)
+
+    def _expand_combo_templates(self):
+        """
+        Tạo (hoặc cập nhật số lượng) các dòng con theo định mức combo, cho mọi dòng Combo
+        của self (có thể thuộc nhiều đơn hàng) trong MỘT lệnh create(vals_list).
+
+        Số lượng thành phần = số lượng combo (quy về đơn vị tính của sản phẩm combo) x số lượng
+        định mức. Dòng cha đã có thành phần chọn tay (Wizard) được giữ nguyên.
+        :returns: các dòng con vừa tạo.
+        """
+        templates = self._get_combo_templates()
+        if not templates:
+            return self.browse()
+
+        precision = self.env['decimal.precision'].precision_get('Product Unit of Measure')
+        vals_list = []
+        # Các recordset dưới đây dùng chung prefetch: đơn vị tính, định mức, dòng con...
+        # được đọc một lần cho tất cả dòng thay vì từng dòng.
+        for parent in self:
+            template = templates.get(parent.id)
+            if not template:
+                continue
+            existing = {child.combo_template_line_id.id: child for child in parent.child_line_ids if child.combo_template_line_id}
+            if parent.child_line_ids and not existing:
+                continue
+            combo_qty = parent._get_combo_quantity()
+            sequence = parent.sequence
+            for component in template.line_ids:
+                sequence += 1
+                quantity = combo_qty * component.quantity
+                child = existing.get(component.id)
+                if not child:
+                    vals = parent._prepare_combo_child_vals(component.product_id, quantity, component.uom_id, sequence)
+                    vals['combo_template_line_id'] = component.id
+                    vals_list.append(vals)
+                elif float_compare(child.product_uom_qty, quantity, precision_digits=precision):
+                    child.product_uom_qty = quantity
+
+        return self.create(vals_list) if vals_list else self.browse()
+
+    def _prepare_combo_child_vals(self, product, quantity, uom, sequence):
+        """Dữ liệu tạo một dòng con (thành phần) cho dòng Combo này."""
+        self.ensure_one()
+        return {
+            'order_id': self.order_id.id,       # Thuộc cùng đơn hàng với cha.
+            'parent_line_id': self.id,          # Link với cha.
+            'is_combo_child': True,             # Đánh dấu là con.
+            'product_id': product.id,
+            # Thêm dấu thụt đầu dòng (indentation) để đẹp UI.
+            'name': "  ↳ " + (product.description_sale or product.name),
+            'product_uom_qty': quantity,
+            'product_uom_id': uom.id,
+            'price_unit': 0.0,                  # Giá bằng 0 (vì giá nằm ở cha).
+            'tax_ids': [(6, 0, [])],            # Không chịu thuế (thuế nằm ở cha).
+            'sequence': sequence,
+        }
+
     # -------------------------------------------------------------------------
     # STOCK LOGIC (QUAN TRỌNG)
     # -------------------------------------------------------------------------
@@ -69,11 +252,33 @@ class SaleOrderLine(models.Model):
         # Lọc ra các dòng cần xử lý kho:
         # Chỉ giữ lại dòng KHÔNG phải là Combo Parent (tức là dòng thường hoặc dòng con).
         # Combo Parent (có child_line_ids) sẽ bị loại bỏ khỏi danh sách 'lines_to_process'.
-        lines_to_process = self.filtered(lambda line: not line.child_line_ids)
+        # Dòng Combo có định mức cũng bị loại bỏ ngay cả khi chưa có dòng con
+        # (dòng con được tạo ngay sau khi tạo dòng cha, xem create()).
+        templates = self._get_combo_templates()
+        lines_to_process = self.filtered(lambda line: not line.child_line_ids and (
+            line.is_combo_child or line.id not in templates
+        ))
         
         # Gọi hàm gốc (super) với danh sách đã lọc.
         return super(SaleOrderLine, lines_to_process)._action_launch_stock_rule(previous_product_uom_qty=previous_product_uom_qty)
 
+    # -------------------------------------------------------------------------
+    # VIRTUAL VAT
+    # -------------------------------------------------------------------------
+
+    def _prepare_virtual_line_vals(self):
+        """Dữ liệu để tạo dòng ảo (Virtual VAT Line) từ dòng bán hàng này."""
+        self.ensure_one()
+        return {
+            'source_line_id': self.id,
+            'product_id': self.product_id.id,
+            'name': self.name,
+            'product_uom_qty': self.product_uom_qty,
+            'product_uom_id': self.product_uom_id.id,
+            'price_unit': self.price_unit,
+            'tax_ids': [(6, 0, self.tax_ids.ids)],  # (6, 0, [ids]) là cú pháp gán danh sách Many2many.
+        }
+
     # -------------------------------------------------------------------------
     # UI ACTIONS
     # -------------------------------------------------------------------------
@@ -81,11 +286,22 @@ class SaleOrderLine(models.Model):
     def action_open_combo_wizard(self):
         """Mở Wizard để chọn thành phần combo cho dòng hiện tại."""
         self.ensure_one()
+        context = {'default_sale_order_line_id': self.id} # Truyền ID dòng hiện tại vào wizard.
+        # Có định mức combo (và chưa có thành phần) -> điền sẵn các thành phần (người dùng vẫn có thể sửa).
+        template = not self.child_line_ids and self._get_combo_templates().get(self.id)
+        if template:
+            # Số lượng định mức tính cho 1 đơn vị của sản phẩm combo, như _expand_combo_templates.
+            combo_qty = self._get_combo_quantity()
+            context['default_line_ids'] = [(0, 0, {
+                'product_id': component.product_id.id,
+                'quantity': component.quantity * combo_qty,
+                'uom_id': component.uom_id.id,
+            }) for component in template.line_ids]
         return {
             'type': 'ir.actions.act_window', # Kiểu action: Mở cửa sổ.
             'name': _('Add Combo Components'), # Tiêu đề cửa sổ.
             'res_model': 'sale.combo.wizard',  # Model của Wizard.
             'view_mode': 'form',
             'target': 'new', # Mở dạng popup (modal).
-            'context': {'default_sale_order_line_id': self.id}, # Truyền ID dòng hiện tại vào wizard.
+            'context': context,
         }
@@ -1,3 +1,5 @@
+from collections import defaultdict
+
 from odoo import models, fields, api
 
 class SaleOrderVirtualLine(models.Model):
@@ -14,6 +16,11 @@ class SaleOrderVirtualLine(models.Model):
     product_uom_id = fields.Many2one('uom.uom', string='Unit of Measure')
     
     price_unit = fields.Float(string='Virtual Unit Price', digits='Product Price', default=0.0)
+    price_overridden = fields.Boolean(
+        string='Price Overridden',
+        copy=False,
+        help="Set when the virtual price is edited by hand: it is then kept when syncing with the real lines.",
+    )
     tax_ids = fields.Many2many('account.tax', string='Taxes')
     
     price_subtotal = fields.Monetary(compute='_compute_amount', string='Subtotal', store=True)
@@ -25,16 +32,81 @@ class SaleOrderVirtualLine(models.Model):
 
     @api.depends('product_uom_qty', 'price_unit', 'tax_ids')
     def _compute_amount(self):
+        # Cùng bộ máy tính thuế với sale.order.line (base line của account.tax), nhưng tính
+        # thuế cho cả lô dòng của mỗi công ty trong một lần gọi thay vì compute_all từng dòng.
+        AccountTax = self.env['account.tax']
+        lines_by_company = defaultdict(list)
         for line in self:
-            taxes = line.tax_ids.compute_all(
-                line.price_unit, 
-                line.order_id.currency_id, 
-                line.product_uom_qty, 
-                product=line.product_id, 
-                partner=line.order_id.partner_shipping_id
-            )
-            line.update({
-                'price_tax': sum(t.get('amount', 0.0) for t in taxes.get('taxes', [])),
-                'price_total': taxes.get('total_included'),
-                'price_subtotal': taxes.get('total_excluded'),
-            })
\ No newline at end of file
+            lines_by_company[line.order_id.company_id or self.env.company].append(line)
+        for company, lines in lines_by_company.items():
+            base_lines = [line._prepare_base_line_for_taxes_computation() for line in lines]
+            AccountTax._add_tax_details_in_base_lines(base_lines, company)
+            for line, base_line in zip(lines, base_lines):
+                # Làm tròn theo từng dòng như sale.order.line._compute_amount (kết quả giống compute_all).
+                AccountTax._round_base_lines_tax_details([base_line], company)
+                tax_details = base_line['tax_details']
+                line.price_subtotal = tax_details['total_excluded_currency']
+                line.price_total = tax_details['total_included_currency']
+                line.price_tax = line.price_total - line.price_subtotal
+
+    def _prepare_base_line_for_taxes_computation(self, **kwargs):
+        """Base line (xem account.tax) của dòng ảo, giống sale.order.line."""
+        self.ensure_one()
+        order = self.order_id
+        return self.env['account.tax']._prepare_base_line_for_taxes_computation(
+            self,
+            **{
+                'tax_ids': self.tax_ids,
+                'quantity': self.product_uom_qty,
+                'partner_id': order.partner_shipping_id,
+                'currency_id': order.currency_id or order.company_id.currency_id,
+                'rate': order.currency_rate,
+                **kwargs,
+            },
+        )
+
+    def write(self, vals):
+        # Giá sửa tay (không phải do đồng bộ từ dòng thật) được đánh dấu để giữ lại khi đồng bộ.
+        if 'price_unit' in vals and 'price_overridden' not in vals and not self.env.context.get('virtual_line_sync'):
+            vals = dict(vals, price_overridden=True)
+        return super().write(vals)
+
+    def _get_sync_vals(self, source_line):
+        """Các trường cần cập nhật để dòng ảo khớp với dòng thật (rỗng nếu không có gì thay đổi)."""
+        self.ensure_one()
+        vals = {}
+        product_changed = self.product_id != source_line.product_id
+        if product_changed:
+            # Mô tả chỉ đi theo khi đổi sản phẩm: mô tả sửa tay trên dòng ảo được giữ lại.
+            vals['product_id'] = source_line.product_id.id
+            vals['name'] = source_line.name
+            # Giá sửa tay là giá của sản phẩm cũ: bỏ đánh dấu và lấy lại giá của dòng thật.
+            if self.price_overridden:
+                vals['price_overridden'] = False
+        if self.product_uom_qty != source_line.product_uom_qty:
+            vals['product_uom_qty'] = source_line.product_uom_qty
+        if self.product_uom_id != source_line.product_uom_id:
+            vals['product_uom_id'] = source_line.product_uom_id.id
+        if self.tax_ids != source_line.tax_ids:
+            vals['tax_ids'] = [(6, 0, source_line.tax_ids.ids)]
+        if (product_changed or not self.price_overridden) and self.price_unit != source_line.price_unit:
+            vals['price_unit'] = source_line.price_unit
+        return vals
+
+    def _prepare_invoice_line(self, accounts):
+        """
+        Giá trị dòng hóa đơn của dòng ảo.
+        :param dict accounts: {(company_id, product_id): account}, xem SaleOrder._get_virtual_income_accounts()
+        """
+        self.ensure_one()
+        return {
+            'name': self.name,
+            'quantity': self.product_uom_qty,
+            'price_unit': self.price_unit,
+            'product_id': self.product_id.id,
+            'product_uom_id': self.product_uom_id.id,
+            'tax_ids': [(6, 0, self.tax_ids.ids)],
+            'account_id': accounts[self.order_id.company_id.id, self.product_id.id].id,
+            # Liên kết ngược lại dòng Sale Line gốc để Odoo cập nhật trạng thái "Đã xuất hóa đơn".
+            'sale_line_ids': [(6, 0, [self.source_line_id.id])] if self.source_line_id else [],
+        }
@@ -1 +1,2 @@
-from . import test_combo_stock
\ No newline at end of file
+from . import test_combo_stock
+from . import test_virtual_vat
\ No newline at end of file
@@ -1,4 +1,7 @@
+from psycopg2 import IntegrityError
+
 from odoo.tests.common import TransactionCase, tagged
+from odoo.tools import mute_logger
 
 @tagged('post_install', '-at_install')
 class TestComboStock(TransactionCase):
@@ -10,13 +13,15 @@ class TestComboStock(TransactionCase):
         
         self.product_parent = self.env['product.product'].create({
             'name': 'Combo Parent (Storable)',
-            'type': 'product', 
+            'type': 'consu',
+            'is_storable': True,
             'list_price': 100.0,
         })
 
         self.product_child = self.env['product.product'].create({
             'name': 'Combo Child (Storable)',
-            'type': 'product',
+            'type': 'consu',
+            'is_storable': True,
             'list_price': 50.0,
         })
         
@@ -127,4 +132,210 @@ class TestComboStock(TransactionCase):
         
         self.product_child.invalidate_recordset()
         qty_available = self.product_child.qty_available
-        self.assertEqual(qty_available, 8.0, "Inventory should be deducted by the child line quantity")
\ No newline at end of file
+        self.assertEqual(qty_available, 8.0, "Inventory should be deducted by the child line quantity")
+
+    def _create_combo_template(self, quantity=3.0):
+        return self.env['sale.combo.template'].create({
+            'name': 'Combo Template',
+            'product_tmpl_id': self.product_parent.product_tmpl_id.id,
+            'line_ids': [(0, 0, {'product_id': self.product_child.id, 'quantity': quantity})],
+        })
+
+    def test_combo_template_expansion(self):
+        self._create_combo_template(quantity=3.0)
+        orders = self.SaleOrder.create([{
+            'partner_id': self.partner.id,
+            'order_line': [(0, 0, {
+                'product_id': self.product_parent.id,
+                'product_uom_qty': 1.0 + i,
+                'price_unit': 100.0,
+            }) for i in range(5)],
+        } for _ in range(20)])
+
+        parents = orders.order_line.filtered(lambda l: not l.is_combo_child)
+        children = orders.order_line.filtered('is_combo_child')
+        self.assertEqual(len(parents), 100)
+        self.assertEqual(len(children), 100, "Each combo line should get its components")
+        for parent in parents:
+            self.assertEqual(len(parent.child_line_ids), 1)
+            self.assertEqual(parent.child_line_ids.product_id, self.product_child)
+            self.assertEqual(parent.child_line_ids.product_uom_qty, 3.0 * parent.product_uom_qty, "Components scale with the combo quantity")
+            self.assertEqual(parent.child_line_ids.price_unit, 0.0)
+            self.assertFalse(parent.child_line_ids.tax_ids)
+
+        parent = parents[0]
+        parent.product_uom_qty = 10.0
+        self.assertEqual(parent.child_line_ids.product_uom_qty, 30.0, "Changing the combo quantity rescales the components")
+
+    def test_combo_template_expansion_on_confirm(self):
+        so = self.SaleOrder.create({'partner_id': self.partner.id})
+        parent_line = self.SaleOrderLine.create({
+            'order_id': so.id,
+            'product_id': self.product_parent.id,
+            'product_uom_qty': 2.0,
+            'price_unit': 100.0,
+        })
+        self.assertFalse(parent_line.child_line_ids)
+
+        # Định mức tạo sau dòng cha: thành phần được thêm khi xác nhận đơn
+        self._create_combo_template(quantity=2.0)
+        so.action_confirm()
+
+        self.assertEqual(parent_line.child_line_ids.product_uom_qty, 4.0)
+        moves = so.picking_ids.move_ids
+        self.assertEqual(moves.product_id, self.product_child, "Only the components should be delivered")
+        self.assertEqual(moves.product_uom_qty, 4.0)
+
+    def test_copy_order_with_combo(self):
+        template = self._create_combo_template(quantity=3.0)
+        manual_parent_product = self.env['product.product'].create({'name': 'Manual Combo', 'type': 'consu'})
+        so = self.SaleOrder.create({
+            'partner_id': self.partner.id,
+            'order_line': [
+                (0, 0, {'product_id': self.product_parent.id, 'product_uom_qty': 2.0, 'price_unit': 100.0}),
+                (0, 0, {'product_id': manual_parent_product.id, 'product_uom_qty': 1.0, 'price_unit': 80.0}),
+            ],
+        })
+        # Combo không có định mức: thành phần chọn tay qua Wizard.
+        manual_parent = so.order_line.filtered(lambda l: l.product_id == manual_parent_product)
+        self.env['sale.combo.wizard'].create({
+            'sale_order_line_id': manual_parent.id,
+            'line_ids': [(0, 0, {'product_id': self.product_child.id, 'quantity': 4.0})],
+        }).action_add_components()
+
+        copy = so.copy()
+
+        self.assertEqual(len(copy.order_line), 4, "Components are copied once, not copied and expanded again")
+        self.assertEqual(len(so.order_line), 4)
+        for parent in copy.order_line.filtered(lambda l: not l.is_combo_child):
+            self.assertEqual(len(parent.child_line_ids), 1)
+            self.assertEqual(parent.child_line_ids.order_id, copy)
+        self.assertEqual(copy.order_line.filtered('is_combo_child').parent_line_id.order_id, copy)
+        template_child = copy.order_line.filtered(lambda l: l.parent_line_id.product_id == self.product_parent)
+        self.assertEqual(template_child.product_uom_qty, 6.0)
+        self.assertEqual(template_child.combo_template_line_id, template.line_ids)
+        manual_child = copy.order_line.filtered(lambda l: l.parent_line_id.product_id == manual_parent_product)
+        self.assertEqual(manual_child.product_uom_qty, 4.0)
+
+        # Dòng con vẫn theo định mức sau khi nhân bản.
+        template_child.parent_line_id.product_uom_qty = 3.0
+        self.assertEqual(template_child.product_uom_qty, 9.0)
+
+    def test_combo_wizard_prefill_uom(self):
+        self._create_combo_template(quantity=3.0)
+        so = self.SaleOrder.create({'partner_id': self.partner.id})
+        # Dòng cha tạo không qua định mức (skip_combo_expansion) để Wizard điền sẵn thành phần.
+        parent_line = self.SaleOrderLine.with_context(skip_combo_expansion=True).create({
+            'order_id': so.id,
+            'product_id': self.product_parent.id,
+            'product_uom_id': self.env.ref('uom.product_uom_dozen').id,
+            'product_uom_qty': 2.0,
+            'price_unit': 100.0,
+        })
+        context = parent_line.action_open_combo_wizard()['context']
+        self.assertEqual(context['default_line_ids'][0][2]['quantity'], 72.0, "2 dozens x 3 components per unit")
+
+    def test_combo_template_company(self):
+        other_company = self.env['res.company'].create({'name': 'Other Company'})
+        template = self._create_combo_template(quantity=3.0)
+        template.company_id = other_company
+        so = self.SaleOrder.create({
+            'partner_id': self.partner.id,
+            'order_line': [(0, 0, {'product_id': self.product_parent.id, 'product_uom_qty': 1.0, 'price_unit': 100.0})],
+        })
+        self.assertFalse(so.order_line.child_line_ids, "A template of another company does not apply")
+
+        template.company_id = False
+        so.action_confirm()
+        self.assertEqual(so.order_line.child_line_ids.product_uom_qty, 3.0, "A shared template applies to every company")
+
+    def test_combo_template_unique_per_product(self):
+        self._create_combo_template(quantity=1.0)
+        with self.assertRaises(IntegrityError), mute_logger('odoo.sql_db'):
+            self._create_combo_template(quantity=2.0)
+
+    def test_combo_availability_large_order(self):
+        warehouse = self.env.ref('stock.warehouse0')
+        component_a = self.env['product.product'].create({'name': 'Component A', 'type': 'consu', 'is_storable': True})
+        component_b = self.env['product.product'].create({'name': 'Component B', 'type': 'consu', 'is_storable': True})
+        template = self.env['sale.combo.template'].create({
+            'name': 'Combo A + B',
+            'product_tmpl_id': self.product_parent.product_tmpl_id.id,
+            'line_ids': [
+                (0, 0, {'product_id': component_a.id, 'quantity': 2.0}),
+                (0, 0, {'product_id': component_b.id, 'quantity': 1.0}),
+            ],
+        })
+        self.StockQuant._update_available_quantity(component_a, warehouse.lot_stock_id, 100.0)
+        self.StockQuant._update_available_quantity(component_b, warehouse.lot_stock_id, 45.0)
+
+        so = self.SaleOrder.create({
+            'partner_id': self.partner.id,
+            'warehouse_id': warehouse.id,
+            'order_line': [(0, 0, {
+                'product_id': self.product_parent.id,
+                'product_uom_qty': 1.0 + i % 3,
+                'price_unit': 100.0,
+            }) for i in range(300)],
+        })
+        parents = so.order_line.filtered(lambda l: not l.is_combo_child)
+        self.assertEqual(len(parents), 300)
+        self.assertEqual(len(so.order_line), 900)
+
+        # min(100 / 2, 45 / 1) = 45 combo, với mọi số lượng combo trên dòng
+        parents.invalidate_recordset(['combo_available_qty'])
+        self.assertEqual(set(parents.mapped('combo_available_qty')), {45.0})
+        self.assertEqual(template._get_availability(warehouse), {template.id: {warehouse.id: 45}})
+
+        # Phần đã giữ chỗ không còn khả dụng: (45 - 5) / 1 = 40, 100 / 2 = 50
+        self.StockQuant._update_reserved_quantity(component_b, warehouse.lot_stock_id, 5.0)
+        parents.invalidate_recordset(['combo_available_qty'])
+        self.assertEqual(set(parents.mapped('combo_available_qty')), {40.0})
+
+        # Lines without components (or non combo lines) have no availability
+        self.assertFalse(any(so.order_line.filtered('is_combo_child').mapped('combo_available_qty')))
+
+    def test_combo_availability_per_warehouse(self):
+        warehouse = self.env.ref('stock.warehouse0')
+        other_warehouse = self.env['stock.warehouse'].create({'name': 'Second Warehouse', 'code': 'WH2'})
+        component = self.env['product.product'].create({'name': 'Component', 'type': 'consu', 'is_storable': True})
+        self.StockQuant._update_available_quantity(component, warehouse.lot_stock_id, 7.0)
+        self.StockQuant._update_available_quantity(component, other_warehouse.lot_stock_id, 20.0)
+
+        template = self.env['sale.combo.template'].create({
+            'name': 'Combo',
+            'product_tmpl_id': self.product_parent.product_tmpl_id.id,
+            'line_ids': [(0, 0, {'product_id': component.id, 'quantity': 3.0})],
+        })
+        availability = template._get_availability(warehouse | other_warehouse)
+        self.assertEqual(availability[template.id], {warehouse.id: 2, other_warehouse.id: 6})
+
+        so = self.SaleOrder.create({
+            'partner_id': self.partner.id,
+            'warehouse_id': other_warehouse.id,
+            'order_line': [(0, 0, {'product_id': self.product_parent.id, 'product_uom_qty': 2.0, 'price_unit': 100.0})],
+        })
+        parent = so.order_line.filtered(lambda l: not l.is_combo_child)
+        self.assertEqual(parent.combo_available_qty, 6.0, "Availability follows the warehouse of the order")
+
+    def test_combo_availability_without_stock_components(self):
+        service = self.env['product.product'].create({'name': 'Installation', 'type': 'service'})
+        consumable = self.env['product.product'].create({'name': 'Cable', 'type': 'consu'})
+        self.env['sale.combo.template'].create({
+            'name': 'Combo',
+            'product_tmpl_id': self.product_parent.product_tmpl_id.id,
+            'line_ids': [(0, 0, {'product_id': service.id}), (0, 0, {'product_id': consumable.id, 'quantity': 2.0})],
+        })
+        so = self.SaleOrder.create({
+            'partner_id': self.partner.id,
+            'order_line': [(0, 0, {'product_id': self.product_parent.id, 'product_uom_qty': 5.0, 'price_unit': 100.0})],
+        })
+        parent = so.order_line.filtered('is_combo_parent')
+        self.assertEqual(len(parent.child_line_ids), 2)
+        self.assertFalse(parent.combo_stock_tracked, "No stock-tracked component: availability is unlimited")
+
+        # Thêm một thành phần quản lý tồn kho (chưa có tồn) -> giới hạn bởi thành phần đó.
+        self.SaleOrderLine.create(parent._prepare_combo_child_vals(self.product_child, 5.0, self.product_child.uom_id, 20))
+        parent.invalidate_recordset(['combo_stock_tracked', 'combo_available_qty'])
+        self.assertTrue(parent.combo_stock_tracked)
+        self.assertEqual(parent.combo_available_qty, 0.0)
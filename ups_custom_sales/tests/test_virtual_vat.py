@@ -0,0 +1,162 @@
+from odoo.exceptions import UserError
+from odoo.tests.common import TransactionCase, tagged
+
+@tagged('post_install', '-at_install')
+class TestVirtualVat(TransactionCase):
+    def setUp(self):
+        super(TestVirtualVat, self).setUp()
+        self.SaleOrder = self.env['sale.order']
+
+        self.product = self.env['product.product'].create({
+            'name': 'Virtual VAT Product',
+            'type': 'consu',
+            'list_price': 100.0,
+            'invoice_policy': 'order',
+        })
+        self.partner = self.env['res.partner'].create({'name': 'Test Partner'})
+
+    def _create_virtual_order(self, partner=None, price_unit=100.0, qty=2.0):
+        so = self.SaleOrder.create({
+            'partner_id': (partner or self.partner).id,
+            'apply_virtual_vat': True,
+            'order_line': [(0, 0, {
+                'product_id': self.product.id,
+                'product_uom_qty': qty,
+                'price_unit': price_unit,
+            })],
+        })
+        so.action_confirm()
+        so.action_copy_to_virtual()
+        return so
+
+    def test_bulk_virtual_invoicing(self):
+        orders = self.SaleOrder
+        for i in range(5):
+            so = self._create_virtual_order()
+            so.virtual_line_ids.price_unit = 60.0 + i
+            orders |= so
+
+        invoices = orders._create_invoices(grouped=True)
+
+        self.assertEqual(len(invoices), 5, "One invoice per order when grouped")
+        for so in orders:
+            invoice = so.invoice_ids
+            self.assertEqual(len(invoice), 1, "Each order should have exactly one invoice")
+            self.assertEqual(len(invoice.invoice_line_ids), 1, "Invoice lines come from the virtual lines only")
+            self.assertEqual(invoice.invoice_line_ids.price_unit, so.virtual_line_ids.price_unit, "Virtual price expected")
+            self.assertEqual(invoice.invoice_line_ids.quantity, 2.0)
+            self.assertEqual(invoice.invoice_line_ids.sale_line_ids, so.order_line, "Invoice line should link to the source line")
+            self.assertEqual(so.invoice_status, 'invoiced')
+
+    def test_grouped_virtual_invoicing(self):
+        orders = self._create_virtual_order() | self._create_virtual_order()
+        other_partner_order = self._create_virtual_order(partner=self.env['res.partner'].create({'name': 'Other Partner'}))
+
+        invoices = (orders | other_partner_order)._create_invoices()
+
+        self.assertEqual(len(invoices), 2, "Orders of the same customer should be invoiced together")
+        grouped_invoice = orders.invoice_ids
+        self.assertEqual(len(grouped_invoice), 1)
+        self.assertEqual(len(grouped_invoice.invoice_line_ids), 2)
+        for so in orders:
+            self.assertIn(so.name, grouped_invoice.invoice_origin)
+
+    def test_virtual_invoice_once(self):
+        so = self._create_virtual_order()
+        so._create_invoices()
+        with self.assertRaises(UserError):
+            so._create_invoices()
+
+    def test_virtual_amounts_match_compute_all(self):
+        tax_excluded = self.env['account.tax'].create({'name': 'Tax 10%', 'amount': 10.0, 'amount_type': 'percent'})
+        tax_included = self.env['account.tax'].create({
+            'name': 'Tax 8% incl.', 'amount': 8.0, 'amount_type': 'percent', 'price_include_override': 'tax_included',
+        })
+        so = self.SaleOrder.create({'partner_id': self.partner.id, 'apply_virtual_vat': True})
+        lines_vals = []
+        for i in range(60):
+            lines_vals.append((0, 0, {
+                'product_id': self.product.id,
+                'name': 'Line %s' % i,
+                'product_uom_qty': 1.0 + i % 3,
+                'price_unit': 33.33 + i % 4,
+                'tax_ids': [(6, 0, (tax_excluded if i % 2 else tax_included).ids)],
+            }))
+        so.write({'virtual_line_ids': lines_vals})
+
+        for line in so.virtual_line_ids:
+            taxes = line.tax_ids.compute_all(
+                line.price_unit, so.currency_id, line.product_uom_qty, product=line.product_id, partner=so.partner_shipping_id,
+            )
+            self.assertEqual(line.price_subtotal, taxes['total_excluded'])
+            self.assertEqual(line.price_total, taxes['total_included'])
+            self.assertEqual(line.price_tax, sum(t['amount'] for t in taxes['taxes']))
+
+        self.assertAlmostEqual(so.virtual_amount_untaxed, sum(so.virtual_line_ids.mapped('price_subtotal')))
+        self.assertAlmostEqual(so.virtual_amount_total, sum(so.virtual_line_ids.mapped('price_total')))
+
+        # Sửa giá hàng loạt: các dòng được tính lại theo giá mới
+        so.virtual_line_ids.filtered(lambda l: l.tax_ids == tax_excluded).price_unit = 200.0
+        line = so.virtual_line_ids.filtered(lambda l: l.tax_ids == tax_excluded)[0]
+        self.assertAlmostEqual(line.price_subtotal, 200.0 * line.product_uom_qty)
+        self.assertAlmostEqual(line.price_total, 220.0 * line.product_uom_qty)
+
+    def test_differential_virtual_sync(self):
+        product_b = self.env['product.product'].create({'name': 'Product B', 'type': 'consu'})
+        so = self.SaleOrder.create({
+            'partner_id': self.partner.id,
+            'apply_virtual_vat': True,
+            'order_line': [
+                (0, 0, {'product_id': self.product.id, 'product_uom_qty': 1.0, 'price_unit': 100.0}),
+                (0, 0, {'product_id': product_b.id, 'product_uom_qty': 2.0, 'price_unit': 50.0}),
+                (0, 0, {'product_id': product_b.id, 'product_uom_qty': 3.0, 'price_unit': 10.0}),
+            ],
+        })
+        line_a, line_b, line_c = so.order_line
+        so.action_copy_to_virtual()
+        self.assertEqual(len(so.virtual_line_ids), 3)
+        self.assertFalse(any(so.virtual_line_ids.mapped('price_overridden')))
+
+        virtual_a = so.virtual_line_ids.filtered(lambda l: l.source_line_id == line_a)
+        virtual_b = so.virtual_line_ids.filtered(lambda l: l.source_line_id == line_b)
+        # Giá ảo sửa tay
+        virtual_a.price_unit = 80.0
+        self.assertTrue(virtual_a.price_overridden)
+
+        line_a.write({'product_uom_qty': 4.0, 'price_unit': 120.0})
+        line_b.price_unit = 55.0
+        line_c.unlink()
+        line_d = self.env['sale.order.line'].create({
+            'order_id': so.id, 'product_id': self.product.id, 'product_uom_qty': 1.0, 'price_unit': 30.0,
+        })
+        so.action_copy_to_virtual()
+
+        self.assertEqual(len(so.virtual_line_ids), 3, "Orphaned virtual line should be removed")
+        self.assertEqual(so.virtual_line_ids.source_line_id, line_a | line_b | line_d)
+        self.assertIn(virtual_a, so.virtual_line_ids, "Matched virtual lines are updated in place")
+        self.assertEqual(virtual_a.product_uom_qty, 4.0)
+        self.assertEqual(virtual_a.price_unit, 80.0, "Price edited by hand must be kept")
+        self.assertIn(virtual_b, so.virtual_line_ids)
+        self.assertEqual(virtual_b.price_unit, 55.0, "Price not edited follows the real line")
+        virtual_d = so.virtual_line_ids.filtered(lambda l: l.source_line_id == line_d)
+        self.assertEqual(virtual_d.price_unit, 30.0)
+
+        # Đổi sản phẩm: giá sửa tay của sản phẩm cũ không được giữ.
+        line_a.write({'product_id': product_b.id, 'price_unit': 45.0})
+        so.action_copy_to_virtual()
+        self.assertEqual(virtual_a.product_id, product_b)
+        self.assertEqual(virtual_a.price_unit, 45.0)
+        self.assertFalse(virtual_a.price_overridden)
+
+    def test_virtual_sync_many_orders(self):
+        orders = self.SaleOrder
+        for i in range(3):
+            orders |= self.SaleOrder.create({
+                'partner_id': self.partner.id,
+                'apply_virtual_vat': True,
+                'order_line': [(0, 0, {'product_id': self.product.id, 'product_uom_qty': 1.0 + i, 'price_unit': 10.0})],
+            })
+        orders.action_copy_to_virtual()
+        for so in orders:
+            self.assertEqual(so.virtual_line_ids.source_line_id, so.order_line)
+            self.assertEqual(so.virtual_amount_untaxed, so.virtual_line_ids.price_subtotal)
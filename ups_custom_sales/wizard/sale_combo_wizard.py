@@ -27,21 +27,8 @@ class SaleComboWizard(models.TransientModel):
         for line in self.line_ids:
             current_sequence += 1 # Tăng thứ tự để dòng con nằm ngay dưới dòng cha.
             
-            # Chuẩn bị dữ liệu tạo dòng con.
-            vals = {
-                'order_id': parent.order_id.id,       # Thuộc cùng đơn hàng với cha.
-                'parent_line_id': parent.id,          # Link với cha.
-                'is_combo_child': True,               # Đánh dấu là con.
-                'product_id': line.product_id.id,
-                # Thêm dấu thụt đầu dòng (indentation) để đẹp UI.
-                'name': "  ↳ " + (line.product_id.description_sale or line.product_id.name),
-                'product_uom_qty': line.quantity,
-                'product_uom_id': line.uom_id.id,
-                'price_unit': 0.0,                    # Giá bằng 0 (vì giá nằm ở cha).
-                'tax_ids': [(6, 0, [])],              # Không chịu thuế (thuế nằm ở cha).
-                'sequence': current_sequence,
-            }
-            vals_list.append(vals)
+            # Chuẩn bị dữ liệu tạo dòng con (xem SaleOrderLine._prepare_combo_child_vals).
+            vals_list.append(parent._prepare_combo_child_vals(line.product_id, line.quantity, line.uom_id, current_sequence))
         
         # Tạo hàng loạt các dòng con.
         if vals_list: